@@ -19,7 +19,7 @@ if python -m flake8 --config=setup.cfg 1>&2;
 then
     print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
     echo $LF 1>&2
-    if python structure_test.py
+    if python structure_test.py && python shared_modules_test.py
     then
         cd ya_news
         export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
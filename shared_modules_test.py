@@ -0,0 +1,36 @@
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+ya_news_app = BASE_DIR / 'ya_news/news'
+ya_note_app = BASE_DIR / 'ya_note/notes'
+
+# Модули, которые проекты делят без изменений. Всё, что зависит от
+# приложения (имена, псевдонимы, бюджеты), берётся из settings, поэтому
+# копии должны совпадать побайтно.
+shared_modules = (
+    'auth.py',
+    'bench.py',
+    'db.py',
+    'loadtest.py',
+    'middleware.py',
+    'mixins.py',
+    'profiling.py',
+    'routers.py',
+    'templating.py',
+    'management/commands/sync_replicas.py',
+)
+
+message_template = (
+    '\nКопии общего модуля `{module}` в ya_news и ya_note разошлись. '
+    'Внесите изменение в обе копии.'
+)
+
+errors = []
+for module in shared_modules:
+    news_copy = ya_news_app / module
+    note_copy = ya_note_app / module
+    if news_copy.read_bytes() != note_copy.read_bytes():
+        errors.append(message_template.format(module=module))
+
+assert not errors, ''.join(errors)
@@ -1,15 +1,101 @@
+"""Админка новостей, рассчитанная на длинные ветки комментариев.
+
+Инлайн на странице новости показывает комментарии постранично
+(NEWS_ADMIN_COMMENTS_PER_PAGE, новые сначала), автор выбирается
+виджетом raw id вместо <select> со всеми пользователями. Полный список
+комментариев новости — в отдельной админке Comment.
+"""
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
 from .models import Comment, News
 
+# Параметр страницы комментариев на странице новости в админке.
+COMMENTS_PAGE_VAR = 'comments_page'
+
+
+class CommentInlineFormSet(BaseInlineFormSet):
+    """Формы только для одной страницы комментариев новости.
+
+    При сохранении страница могла сдвинуться (новые комментарии,
+    ?comments_page в адресе), поэтому формы строятся по присланным id
+    комментариев этой новости, а не по номеру страницы.
+    """
+    page_number = 1
+    page = None
+
+    def submitted_ids(self):
+        pk_field = self.model._meta.pk
+        ids = []
+        for index in range(self.initial_form_count()):
+            value = self.data.get(f'{self.add_prefix(index)}-{pk_field.name}')
+            try:
+                ids.append(pk_field.to_python(value))
+            except ValidationError:
+                continue
+        return ids
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            if self.is_bound:
+                self._queryset = queryset.filter(pk__in=self.submitted_ids())
+            else:
+                paginator = Paginator(
+                    queryset, settings.NEWS_ADMIN_COMMENTS_PER_PAGE
+                )
+                self.page = paginator.get_page(self.page_number)
+                self._queryset = self.page.object_list
+        return self._queryset
 
-class CommentInline(admin.StackedInline):
+
+class CommentInline(admin.TabularInline):
     model = Comment
+    formset = CommentInlineFormSet
+    template = 'admin/news/comment_inline.html'
     extra = 0
+    fields = ('author', 'text', 'created')
+    readonly_fields = ('created',)
+    raw_id_fields = ('author',)
+    ordering = ('-created', '-id')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        # Класс формсета создаётся заново на каждый запрос.
+        formset.page_number = request.GET.get(COMMENTS_PAGE_VAR, 1)
+        return formset
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count', 'last_comment_at')
+    search_fields = ('title',)
+    readonly_fields = ('comment_count', 'last_comment_at', 'all_comments')
     inlines = [
         CommentInline,
     ]
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, obj):
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">Комментариев: {}</a>',
+            url, obj.pk, obj.comment_count,
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    autocomplete_fields = ('news', 'author')
+    search_fields = ('text',)
+    # По первичному ключу: без сортировки всей таблицы по created.
+    ordering = ('-id',)
+    # Полный COUNT(*) по всей таблице комментариев при поиске не нужен.
+    show_full_result_count = False
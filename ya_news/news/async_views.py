@@ -0,0 +1,94 @@
+"""Асинхронные версии NewsList и NewsDetail для работы под ASGI.
+
+Под ASGI Django 3.2 выполняет синхронные представления в одном общем
+потоке, и медленные запросы выстраиваются в очередь. Здесь в отдельном
+ограниченном пуле потоков (NEWS_ASYNC_DB_WORKERS) выполняется только
+работа с БД: представление собирает контекст, и все его QuerySet
+и request.user вычисляются там же. Шаблон отрисовывается уже в цикле
+событий, без перехода в поток и обратно. Запрос к БД из шаблона Django
+в цикле событий не пропустит (SynchronousOnlyOperation), так что
+незагруженные данные не останутся незамеченными.
+
+Одновременно к базе идёт не больше запросов, чем потоков в пуле, а цикл
+событий тем временем обслуживает остальные соединения, в том числе
+медленных клиентов.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import QuerySet
+
+from .views import NewsComment, NewsDetail, NewsList
+
+
+@lru_cache(maxsize=None)
+def db_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.NEWS_ASYNC_DB_WORKERS,
+        thread_name_prefix='news-db',
+    )
+
+
+def _run_with_connection(func):
+    """Выполняет func в потоке пула, соблюдая CONN_MAX_AGE соединения."""
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_pool(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле БД, не блокируя цикл событий.
+
+    Контекст (в том числе счётчик запросов бюджета) копируется в поток.
+    """
+    context = contextvars.copy_context()
+    call = partial(context.run, _run_with_connection,
+                   partial(func, *args, **kwargs))
+    return await asyncio.get_running_loop().run_in_executor(
+        db_executor(), call
+    )
+
+
+def _load(view, request, *args, **kwargs):
+    """Вызывает CBV и вычисляет всё, что шаблону нужно из БД.
+
+    Ответ возвращается неотрисованным: TemplateResponse с готовым
+    контекстом.
+    """
+    request.user.is_authenticated
+    response = view(request, *args, **kwargs)
+    context = getattr(response, 'context_data', None) or {}
+    for value in context.values():
+        if isinstance(value, QuerySet):
+            len(value)
+    return response
+
+
+async def _respond(view, request, *args, **kwargs):
+    """Данные — в пуле БД, отрисовка — в цикле событий."""
+    response = await run_in_db_pool(_load, view, request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+_news_list = NewsList.as_view()
+_news_detail = NewsDetail.as_view()
+_news_comment = NewsComment.as_view()
+
+
+async def news_list(request):
+    """Главная страница."""
+    return await _respond(_news_list, request)
+
+
+async def news_detail(request, pk):
+    """Страница новости; POST — отправка комментария."""
+    view = _news_comment if request.method == 'POST' else _news_detail
+    return await _respond(view, request, pk=pk)
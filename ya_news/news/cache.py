@@ -0,0 +1,160 @@
+"""Кеш отрендеренных страниц news:home и news:detail.
+
+Ключ страницы включает версию данных, от которых она зависит. Запись
+новости или комментария увеличивает версию, и все старые записи кеша
+перестают находиться — их вытеснит сам бэкенд по таймауту.
+
+Версия хранится в том же кеше, поэтому инвалидация видна только тем
+процессам, которые этот кеш делят. С LocMemCache (бэкенд по умолчанию)
+кеш корректен лишь в одном процессе: остальные процессы до таймаута
+отдают страницы, закешированные до записи. Под несколькими процессами
+нужен общий бэкенд ('file') или NEWS_PAGE_CACHE_ENABLED = False.
+
+Страница, собранная с отстающей реплики уже после роста версии,
+живёт в кеше до NEWS_PAGE_CACHE_TIMEOUT (см. routers).
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+HOME_VERSION_KEY = 'pages:version:home'
+DETAIL_VERSION_KEY = 'pages:version:detail:{pk}'
+CACHE_HEADER = 'X-Page-Cache'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def page_cache():
+    return caches[settings.NEWS_PAGE_CACHE_ALIAS]
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def page_cache_stats():
+    """Счётчики попаданий и промахов кеша в текущем процессе."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def reset_page_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _get_version(key):
+    """Текущая версия данных; при первом обращении создаётся заново.
+
+    Начальное значение берётся из часов, чтобы версия, вытесненная
+    из кеша и созданная повторно, не совпала со старой.
+    """
+    cache = page_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    cache = page_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_pages(news_id=None):
+    """Сбрасывает главную и, если указана новость, её страницу."""
+    _bump_version(HOME_VERSION_KEY)
+    if news_id is not None:
+        _bump_version(DETAIL_VERSION_KEY.format(pk=news_id))
+
+
+def auth_state(request):
+    """Часть ключа, зависящая от пользователя.
+
+    Страница авторизованного пользователя содержит его имя и CSRF-токен,
+    поэтому она кешируется отдельно для каждого пользователя и его
+    CSRF-cookie. Без cookie токен на странице будет новым, такую
+    страницу не кешируем.
+    """
+    if not request.user.is_authenticated:
+        return 'anon'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if not csrf_cookie:
+        return None
+    digest = hashlib.sha1(csrf_cookie.encode()).hexdigest()[:12]
+    return f'user:{request.user.pk}:{digest}'
+
+
+def page_version(news_id=None):
+    """Версия данных главной и, если указана новость, её страницы."""
+    version = _get_version(HOME_VERSION_KEY)
+    if news_id is not None:
+        version = '{}.{}'.format(
+            version, _get_version(DETAIL_VERSION_KEY.format(pk=news_id))
+        )
+    return version
+
+
+def page_cache_key(request, page, news_id=None):
+    """Ключ страницы или None, если её нельзя брать из кеша."""
+    if not settings.NEWS_PAGE_CACHE_ENABLED or request.method != 'GET':
+        return None
+    state = auth_state(request)
+    if state is None:
+        return None
+    version = page_version(news_id)
+    path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+    return f'pages:{page}:{version}:{state}:{path}'
+
+
+class PageCacheMixin:
+    """Отдаёт GET-ответ CBV из кеша страниц.
+
+    page_cache_name задаёт имя страницы в ключе, а если страница
+    относится к одной новости, её pk берётся из kwargs['pk'].
+    """
+    page_cache_name = None
+
+    def get(self, request, *args, **kwargs):
+        key = page_cache_key(
+            request, self.page_cache_name, kwargs.get('pk')
+        )
+        if key is None:
+            return super().get(request, *args, **kwargs)
+        cache = page_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            _record('hits')
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response[CACHE_HEADER] = 'hit'
+            return response
+        _record('misses')
+        response = super().get(request, *args, **kwargs)
+        response[CACHE_HEADER] = 'miss'
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key,
+                    (rendered.content, rendered['Content-Type']),
+                    settings.NEWS_PAGE_CACHE_TIMEOUT,
+                )
+            )
+        return response
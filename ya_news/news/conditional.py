@@ -0,0 +1,86 @@
+"""Условные GET-запросы (ETag и Last-Modified) для страниц новостей.
+
+Валидаторы считаются на каждом запросе одним запросом к news_news,
+без отрисовки страницы и без кеша: News.updated_at меняется при правке
+новости и при каждом добавлении, правке и удалении её комментария
+(news/counters.py), поэтому ответ одинаков во всех процессах и сразу
+после записи. Удаление новости отмечается на самой свежей
+из оставшихся, иначе Last-Modified главной не изменился бы. Чужую
+страницу отсекает состояние входа в ETag. Если валидаторы совпали
+с присланными клиентом, представление не выполняется: ответ — 304 Not
+Modified. Кеш страниц для этого не нужен и от NEWS_PAGE_CACHE_ENABLED
+не зависит.
+
+If-Modified-Since сравнивается с точностью до секунды, поэтому
+Last-Modified отдаётся, только когда секунда последнего изменения
+закончилась: иначе следующее изменение в ту же секунду дало бы 304.
+"""
+import hashlib
+import time
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cache import auth_state
+from .models import News
+
+
+def home_validators():
+    """Данные главной: последнее изменение новостей и их число."""
+    row = News.objects.aggregate(
+        modified=Max('updated_at'), count=Count('pk')
+    )
+    if row['modified'] is None:
+        return None
+    return row['modified'], row['count']
+
+
+def detail_validators(news_id):
+    """Данные страницы новости: её последнее изменение."""
+    return (
+        News.objects.filter(pk=news_id)
+        .values_list('updated_at', 'comment_count')
+        .first()
+    )
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 на GET и HEAD, если данные страницы не менялись.
+
+    get_validators() возвращает данные для ETag, первым — время
+    изменения для Last-Modified, или None, если условный ответ
+    невозможен. Миксин ставится перед PageCacheMixin: при
+    совпадении не нужен и кеш страниц.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        state = auth_state(request)
+        validators = None if state is None else self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        digest = hashlib.sha1(
+            repr((validators, state)).encode()
+        ).hexdigest()
+        etag = f'W/"{digest}"'
+        last_modified = timegm(validators[0].utctimetuple())
+        if last_modified >= int(time.time()):
+            last_modified = None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(
+                response, no_cache=True,
+                private=request.user.is_authenticated,
+            )
+        return response
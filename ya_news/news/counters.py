@@ -0,0 +1,122 @@
+"""Денормализованные счётчики комментариев новости.
+
+News.comment_count и News.last_comment_at обновляются одним UPDATE
+с выражениями F() в той же транзакции, что и сам комментарий, поэтому
+одновременные комментарии не теряют приращений. Тот же UPDATE отмечает
+изменение страницы в News.updated_at (news/conditional.py). Сигналы post_save
+и post_delete покрывают форму комментария, удаление, админку и каскадное
+удаление автора; bulk_create сигналов не отправляет, после него
+вызывается refresh_counters(). Накопившееся расхождение исправляет
+команда reconcile_comment_counts.
+"""
+from django.db.models import (
+    Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Comment, News
+
+
+def _comments():
+    return Comment.objects.filter(news=OuterRef('pk')).order_by().values(
+        'news'
+    )
+
+
+def actual_count():
+    """Подзапрос: настоящее число комментариев новости."""
+    return Coalesce(
+        Subquery(
+            _comments().annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def actual_last_comment_at():
+    """Подзапрос: время последнего комментария новости."""
+    return Subquery(
+        _comments().annotate(last=Max('created')).values('last')
+    )
+
+
+def comment_added(comment):
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=Greatest(
+            Coalesce(F('last_comment_at'), Value(comment.created)),
+            Value(comment.created),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def comment_removed(comment):
+    # Удалённый комментарий мог быть последним: время берётся
+    # из индекса (news, created, id) тем же UPDATE.
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_comment_at=actual_last_comment_at(),
+        updated_at=timezone.now(),
+    )
+
+
+def comment_changed(comment):
+    News.objects.filter(pk=comment.news_id).update(updated_at=timezone.now())
+
+
+def news_removed():
+    """Удалённая новость пропадает с главной: изменение отмечается
+    на самой свежей из оставшихся, чтобы вырос MAX(updated_at).
+    """
+    News.objects.filter(
+        pk__in=Subquery(News.objects.order_by('-updated_at').values('pk')[:1])
+    ).update(updated_at=timezone.now())
+
+
+def _drifted(news_ids=None):
+    """Pk новостей, у которых счётчики расходятся с комментариями."""
+    queryset = News.objects.all()
+    if news_ids is not None:
+        queryset = queryset.filter(pk__in=news_ids)
+    return queryset.annotate(
+        actual_count=actual_count(),
+        actual_last=actual_last_comment_at(),
+    ).filter(
+        ~Q(comment_count=F('actual_count'))
+        # ~Q() по nullable-полю истинно и при NULL: без проверки
+        # на NULL новости без комментариев считались бы расхождением.
+        | Q(last_comment_at__isnull=False, actual_last__isnull=False)
+        & ~Q(last_comment_at=F('actual_last'))
+        | Q(last_comment_at__isnull=True, actual_last__isnull=False)
+        | Q(last_comment_at__isnull=False, actual_last__isnull=True)
+    ).values('pk')
+
+
+def _update_counters(queryset):
+    return queryset.update(
+        comment_count=actual_count(),
+        last_comment_at=actual_last_comment_at(),
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_counters(news_ids=None):
+    """Пересчитывает счётчики новостей; возвращает число исправленных.
+
+    news_ids=None — все новости. Обновляются только строки
+    с расхождением.
+    """
+    return _update_counters(
+        News.objects.filter(pk__in=Subquery(_drifted(news_ids)))
+    )
+
+
+def fix_counters(news_ids):
+    """Как refresh_counters, но возвращает список исправленных pk."""
+    fixed = list(_drifted(news_ids).values_list('pk', flat=True))
+    if fixed:
+        _update_counters(News.objects.filter(pk__in=fixed))
+    return fixed
@@ -0,0 +1,228 @@
+"""Синтетический набор данных для замеров и оценки ёмкости.
+
+generate() пишет в БД пользователей, новости и комментарии пачками
+bulk_create: миллионы строк без построчных save() и сигналов. Один и тот
+же seed даёт один и тот же набор (тексты, даты, распределение
+комментариев), поэтому замеры на разных машинах и в разное время можно
+сравнивать между собой.
+
+Распределения приближены к настоящим:
+- комментарии по новостям — закон Ципфа с показателем skew: немногие
+  новости собирают большую часть обсуждения, у большинства пусто;
+- авторы комментариев — тоже по Ципфу, активных комментаторов мало;
+- новости равномерно распределены по days дням до end_date, комментарии
+  пишутся в основном в первые часы после новости.
+
+Первичные ключи задаются явно, начиная с MAX(id) + 1: внешние ключи
+известны до вставки, и набор можно дописать в непустую базу. Явные id
+не двигают последовательности PostgreSQL, поэтому в конце они
+выставляются по MAX(id) — иначе следующий обычный INSERT получил бы
+уже занятый id.
+Счётчики комментариев новостей пересчитываются в конце refresh_counters().
+"""
+import itertools
+import random
+from bisect import bisect
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .counters import refresh_counters
+from .models import Comment, News
+from .search import index_news
+
+DEFAULT_SEED = 1
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SKEW = 1.1
+# Фиксированная дата вместо «сегодня»: иначе набор зависел бы от дня
+# генерации.
+DEFAULT_END_DATE = date(2024, 1, 1)
+DEFAULT_DAYS = 365
+# Новостей на один UPDATE пересчёта счётчиков.
+REFRESH_BATCH_SIZE = 1000
+# Среднее время от публикации новости до комментария.
+MEAN_COMMENT_DELAY = timedelta(hours=6)
+
+# Словарь с грубыми весами употребительности: частые слова чаще
+# попадают в текст, как в живом языке.
+WORDS = {
+    'и': 40, 'в': 35, 'не': 25, 'на': 25, 'что': 15, 'с': 15, 'это': 12,
+    'как': 10, 'по': 10, 'но': 8, 'из': 6, 'за': 6, 'для': 6, 'уже': 5,
+    'так': 5, 'все': 5, 'только': 4, 'ещё': 4, 'очень': 4, 'когда': 4,
+    'город': 3, 'год': 3, 'время': 3, 'человек': 3, 'жители': 3,
+    'новости': 3, 'сегодня': 3, 'вчера': 2, 'власти': 2, 'решение': 2,
+    'проект': 2, 'улица': 2, 'школа': 2, 'работа': 2, 'погода': 2,
+    'дорога': 2, 'цены': 2, 'рынок': 2, 'компания': 2, 'сотрудники': 2,
+    'район': 2, 'центр': 2, 'парк': 2, 'мост': 1, 'метро': 1,
+    'автобус': 1, 'больница': 1, 'театр': 1, 'выставка': 1, 'концерт': 1,
+    'матч': 1, 'команда': 1, 'победа': 1, 'турнир': 1, 'фестиваль': 1,
+    'ремонт': 2, 'строительство': 1, 'открытие': 1, 'закрытие': 1,
+    'снег': 1, 'дождь': 1, 'мороз': 1, 'жара': 1, 'весна': 1, 'осень': 1,
+    'объявили': 2, 'открыли': 1, 'построят': 1, 'рассказали': 2,
+    'сообщили': 2, 'решили': 1, 'обещают': 1, 'выросли': 1, 'снизились': 1,
+    'начнётся': 1, 'завершился': 1, 'пройдёт': 1, 'появится': 1,
+    'новый': 2, 'старый': 1, 'большой': 1, 'главный': 1, 'городской': 1,
+    'местный': 1, 'первый': 1, 'последний': 1, 'хороший': 1, 'плохой': 1,
+    'согласен': 2, 'спасибо': 2, 'интересно': 2, 'наконец': 1,
+    'странно': 1, 'давно': 1, 'пора': 1, 'правда': 1, 'думаю': 1,
+}
+_WORD_LIST = list(WORDS)
+_WORD_WEIGHTS = list(itertools.accumulate(WORDS.values()))
+
+
+class TextGenerator:
+    """Русские предложения из WORDS; случайность — только из rng."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def words(self, count):
+        return self.rng.choices(_WORD_LIST, cum_weights=_WORD_WEIGHTS,
+                                k=count)
+
+    def sentence(self, min_words=4, max_words=14):
+        text = ' '.join(self.words(self.rng.randint(min_words, max_words)))
+        return text[0].upper() + text[1:] + self.rng.choice('.....!?')
+
+    def paragraph(self, min_sentences, max_sentences):
+        return ' '.join(
+            self.sentence()
+            for _ in range(self.rng.randint(min_sentences, max_sentences))
+        )
+
+    def title(self, max_length):
+        title = self.sentence(2, 6).rstrip('.!?')
+        return title[:max_length].rstrip()
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса рангов 1..count по закону Ципфа."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+class SkewedChoice:
+    """Выбор из items с весами Ципфа по случайной перестановке рангов.
+
+    Перестановка нужна, чтобы популярность не совпадала с порядком id.
+    """
+
+    def __init__(self, rng, items, skew):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.weights = zipf_weights(len(self.items), skew)
+
+    def __call__(self):
+        total = self.weights[-1]
+        return self.items[bisect(self.weights, self.rng.random() * total)]
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _reset_sequences(models):
+    """Выставляет последовательности id по MAX(id); в SQLite не нужно."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def _insert(model, objects, batch_size, progress=None):
+    """Пишет объекты пачками, каждую — в своей транзакции."""
+    inserted = 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            return inserted
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        inserted += len(batch)
+        if progress is not None:
+            progress(model, inserted)
+
+
+def _news_date(index, news_count, end_date, days):
+    """Новости равномерно по days дням, новые id — свежее."""
+    return end_date - timedelta(
+        days=(news_count - 1 - index) * days // max(news_count, 1)
+    )
+
+
+def generate(users=1000, news=10_000, comments=100_000, seed=DEFAULT_SEED,
+             skew=DEFAULT_SKEW, end_date=DEFAULT_END_DATE, days=DEFAULT_DAYS,
+             batch_size=DEFAULT_BATCH_SIZE, username_prefix='user',
+             progress=None):
+    """Генерирует набор данных; возвращает число строк по моделям.
+
+    progress(model, inserted) вызывается после каждой пачки.
+    """
+    if comments and not (users and news):
+        raise ValueError('Для комментариев нужны пользователи и новости.')
+    User = get_user_model()
+    rng = random.Random(seed)
+    text = TextGenerator(rng)
+    title_length = News._meta.get_field('title').max_length
+
+    joined = datetime.combine(
+        end_date - timedelta(days=days), time(), tzinfo=timezone.utc
+    )
+    first_user = _next_id(User)
+    user_ids = range(first_user, first_user + users)
+    counts = {User: _insert(User, (
+        User(
+            pk=user_id, username=f'{username_prefix}{user_id}',
+            password=UNUSABLE_PASSWORD_PREFIX, date_joined=joined,
+        )
+        for user_id in user_ids
+    ), batch_size, progress)}
+
+    first_news = _next_id(News)
+    news_ids = range(first_news, first_news + news)
+    counts[News] = _insert(News, (
+        News(
+            pk=news_id, title=text.title(title_length),
+            text=text.paragraph(3, 8),
+            date=_news_date(index, news, end_date, days),
+        )
+        for index, news_id in enumerate(news_ids)
+    ), batch_size, progress)
+
+    # bulk_create не отправляет post_save: индекс поиска — отдельно.
+    index_news(News.objects.filter(pk__gte=first_news))
+    pick_news = SkewedChoice(rng, news_ids, skew) if comments else None
+    pick_author = SkewedChoice(rng, user_ids, skew) if comments else None
+    mean_delay = MEAN_COMMENT_DELAY.total_seconds()
+
+    def make_comments():
+        first_comment = _next_id(Comment)
+        for comment_id in range(first_comment, first_comment + comments):
+            news_id = pick_news()
+            published = datetime.combine(
+                _news_date(news_id - first_news, news, end_date, days),
+                time(), tzinfo=timezone.utc,
+            )
+            yield Comment(
+                pk=comment_id, news_id=news_id, author_id=pick_author(),
+                text=text.paragraph(1, 3),
+                created=published + timedelta(
+                    seconds=rng.expovariate(1 / mean_delay)
+                ),
+            )
+
+    counts[Comment] = _insert(Comment, make_comments(), batch_size, progress)
+    _reset_sequences([User, News, Comment])
+    if comments:
+        for start in range(0, news, REFRESH_BATCH_SIZE):
+            with transaction.atomic():
+                refresh_counters(news_ids[start:start + REFRESH_BATCH_SIZE])
+    return counts
@@ -0,0 +1,55 @@
+"""Настройка соединений с БД для боевого профиля."""
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA из SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_lock(func, *args, **kwargs):
+    """Выполняет func в транзакции, повторяя её, если БД заблокирована.
+
+    SQLite отвечает «database is locked», когда две транзакции
+    одновременно пытаются начать запись; busy_timeout такую ситуацию
+    не разрешает, помогает только повтор транзакции целиком. Внутри
+    уже открытой транзакции повторять нечего — func просто вызывается.
+    """
+    if connection.in_atomic_block:
+        return func(*args, **kwargs)
+    retries = settings.DB_LOCK_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == retries or not is_lock_error(error):
+                raise
+        time.sleep(settings.DB_LOCK_RETRY_DELAY * 2 ** attempt)
+
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RetryOnLockMixin:
+    """Повторяет записывающий запрос CBV при блокировке БД.
+
+    Оборачивается dispatch, а не post(): DeleteView принимает и DELETE,
+    а обработчики PUT и PATCH тоже пишут в БД.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in UNSAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        return retry_on_lock(super().dispatch, request, *args, **kwargs)
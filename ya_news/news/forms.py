@@ -1,7 +1,14 @@
-from django.forms import ModelForm
+from functools import lru_cache
+from itertools import chain
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.forms import ModelForm
 
 from .models import Comment
+from .moderation import BadWordMatcher, load_words
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +18,30 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+@lru_cache(maxsize=None)
+def bad_words_matcher():
+    """Автомат по BAD_WORDS и словарю из BAD_WORDS_FILE.
+
+    Строится один раз на процесс при первой проверке.
+    """
+    return BadWordMatcher(
+        chain(BAD_WORDS, load_words(settings.BAD_WORDS_FILE)),
+        whole_words=settings.BAD_WORDS_WHOLE_WORDS,
+    )
+
+
+@receiver(setting_changed)
+def reset_bad_words_matcher(setting, **kwargs):
+    if setting in ('BAD_WORDS_FILE', 'BAD_WORDS_WHOLE_WORDS'):
+        bad_words_matcher.cache_clear()
+
+
+def validate_comment_text(text):
+    """Проверка текста комментария без создания формы."""
+    if bad_words_matcher().search(text):
+        raise ValidationError(WARNING)
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +51,5 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        validate_comment_text(text)
         return text
@@ -0,0 +1,203 @@
+"""Нагрузочное тестирование WSGI-приложения внутри процесса.
+
+Запросы подаются прямо в WSGI-callable из нескольких потоков (и, при
+необходимости, процессов) без сети и внешнего сервера. Для каждого
+имени URL считаются задержки, пропускная способность и число
+SQL-запросов на запрос (по сигналу queries_counted), а также доля
+чтений, обслуженных репликами БД.
+"""
+import io
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+from django.db import connections
+
+from .middleware import queries_counted
+from .routers import add_read_stats, read_counts, reset_read_stats
+
+HOST = 'localhost'
+
+# Имя представления и число запросов к БД последнего HTTP-запроса потока.
+_last_view = threading.local()
+
+# Задание для дочерних процессов: наследуется при fork, не сериализуется.
+_job = None
+
+
+def remember_view(sender, view_name, stats, **kwargs):
+    _last_view.value = (view_name, stats.count)
+
+
+class VirtualUser:
+    """Клиент со своими cookie и списком страниц для обхода.
+
+    pages — пары (имя URL, путь). Cookie из ответов (сессия, CSRF)
+    запоминаются и отправляются дальше, как это делает браузер.
+    """
+
+    def __init__(self, pages, cookies=None):
+        self.pages = pages
+        self.cookies = dict(cookies or {})
+
+    def get(self, application, path):
+        """Выполняет GET и возвращает статус и число SQL-запросов."""
+        path, _, query_string = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path,
+            'QUERY_STRING': query_string, 'SERVER_NAME': HOST,
+            'SERVER_PORT': '80', 'HTTP_HOST': HOST,
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            ),
+            'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+        }
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = headers
+
+        _last_view.value = None
+        body = application(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        for name, value in response['headers']:
+            if name.lower() == 'set-cookie':
+                self.set_cookies(value)
+        queries = _last_view.value[1] if _last_view.value else None
+        return response['status'], queries
+
+    def set_cookies(self, header):
+        for morsel in SimpleCookie(header).values():
+            if morsel.value:
+                self.cookies[morsel.key] = morsel.value
+            else:
+                self.cookies.pop(morsel.key, None)
+
+
+def _drive(application, user, count, offset):
+    """Обходит страницы пользователя по кругу, count запросов."""
+    samples = []
+    for index in range(offset, offset + count):
+        url_name, path = user.pages[index % len(user.pages)]
+        started = time.perf_counter()
+        try:
+            status, queries = user.get(application, path)
+        except Exception:
+            status, queries = 0, None
+        samples.append(
+            (url_name, time.perf_counter() - started, queries, status)
+        )
+    return samples
+
+
+def _run_threads(application, users, total, threads):
+    shares = [total // threads + (index < total % threads)
+              for index in range(threads)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = pool.map(
+            lambda index: _drive(
+                application, users[index % len(users)], shares[index], index
+            ),
+            range(threads),
+        )
+        samples = [sample for result in results for sample in result]
+    connections.close_all()
+    return samples
+
+
+def _run_job(index):
+    application, users, total, threads, processes = _job
+    share = total // processes + (index < total % processes)
+    reset_read_stats()
+    samples = _run_threads(application, users[index::processes] or users,
+                           share, threads)
+    return samples, read_counts()
+
+
+def run_load(application, users, total, threads=1, processes=1):
+    """Выполняет total запросов и возвращает (замеры, время в секундах).
+
+    Замер — кортеж (имя URL, задержка в секундах, число SQL-запросов,
+    HTTP-статус; 0 — исключение). Виртуальные пользователи делятся
+    между процессами, внутри процесса — между потоками. Дочерние
+    процессы запускаются через fork и работают с той же базой; их
+    счётчики чтений по базам добавляются к счётчикам этого процесса.
+    """
+    global _job
+    queries_counted.connect(remember_view, dispatch_uid='loadtest')
+    try:
+        started = time.perf_counter()
+        if processes == 1:
+            samples = _run_threads(application, users, total, threads)
+        else:
+            _job = (application, users, total, threads, processes)
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(processes) as pool:
+                results = pool.map(_run_job, range(processes))
+            _job = None
+            samples = []
+            for result, counts in results:
+                samples.extend(result)
+                add_read_stats(counts)
+        return samples, time.perf_counter() - started
+    finally:
+        queries_counted.disconnect(dispatch_uid='loadtest')
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank - 1, 0)]
+
+
+def summarize(samples, elapsed):
+    """Сводка по именам URL: задержки в мс, запросов в секунду, SQL."""
+    by_name = {}
+    for url_name, latency, queries, status in samples:
+        by_name.setdefault(url_name, []).append((latency, queries, status))
+    results = []
+    for url_name, rows in sorted(by_name.items()):
+        latencies = sorted(latency * 1000 for latency, _, _ in rows)
+        counted = [queries for _, queries, _ in rows if queries is not None]
+        results.append({
+            'url_name': url_name,
+            'requests': len(rows),
+            'errors': sum(1 for *_, status in rows
+                          if status == 0 or status >= 500),
+            'rps': len(rows) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'queries_per_request': (
+                sum(counted) / len(counted) if counted else None
+            ),
+        })
+    return results
+
+
+def format_results(results):
+    lines = ['{:<16} {:>7} {:>9} {:>9} {:>9} {:>9} {:>8} {:>6}'.format(
+        'url', 'reqs', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries',
+        'errors',
+    )]
+    for row in results:
+        queries = row['queries_per_request']
+        lines.append(
+            '{:<16} {:>7} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>8} '
+            '{:>6}'.format(
+                row['url_name'], row['requests'], row['rps'],
+                row['p50_ms'], row['p95_ms'], row['p99_ms'],
+                '-' if queries is None else f'{queries:.1f}', row['errors'],
+            )
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,148 @@
+import asyncio
+import importlib
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from news.bench import isolated_database
+from news.counters import refresh_counters
+from news.models import Comment, News
+
+HOST = 'localhost'
+
+
+def reload_urlconf():
+    """Перечитывает URL-конфигурацию после смены NEWS_ASYNC_VIEWS."""
+    importlib.reload(importlib.import_module('news.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def summary(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    return '{:>5}: {:7.1f} req/s, p50 {:7.1f} ms, p99 {:7.1f} ms'.format(
+        name,
+        len(latencies) / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность главной и страницы новости '
+        'под WSGI (синхронные представления, фиксированное число '
+        'потоков-воркеров) и под ASGI (асинхронные представления) при '
+        'большом числе одновременных медленных клиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=500,
+                            help='Одновременных соединений для ASGI.')
+        parser.add_argument('--wsgi-workers', type=int, default=16,
+                            help='Потоков-воркеров WSGI-сервера.')
+        parser.add_argument('--client-delay', type=float, default=0.2,
+                            help='Сколько секунд клиент читает ответ.')
+        parser.add_argument('--news', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with isolated_database(), override_settings(
+            NEWS_PAGE_CACHE_ENABLED=False, QUERY_BUDGET_STRICT=False
+        ):
+            self.paths = self.seed(options['news'])
+            self.delay = options['client_delay']
+            total = options['requests']
+            with override_settings(NEWS_ASYNC_VIEWS=False):
+                reload_urlconf()
+                self.stdout.write(
+                    self.run_wsgi(total, options['wsgi_workers'])
+                )
+            with override_settings(NEWS_ASYNC_VIEWS=True):
+                reload_urlconf()
+                self.stdout.write(
+                    self.run_asgi(total, options['concurrency'])
+                )
+            reload_urlconf()
+
+    def seed(self, news_count):
+        author = get_user_model().objects.create(username='bench')
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст новости. ' * 20)
+            for index in range(news_count)
+        )
+        all_news = list(News.objects.all())
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text=f'Комментарий {index}')
+            for news in all_news for index in range(20)
+        )
+        refresh_counters()
+        return ['/'] + [f'/news/{news.pk}/' for news in all_news]
+
+    def run_wsgi(self, total, workers):
+        """Медленный клиент держит поток-воркер, пока читает ответ."""
+        handler = WSGIHandler()
+
+        def request(path):
+            started = time.perf_counter()
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path,
+                'QUERY_STRING': '', 'SERVER_NAME': HOST,
+                'SERVER_PORT': '80', 'HTTP_HOST': HOST,
+                'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+            }
+            body = b''.join(handler(environ, lambda *args: None))
+            time.sleep(self.delay)
+            assert body
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(request, self.iter_paths(total)))
+        return summary('WSGI', latencies, time.perf_counter() - started)
+
+    def run_asgi(self, total, concurrency):
+        """Медленный клиент ждёт в цикле событий, не занимая поток."""
+        handler = ASGIHandler()
+
+        async def request(path, limit):
+            async with limit:
+                started = time.perf_counter()
+                scope = {
+                    'type': 'http', 'method': 'GET', 'path': path,
+                    'query_string': b'', 'headers': [(b'host', HOST.encode())],
+                    'server': (HOST, 80), 'client': ('127.0.0.1', 0),
+                }
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if message['type'] == 'http.response.body':
+                        await asyncio.sleep(self.delay)
+
+                await handler(scope, receive, send)
+                return time.perf_counter() - started
+
+        async def run():
+            limit = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(request(path, limit) for path in self.iter_paths(total))
+            )
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run())
+        return summary('ASGI', latencies, time.perf_counter() - started)
+
+    def iter_paths(self, total):
+        for index in range(total):
+            yield self.paths[index % len(self.paths)]
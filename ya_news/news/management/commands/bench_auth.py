@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.bench import isolated_database, measure
+from news.models import Comment, News
+
+
+def profiles():
+    """Прежняя схема (сессия и пользователь из БД) и кешированная.
+
+    Замер идёт в одном процессе, поэтому кешированной схеме хватает
+    LocMemCache.
+    """
+    return {
+        'db': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+            'USER_CACHE_ENABLED': False,
+        },
+        'cached': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'USER_CACHE_ENABLED': True,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сколько SQL-запросов и времени экономят кешированные сессия '
+        'и пользователь на странице новости для залогиненного читателя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with isolated_database(), override_settings(
+            NEWS_PAGE_CACHE_ENABLED=False, QUERY_BUDGET_STRICT=False,
+            ALLOWED_HOSTS=['testserver'],
+        ):
+            user = get_user_model().objects.create(username='bench')
+            news = News.objects.create(title='Новость', text='Текст')
+            Comment.objects.bulk_create(
+                Comment(news=news, author=user, text=f'Комментарий {index}')
+                for index in range(20)
+            )
+            url = reverse('news:detail', args=(news.pk,))
+            for name, overrides in profiles().items():
+                with override_settings(**overrides):
+                    client = Client()
+                    client.force_login(user)
+                    client.get(url)
+                    result = measure(lambda: client.get(url), options['runs'])
+                self.stdout.write(
+                    '{name:>7}: mean {mean_ms:6.2f} ms, p95 {p95_ms:6.2f} ms, '
+                    'queries {queries}'.format(name=name, **result)
+                )
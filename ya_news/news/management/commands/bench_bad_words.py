@@ -0,0 +1,53 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import BadWordMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def loop_search(words, text):
+    """Прежний способ: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку запрещённых слов циклом по словарю '
+        'и автоматом Ахо — Корасик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=5000)
+        parser.add_argument('--text-length', type=int, default=2000,
+                            help='Длина комментария в словах.')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        words = [self.random_word(rnd) for _ in range(options['words'])]
+        text = ' '.join(
+            self.random_word(rnd) for _ in range(options['text_length'])
+        )
+        runs = options['runs']
+        build = timeit.timeit(lambda: BadWordMatcher(words), number=1)
+        matcher = BadWordMatcher(words)
+        loop = timeit.timeit(lambda: loop_search(words, text), number=runs)
+        automaton = timeit.timeit(lambda: matcher.search(text), number=runs)
+        self.stdout.write(
+            f'Словарь: {len(words)} слов, текст: {len(text)} символов.\n'
+            f'Построение автомата: {build * 1000:.1f} ms\n'
+            f'Цикл по словарю: {loop / runs * 1000:.3f} ms на текст\n'
+            f'Автомат: {automaton / runs * 1000:.3f} ms на текст'
+        )
+
+    @staticmethod
+    def random_word(rnd):
+        return ''.join(rnd.choices(ALPHABET, k=rnd.randint(6, 12)))
@@ -0,0 +1,74 @@
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.bench import isolated_database
+from news.models import Comment, News
+from news.writebehind import reset_comment_queue
+
+MODES = (None, 'memory', 'file')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает приём комментариев через NewsComment из нескольких '
+        'потоков: запись в БД на каждый POST против отложенной записи '
+        'пачками (очередь в памяти и с журналом). Для отложенной записи '
+        'выводится и время до попадания всех комментариев в БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=100,
+                            help='Комментариев на один поток.')
+        parser.add_argument('--fsync', action='store_true',
+                            help='fsync журнала на каждый комментарий.')
+
+    def handle(self, *args, **options):
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as queue_dir:
+                queue_settings = override_settings(
+                    COMMENT_QUEUE=mode, COMMENT_QUEUE_DIR=queue_dir,
+                    COMMENT_QUEUE_FSYNC=options['fsync'],
+                    ALLOWED_HOSTS=['testserver'], QUERY_BUDGETS={},
+                )
+                with isolated_database(), queue_settings:
+                    self.stdout.write(self.run(
+                        mode, options['writers'], options['writes']
+                    ))
+
+    def run(self, mode, writers, writes):
+        news = News.objects.create(title='Новость', text='Текст')
+        url = reverse('news:detail', args=(news.pk,))
+        clients = []
+        for index in range(writers):
+            client = Client()
+            client.force_login(
+                get_user_model().objects.create(username=f'bench{index}')
+            )
+            clients.append(client)
+
+        def writer(client):
+            for index in range(writes):
+                client.post(url, {'text': f'Комментарий {index}'})
+            connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as pool:
+            list(pool.map(writer, clients))
+        accepted = time.perf_counter() - started
+        queue = reset_comment_queue()
+        durable = time.perf_counter() - started
+        written = Comment.objects.count()
+        line = '{:>8}: приём {:8.1f} комм./с, в БД {:8.1f} комм./с'.format(
+            mode or 'direct', written / accepted, written / durable
+        )
+        if queue is not None:
+            line += f', пачек {queue.batches}'
+        return f'{line}, записано {written} из {writers * writes}'
@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.db import connections, transaction
+from django.test import override_settings
+
+from news.bench import isolated_database
+from news.db import is_lock_error, retry_on_lock
+from news.models import Comment, News
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,
+    'temp_store': 'memory',
+}
+
+# Профили: PRAGMA, таймаут ожидания блокировки, постоянные соединения
+# и повтор транзакции при «database is locked».
+PROFILES = {
+    'default': {
+        'pragmas': {}, 'timeout': 5, 'persistent': False, 'retry': False,
+    },
+    'production': {
+        'pragmas': PRODUCTION_PRAGMAS, 'timeout': 20,
+        'persistent': True, 'retry': True,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запись комментариев из нескольких потоков при '
+        'настройках SQLite по умолчанию и в боевом профиле (WAL, '
+        'постоянные соединения, повтор при блокировке).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=200,
+                            help='Записей на один поток.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write('Замер имеет смысл только для SQLite.')
+            return
+        for name, profile in PROFILES.items():
+            with isolated_database():
+                self.stdout.write(self.run(
+                    name, profile, options['writers'], options['writes']
+                ))
+
+    def run(self, name, profile, writers, writes):
+        author = get_user_model().objects.create(username='bench')
+        news = News.objects.create(title='Новость', text='Текст')
+        options = connections.settings[DEFAULT_DB_ALIAS]['OPTIONS']
+        old_options = dict(options)
+        options['timeout'] = profile['timeout']
+        errors = []
+        lock = threading.Lock()
+
+        def write_comment(index):
+            # Как представление: прочитать новость, затем записать.
+            current = News.objects.get(pk=news.pk)
+            Comment.objects.create(
+                news=current, author=author, text=f'Комментарий {index}'
+            )
+
+        def writer(number):
+            for index in range(writes):
+                try:
+                    if profile['retry']:
+                        retry_on_lock(write_comment, index)
+                    else:
+                        with transaction.atomic():
+                            write_comment(index)
+                except OperationalError as error:
+                    if not is_lock_error(error):
+                        raise
+                    with lock:
+                        errors.append(error)
+                if not profile['persistent']:
+                    # CONN_MAX_AGE = 0: соединение закрывается после
+                    # каждого запроса.
+                    connection.close()
+            connection.close()
+
+        try:
+            with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+                connection.close()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=writers) as pool:
+                    list(pool.map(writer, range(writers)))
+                elapsed = time.perf_counter() - started
+                connection.close()
+        finally:
+            options.clear()
+            options.update(old_options)
+        written = Comment.objects.count()
+        return (
+            '{:>10}: {:7.1f} writes/s, записано {} из {}, '
+            'ошибок блокировки {}'.format(
+                name, written / elapsed, written, writers * writes,
+                len(errors),
+            )
+        )
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from news.bench import isolated_database, measure
+from news.counters import refresh_counters
+from news.models import Comment, News
+from news.views import NewsList
+
+BATCH_SIZE = 1000
+MODES = ('prefetch', 'aggregate', 'counter')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает подсчёт комментариев на главной странице: '
+        'prefetch всех комментариев, агрегат в БД и денормализованный '
+        'счётчик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=10)
+        parser.add_argument('--comments', type=int, default=5000,
+                            help='Комментариев на одну новость.')
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.seed(options['news'], options['comments'])
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            view = NewsList.as_view()
+            for mode in MODES:
+                with override_settings(
+                    NEWS_HOME_COMMENT_COUNT=mode,
+                    NEWS_PAGE_CACHE_ENABLED=False,
+                ):
+                    result = measure(
+                        lambda: view(request).render(), options['runs']
+                    )
+                self.stdout.write(
+                    '{mode:>10}: mean {mean_ms:8.2f} ms, '
+                    'p95 {p95_ms:8.2f} ms, peak {peak_kib:10.1f} KiB, '
+                    'queries {queries}'.format(mode=mode, **result)
+                )
+
+    def seed(self, news_count, comments_per_news):
+        author = get_user_model().objects.create(username='bench')
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст новости.')
+            for index in range(news_count)
+        )
+        batch = []
+        for news in News.objects.all():
+            for index in range(comments_per_news):
+                batch.append(Comment(
+                    news=news, author=author, text=f'Комментарий {index}'
+                ))
+                if len(batch) == BATCH_SIZE:
+                    Comment.objects.bulk_create(batch)
+                    batch = []
+        Comment.objects.bulk_create(batch)
+        refresh_counters()
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.writebehind import JournalCommentQueue
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает в БД комментарии из журналов очереди упавших '
+        'процессов (COMMENT_QUEUE = file). Журналы работающих процессов '
+        'не трогает.'
+    )
+
+    def handle(self, *args, **options):
+        if settings.COMMENT_QUEUE != 'file':
+            raise CommandError('Журналы есть только при COMMENT_QUEUE=file.')
+        queue = JournalCommentQueue(settings.COMMENT_QUEUE_DIR)
+        recovered = len(queue)
+        queue.drain()
+        queue.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Из журналов: {recovered}, записано: {queue.written}'
+        ))
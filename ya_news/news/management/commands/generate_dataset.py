@@ -0,0 +1,57 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from news import dataset
+from news.cache import invalidate_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, новостями '
+        'и комментариями для замеров: bulk_create пачками, тексты '
+        'на русском, комментарии и их авторы распределены по Ципфу. '
+        'Один и тот же --seed даёт один и тот же набор.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=100_000,
+                            help='Всего комментариев.')
+        parser.add_argument('--seed', type=int, default=dataset.DEFAULT_SEED)
+        parser.add_argument('--skew', type=float,
+                            default=dataset.DEFAULT_SKEW,
+                            help='Показатель закона Ципфа; 0 — равномерно.')
+        parser.add_argument('--end-date', type=date.fromisoformat,
+                            default=dataset.DEFAULT_END_DATE,
+                            help='Дата самой свежей новости, ГГГГ-ММ-ДД.')
+        parser.add_argument('--days', type=int,
+                            default=dataset.DEFAULT_DAYS)
+        parser.add_argument('--batch-size', type=int,
+                            default=dataset.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--username-prefix', default='user')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = dataset.generate(
+            users=options['users'], news=options['news'],
+            comments=options['comments'], seed=options['seed'],
+            skew=options['skew'], end_date=options['end_date'],
+            days=options['days'], batch_size=options['batch_size'],
+            username_prefix=options['username_prefix'],
+            progress=self.progress if options['verbosity'] > 1 else None,
+        )
+        invalidate_pages()
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(
+                f'{model._meta.verbose_name_plural}: {count}'
+                for model, count in counts.items()
+            ) + f'; {total / elapsed:.0f} строк/с'
+        ))
+
+    def progress(self, model, inserted):
+        self.stdout.write(f'  {model._meta.verbose_name_plural}: {inserted}')
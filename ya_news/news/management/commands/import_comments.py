@@ -0,0 +1,151 @@
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from news.cache import invalidate_pages
+from news.counters import refresh_counters
+from news.forms import CommentForm, validate_comment_text
+from news.models import Comment, News
+
+PROGRESS_EVERY = 100_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует комментарии из JSONL-файла: по одному объекту '
+        '{"news": id, "author": id, "text": "...", "created": "ISO 8601"} '
+        'на строке; поле created необязательно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или «-» для stdin.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Строк в одном INSERT.')
+        parser.add_argument('--batches-per-transaction', type=int,
+                            default=10)
+
+    def handle(self, *args, **options):
+        self.text_field = CommentForm.base_fields['text']
+        self.batch_size = options['batch_size']
+        self.batches_per_transaction = options['batches_per_transaction']
+        self.imported = self.rejected = 0
+        self.started = time.perf_counter()
+        if options['path'] == '-':
+            self.load(sys.stdin)
+        else:
+            try:
+                with open(options['path'], encoding='utf-8') as file:
+                    self.load(file)
+            except OSError as error:
+                raise CommandError(error) from error
+        self.report(final=True)
+
+    def load(self, lines):
+        """Читает строки потоком и пишет их пачками по транзакциям.
+
+        В памяти держится не больше одной транзакции строк, поэтому
+        расход памяти не зависит от размера файла.
+        """
+        chunk = []
+        chunk_limit = self.batch_size * self.batches_per_transaction
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            chunk.append((line_number, line))
+            if len(chunk) == chunk_limit:
+                self.save_chunk(chunk)
+                chunk = []
+        self.save_chunk(chunk)
+
+    def save_chunk(self, chunk):
+        rows = []
+        for line_number, line in chunk:
+            try:
+                rows.append((line_number, self.parse(line)))
+            except (
+                KeyError, TypeError, ValueError, ValidationError
+            ) as error:
+                self.reject(line_number, error)
+        comments = self.with_existing_relations(rows)
+        news_ids = {comment.news_id for comment in comments}
+        with transaction.atomic():
+            for start in range(0, len(comments), self.batch_size):
+                Comment.objects.bulk_create(
+                    comments[start:start + self.batch_size]
+                )
+            # bulk_create не отправляет post_save: счётчики новостей
+            # пересчитываем в той же транзакции, а кеш страниц сбрасываем,
+            # когда данные действительно попадут в базу.
+            refresh_counters(news_ids)
+            transaction.on_commit(lambda: self.invalidate(news_ids))
+        previous = self.imported
+        self.imported += len(comments)
+        if self.imported // PROGRESS_EVERY > previous // PROGRESS_EVERY:
+            self.report()
+
+    def parse(self, line):
+        """Разбор и проверка строки теми же правилами, что в форме."""
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError('ожидался JSON-объект')
+        text = self.text_field.clean(data.get('text'))
+        validate_comment_text(text)
+        comment = Comment(
+            news_id=int(data['news']), author_id=int(data['author']),
+            text=text,
+        )
+        if data.get('created'):
+            created = parse_datetime(data['created'])
+            if created is None:
+                raise ValueError('некорректная дата created')
+            if timezone.is_naive(created):
+                created = timezone.make_aware(created)
+            comment.created = created
+        return comment
+
+    def with_existing_relations(self, rows):
+        """Отбрасывает строки со ссылками на несуществующие объекты."""
+        news_ids = set(News.objects.filter(
+            pk__in={comment.news_id for _, comment in rows}
+        ).values_list('pk', flat=True))
+        author_ids = set(get_user_model().objects.filter(
+            pk__in={comment.author_id for _, comment in rows}
+        ).values_list('pk', flat=True))
+        comments = []
+        for line_number, comment in rows:
+            if comment.news_id not in news_ids:
+                self.reject(line_number, 'новость не найдена')
+            elif comment.author_id not in author_ids:
+                self.reject(line_number, 'автор не найден')
+            else:
+                comments.append(comment)
+        return comments
+
+    @staticmethod
+    def invalidate(news_ids):
+        for news_id in news_ids:
+            invalidate_pages(news_id=news_id)
+
+    def reject(self, line_number, error):
+        self.rejected += 1
+        if isinstance(error, ValidationError):
+            error = '; '.join(error.messages)
+        elif isinstance(error, KeyError):
+            error = f'нет поля {error}'
+        self.stderr.write(f'Строка {line_number}: {error}')
+
+    def report(self, final=False):
+        elapsed = time.perf_counter() - self.started
+        rate = self.imported / elapsed if elapsed else 0
+        message = (
+            f'Импортировано {self.imported}, отклонено {self.rejected}, '
+            f'{rate:.0f} строк/с'
+        )
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
@@ -0,0 +1,161 @@
+import json
+import platform
+from importlib import import_module
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from news.bench import isolated_database
+from news.counters import refresh_counters
+from news.loadtest import VirtualUser, format_results, run_load, summarize
+from news.models import Comment, News
+from news.routers import read_stats, reset_read_stats
+from news.search import index_news
+
+ROLES = ('anonymous', 'user')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест всех страниц ya_news: WSGI-приложение '
+        'yanews.wsgi вызывается внутри процесса из нескольких потоков '
+        'и процессов от имени анонимных и залогиненных пользователей. '
+        'Для каждого имени URL выводятся p50/p95/p99, запросов в секунду '
+        'и SQL-запросов на запрос, а также доля чтений с реплик БД; '
+        '--output сохраняет отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=20,
+                            help='Комментариев на одну новость.')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Запросов на каждую роль.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--roles', nargs='+', choices=ROLES,
+                            default=list(ROLES))
+        parser.add_argument('--no-page-cache', action='store_true')
+        parser.add_argument('--output',
+                            help='Файл для JSON-отчёта; «-» — stdout.')
+
+    def handle(self, *args, **options):
+        report = {
+            'project': 'ya_news',
+            'started_at': timezone.now().isoformat(),
+            'options': {
+                name: options[name] for name in (
+                    'news', 'comments', 'users', 'requests', 'threads',
+                    'processes', 'roles', 'no_page_cache',
+                )
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'database_profile': settings.DATABASE_PROFILE,
+                'database_replicas': settings.DATABASE_REPLICAS,
+            },
+            'phases': [],
+        }
+        with isolated_database(), override_settings(
+            QUERY_BUDGET_STRICT=False,
+            NEWS_PAGE_CACHE_ENABLED=not options['no_page_cache'],
+        ):
+            users, all_news = self.seed(
+                options['news'], options['comments'], options['users']
+            )
+            application = import_module('yanews.wsgi').application
+            for role in options['roles']:
+                reset_read_stats()
+                samples, elapsed = run_load(
+                    application, self.virtual_users(role, users, all_news),
+                    options['requests'], options['threads'],
+                    options['processes'],
+                )
+                results = summarize(samples, elapsed)
+                reads = read_stats()
+                report['phases'].append({
+                    'role': role,
+                    'requests': len(samples),
+                    'elapsed_s': elapsed,
+                    'rps': len(samples) / elapsed,
+                    'reads': reads,
+                    'results': results,
+                })
+                if options['output'] != '-':
+                    self.stdout.write(
+                        f'{role}: {len(samples) / elapsed:.1f} req/s, '
+                        f'reads from replicas '
+                        f'{reads["replica_fraction"]:.0%}'
+                    )
+                    self.stdout.write(format_results(results))
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+
+    def seed(self, news_count, comments_per_news, users_count):
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user{index}')
+            for index in range(users_count)
+        )
+        users = list(get_user_model().objects.order_by('pk'))
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text='Текст новости. ' * 20)
+            for index in range(news_count)
+        )
+        all_news = list(News.objects.order_by('pk'))
+        index_news(News.objects.all())
+        Comment.objects.bulk_create(
+            Comment(
+                news=news, author=users[index % len(users)],
+                text=f'Комментарий {index}',
+            )
+            for news in all_news for index in range(comments_per_news)
+        )
+        refresh_counters()
+        return users, all_news
+
+    def virtual_users(self, role, users, all_news):
+        virtual_users = []
+        for index, user in enumerate(users):
+            news = all_news[index % len(all_news)]
+            pages = [
+                ('news:home', reverse('news:home')),
+                ('news:discussed', reverse('news:discussed')),
+                ('news:detail', reverse('news:detail', args=(news.pk,))),
+                ('news:comments', reverse('news:comments', args=(news.pk,))),
+                ('news:search', reverse('news:search') + '?' + urlencode(
+                    {'q': 'новость'}
+                )),
+            ]
+            if role == 'anonymous':
+                pages += [
+                    ('users:login', reverse('users:login')),
+                    ('users:signup', reverse('users:signup')),
+                ]
+                virtual_users.append(VirtualUser(pages))
+                continue
+            comment = Comment.objects.filter(author=user).first()
+            if comment is not None:
+                pages += [
+                    ('news:edit', reverse('news:edit', args=(comment.pk,))),
+                    ('news:delete',
+                     reverse('news:delete', args=(comment.pk,))),
+                ]
+            client = Client()
+            client.force_login(user)
+            virtual_users.append(VirtualUser(pages, {
+                name: morsel.value for name, morsel in client.cookies.items()
+            }))
+        return virtual_users
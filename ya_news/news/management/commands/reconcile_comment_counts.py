@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import invalidate_pages
+from news.counters import fix_counters
+from news.models import News
+
+
+def invalidate_news(news_ids):
+    for news_id in news_ids:
+        invalidate_pages(news_id=news_id)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет News.comment_count и News.last_comment_at с таблицей '
+        'комментариев и исправляет расхождения. Новости проверяются '
+        'пачками, каждая — в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('news', nargs='*', type=int,
+                            help='id новостей; по умолчанию — все.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = News.objects.order_by('pk')
+        if options['news']:
+            queryset = queryset.filter(pk__in=options['news'])
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                fixed_ids = fix_counters(batch)
+                transaction.on_commit(
+                    lambda ids=fixed_ids: invalidate_news(ids)
+                )
+            fixed += len(fixed_ids)
+            checked += len(batch)
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено новостей: {checked}, исправлено: {fixed}'
+        ))
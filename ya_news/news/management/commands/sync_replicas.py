@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite онлайн-бэкапом, не останавливая запись."""
+    source.ensure_connection()
+    destination = sqlite3.connect(target.settings_dict['NAME'])
+    try:
+        source.connection.backup(destination)
+    finally:
+        destination.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS. '
+        'Нужна для проверки чтения с реплик локально; запуск по расписанию '
+        'имитирует отставание реплики.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Реплики PostgreSQL наполняет репликация.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: DATABASE_REPLICAS пуст.')
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            copy_sqlite(primary, replica)
+            self.stdout.write(
+                f'{alias}: {replica.settings_dict["NAME"]}'
+            )
@@ -0,0 +1,141 @@
+"""Учёт SQL-запросов по представлениям и контроль бюджета запросов.
+
+Бюджеты задаются в settings.QUERY_BUDGETS: имя URL с пространством
+имён — максимальное число запросов на один HTTP-запрос, включая
+запросы сессии, пользователя и отрисовки шаблона. При превышении
+в режиме QUERY_BUDGET_STRICT выбрасывается исключение (разработка
+и тесты), иначе пишется предупреждение в лог.
+
+Записывающий запрос (POST, PUT, PATCH, DELETE) к концу обработки уже
+зафиксирован, и исключение превратило бы успешную запись в ответ 500.
+Поэтому для него превышение и в строгом режиме только пишется в лог
+и отмечается заголовком ответа X-Query-Budget-Exceeded.
+
+Потоковые ответы (StreamingHttpResponse) выполняют запросы уже после
+middleware, пока отдаётся тело; бюджет их не учитывает, и задавать его
+таким представлениям не нужно.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.dispatch import Signal
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после каждого запроса к представлению с известным именем:
+# view_name, stats (QueryStats) и budget (None, если бюджет не задан).
+queries_counted = Signal()
+
+# Счётчик текущего HTTP-запроса. Контекстная переменная видна и в потоках,
+# куда уходит работа с БД из асинхронного кода (sync_to_async копирует
+# контекст), поэтому запросы учитываются в любом режиме обработки.
+_current_stats = ContextVar('query_stats', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+BUDGET_HEADER = 'X-Query-Budget-Exceeded'
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """Обёртка execute_wrapper: считает запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def count_query(execute, sql, params, many, context):
+    """Обёртка соединения: передаёт запрос счётчику текущего запроса."""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает count_query к соединению."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def check_budget(view_name, stats, strict=True):
+    """Сверяет запросы с бюджетом; возвращает бюджет, если он превышен.
+
+    strict=False — превышение не вызывает исключения даже в строгом
+    режиме.
+    """
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    queries_counted.send(
+        sender=QueryStats, view_name=view_name, stats=stats, budget=budget
+    )
+    logger.debug(
+        '%s: %d queries, %.1f ms', view_name, stats.count,
+        stats.duration * 1000,
+    )
+    if budget is None or stats.count <= budget:
+        return None
+    message = (
+        f'{view_name}: {stats.count} SQL-запросов при бюджете {budget} '
+        f'({stats.duration * 1000:.1f} ms)'
+    )
+    if settings.QUERY_BUDGET_STRICT and strict:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+    return budget
+
+
+def _finish(request, response, stats):
+    request.query_stats = stats
+    if request.resolver_match is None:
+        return
+    budget = check_budget(
+        request.resolver_match.view_name, stats,
+        strict=request.method in SAFE_METHODS,
+    )
+    if budget is not None:
+        response[BUDGET_HEADER] = f'{stats.count}/{budget}'
+
+
+@sync_and_async_middleware
+def query_budget_middleware(get_response):
+    """Считает запросы ко всем БД за время обработки HTTP-запроса.
+
+    Ставится в начало MIDDLEWARE, чтобы учитывались и запросы других
+    middleware (сессия, пользователь).
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats = QueryStats()
+            token = _current_stats.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                _current_stats.reset(token)
+            _finish(request, response, stats)
+            return response
+    else:
+        def middleware(request):
+            stats = QueryStats()
+            token = _current_stats.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                _current_stats.reset(token)
+            _finish(request, response, stats)
+            return response
+    return middleware
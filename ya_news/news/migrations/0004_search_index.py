@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from ._search_index import create_index, drop_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_created_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
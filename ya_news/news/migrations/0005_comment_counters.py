@@ -0,0 +1,50 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by().values(
+        'news'
+    )
+    News.objects.update(
+        comment_count=Coalesce(
+            Subquery(
+                comments.annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        last_comment_at=Subquery(
+            comments.annotate(last=Max('created')).values('last')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-comment_count', '-last_comment_at', '-id'], name='news_discussed_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
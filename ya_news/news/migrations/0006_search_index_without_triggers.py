@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from ._search_index import drop_triggers
+
+
+class Migration(migrations.Migration):
+    """Снимает триггеры индекса, созданные прежней версией 0004.
+
+    Триггеры вызывали функцию нормализации, которой нет вне Django,
+    и пропадали при пересоздании news_news; теперь индекс пишет Python.
+    """
+
+    dependencies = [
+        ('news', '0005_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_search_index_without_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['updated_at'], name='news_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+"""SQL поискового индекса для миграций 0004 и 0006.
+
+Модуль с «_» в начале имени загрузчик миграций не считает миграцией.
+SQL и нормализация текста зафиксированы здесь, а не берутся
+из news.search: миграции должны делать то же, что и при создании, как
+бы ни менялся код приложения. Индекс SQLite заполняется из Python,
+триггеров нет: дальше его ведут сигналы news.search.
+"""
+import re
+
+import snowballstemmer
+
+FTS_TABLE = 'news_news_fts'
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')"
+)
+WORD_RE = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def index_text(stemmer, text):
+    words = WORD_RE.findall((text or '').casefold().replace('ё', 'е'))
+    return ' '.join(stemmer.stemWords(words))
+
+
+def fill_index(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    stemmer = snowballstemmer.stemmer('russian')
+    rows = News.objects.values_list('id', 'title', 'text').iterator(
+        chunk_size=BATCH_SIZE
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            (
+                (pk, index_text(stemmer, title), index_text(stemmer, text))
+                for pk, title, text in rows
+            ),
+        )
+
+
+def drop_triggers(apps, schema_editor):
+    """Триггеры прежней версии 0004; после пересоздания таблицы их нет."""
+    if schema_editor.connection.vendor == 'sqlite':
+        for suffix in ('insert', 'update', 'delete'):
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}'
+            )
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX news_search_idx ON news_news '
+            f'USING gin (({POSTGRES_VECTOR}))'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, text)'
+        )
+        fill_index(apps, schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX news_search_idx')
+    elif vendor == 'sqlite':
+        drop_triggers(apps, schema_editor)
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
@@ -2,15 +2,34 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Денормализованные данные о комментариях, см. news/counters.py.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+    # Последнее изменение страницы новости, включая комментарии:
+    # Last-Modified и ETag, см. news/conditional.py.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date',), name='news_date_idx'),
+            # Лента «Самое обсуждаемое».
+            models.Index(
+                fields=('-comment_count', '-last_comment_at', '-id'),
+                name='news_discussed_idx',
+            ),
+            # Last-Modified главной: MAX(updated_at).
+            models.Index(fields=('updated_at',), name='news_updated_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -21,17 +40,28 @@ class News(models.Model):
 class Comment(models.Model):
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: при переносе комментариев с других площадок
+    # сохраняется исходная дата.
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            # Комментарии новости по (created, id): страница новости
+            # и подсчёт на главной. Заменяет индекс внешнего ключа news.
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
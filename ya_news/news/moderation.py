@@ -0,0 +1,98 @@
+"""Поиск запрещённых слов в тексте за один проход.
+
+Словарь компилируется в автомат Ахо — Корасик: время проверки зависит
+от длины текста, а не от размера словаря.
+"""
+from collections import deque
+from pathlib import Path
+
+
+def normalize(text):
+    """Приводит текст к виду для сравнения: регистр и «ё»."""
+    return text.casefold().replace('ё', 'е')
+
+
+def load_words(path):
+    """Читает словарь: одно слово на строке, «#» — комментарий."""
+    if not path:
+        return ()
+    with Path(path).open(encoding='utf-8') as file:
+        return tuple(
+            word for word in (line.split('#', 1)[0].strip() for line in file)
+            if word
+        )
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class BadWordMatcher:
+    """Автомат Ахо — Корасик для набора слов.
+
+    Совпадение засчитывается, только если слово начинается на границе
+    слова в тексте: «негодяйка» найдётся по «негодяй», а «годяй» внутри
+    «негодяя» — нет. С whole_words=True слово должно совпасть целиком.
+    """
+
+    def __init__(self, words, whole_words=False):
+        self.whole_words = whole_words
+        self._goto = [{}]
+        self._fail = [0]
+        # Для каждого состояния — слова, которые в нём заканчиваются,
+        # включая найденные по суффиксным ссылкам.
+        self._output = [()]
+        for word in words:
+            self._add(normalize(word))
+        self._build_fail_links()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if word not in self._output[state]:
+            self._output[state] += (word,)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] += self._output[fail]
+
+    def _at_boundary(self, text, start, end):
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if self.whole_words and end < len(text):
+            return not _is_word_char(text[end])
+        return True
+
+    def search(self, text):
+        """Первое найденное в тексте слово словаря или None."""
+        text = normalize(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in output[state]:
+                end = index + 1
+                if self._at_boundary(text, end - len(word), end):
+                    return word
+        return None
@@ -0,0 +1,54 @@
+"""Курсорная (keyset) пагинация комментариев.
+
+Страница выбирается условием по паре (created, id) последнего показанного
+комментария, а не OFFSET, поэтому стоимость запроса не зависит от того,
+сколько комментариев у новости и какая страница запрошена.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(comment):
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; испорченный курсор — ошибка клиента."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(created), int(pk)
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise BadRequest('Некорректный курсор комментариев.') from error
+
+
+def comments_queryset(news, cursor=None):
+    """Комментарии новости по порядку, начиная после курсора."""
+    queryset = news.comment_set.select_related('author').order_by(
+        'created', 'pk'
+    )
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    return queryset
+
+
+def comments_page(news, cursor=None, page_size=None):
+    """Комментарии новости после курсора и курсор следующей страницы."""
+    page_size = page_size or settings.COMMENTS_PAGE_SIZE
+    comments = list(comments_queryset(news, cursor)[:page_size + 1])
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = encode_cursor(comments[-1])
+    return {'comments': comments, 'next_cursor': next_cursor}
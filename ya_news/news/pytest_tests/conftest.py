@@ -6,8 +6,64 @@ from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
 
+from news.cache import page_cache, reset_page_cache_stats
+from news.counters import refresh_counters
+from news.middleware import queries_counted
 from news.models import Comment, News
 
+# Максимум запросов и времени SQL по каждому представлению за сессию.
+QUERY_REPORT = {}
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Отчёт о запросах к БД по представлениям после прогона тестов."""
+    if not QUERY_REPORT:
+        return
+    terminalreporter.section('SQL-запросы по представлениям')
+    for view_name, (count, duration) in sorted(QUERY_REPORT.items()):
+        budget = settings.QUERY_BUDGETS.get(view_name, '—')
+        terminalreporter.write_line(
+            f'{view_name:<20} не более {count:>3} запросов '
+            f'(бюджет {budget}), до {duration * 1000:.1f} ms'
+        )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    """В тестах превышение бюджета запросов — ошибка.
+
+    Возвращает список пар (имя представления, QueryStats) по всем
+    HTTP-запросам теста.
+    """
+    settings.QUERY_BUDGET_STRICT = True
+    records = []
+
+    def collect(sender, view_name, stats, **kwargs):
+        records.append((view_name, stats))
+        count, duration = QUERY_REPORT.get(view_name, (0, 0.0))
+        QUERY_REPORT[view_name] = (
+            max(count, stats.count), max(duration, stats.duration)
+        )
+
+    queries_counted.connect(collect)
+    yield records
+    queries_counted.disconnect(collect)
+
+
+@pytest.fixture(autouse=True)
+def no_replicas(settings):
+    """Реплики из окружения в тестах не используются: соединение реплики
+    не видит данных незавершённой транзакции теста.
+    """
+    settings.DATABASE_REPLICAS = []
+
+
+@pytest.fixture(autouse=True)
+def clear_page_cache():
+    """Каждый тест начинает с пустого кеша страниц."""
+    page_cache().clear()
+    reset_page_cache_stats()
+
 
 @pytest.fixture
 def author(django_user_model):
@@ -76,14 +132,17 @@ def all_news():
 @pytest.fixture
 def all_comments(news, author):
     """Фикстура для проверки порядка показа комментариев"""
-    for index in range(10):
-        comment = Comment.objects.create(
+    now = timezone.now()
+    Comment.objects.bulk_create(
+        Comment(
             news=news,
             author=author,
-            text=f'Текст комментария {index}'
+            text=f'Текст комментария {index}',
+            created=now + timedelta(days=index),
         )
-        comment.created = timezone.now() + timedelta(days=index)
-        comment.save()
+        for index in range(10)
+    )
+    refresh_counters([news.id])
 
 
 @pytest.fixture
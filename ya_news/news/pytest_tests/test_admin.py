@@ -0,0 +1,122 @@
+import pytest
+from django.urls import reverse
+
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+COMMENTS_COUNT = 25
+
+
+@pytest.fixture
+def many_comments(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(COMMENTS_COUNT)
+    )
+
+
+@pytest.fixture
+def urls_admin_news_change(news):
+    return reverse('admin:news_news_change', args=(news.pk,))
+
+
+def inline_formset(response):
+    return response.context['inline_admin_formsets'][0].formset
+
+
+def test_news_change_paginates_comments(
+        admin_client, urls_admin_news_change, many_comments, settings
+):
+    """На странице новости — только одна страница комментариев."""
+    settings.NEWS_ADMIN_COMMENTS_PER_PAGE = 10
+    response = admin_client.get(urls_admin_news_change)
+    assert inline_formset(response).initial_form_count() == 10
+    response = admin_client.get(
+        urls_admin_news_change, {'comments_page': 3}
+    )
+    assert inline_formset(response).initial_form_count() == 5
+    assert 'Страница комментариев 3 из 3' in response.content.decode()
+
+
+def test_news_change_queries_do_not_grow_with_comments(
+        admin_client, urls_admin_news_change, news, author, settings,
+        django_assert_max_num_queries
+):
+    """Число запросов не зависит от длины ветки: автор выводится
+    виджетом raw id, а не списком всех пользователей.
+    """
+    settings.NEWS_ADMIN_COMMENTS_PER_PAGE = 5
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(200)
+    )
+    with django_assert_max_num_queries(20):
+        response = admin_client.get(urls_admin_news_change)
+    assert '<select name="comment_set-0-author"' not in (
+        response.content.decode()
+    )
+
+
+def test_news_change_saves_comment_page(
+        admin_client, urls_admin_news_change, news, comment, author
+):
+    """Сохранение новости с инлайном текущей страницы комментариев."""
+    data = {
+        'title': news.title, 'text': news.text,
+        'date': news.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 1, 'comment_set-INITIAL_FORMS': 1,
+        'comment_set-0-id': comment.pk, 'comment_set-0-news': news.pk,
+        'comment_set-0-author': author.pk,
+        'comment_set-0-text': 'Исправленный текст',
+    }
+    response = admin_client.post(urls_admin_news_change, data)
+    assert response.status_code == 302
+    comment.refresh_from_db()
+    assert comment.text == 'Исправленный текст'
+
+
+def test_news_change_saves_submitted_comments_only(
+        admin_client, urls_admin_news_change, news, author, many_comments,
+        settings
+):
+    """Сохраняются присланные комментарии, даже если страница сдвинулась;
+    чужой комментарий и повторные записи не появляются.
+    """
+    settings.NEWS_ADMIN_COMMENTS_PER_PAGE = 10
+    oldest = Comment.objects.order_by('created', 'id').first()
+    other_news = News.objects.create(title='Другая', text='Текст')
+    foreign = Comment.objects.create(
+        news=other_news, author=author, text='Чужой'
+    )
+    data = {
+        'title': news.title, 'text': news.text,
+        'date': news.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 2, 'comment_set-INITIAL_FORMS': 2,
+        'comment_set-0-id': oldest.pk, 'comment_set-0-news': news.pk,
+        'comment_set-0-author': author.pk,
+        'comment_set-0-text': 'Исправленный текст',
+        'comment_set-1-id': foreign.pk, 'comment_set-1-news': news.pk,
+        'comment_set-1-author': author.pk,
+        'comment_set-1-text': 'Подмена',
+    }
+    response = admin_client.post(
+        f'{urls_admin_news_change}?comments_page=1', data
+    )
+    assert response.status_code == 302
+    oldest.refresh_from_db()
+    foreign.refresh_from_db()
+    assert oldest.text == 'Исправленный текст'
+    assert foreign.text == 'Чужой'
+    assert foreign.news == other_news
+    assert Comment.objects.count() == COMMENTS_COUNT + 1
+
+
+def test_comment_changelist_joins_relations(
+        admin_client, news, many_comments, django_assert_max_num_queries
+):
+    """Список комментариев подтягивает новость и автора одним JOIN."""
+    url = reverse('admin:news_comment_changelist')
+    with django_assert_max_num_queries(8):
+        response = admin_client.get(url, {'news__id__exact': news.pk})
+    assert response.context['cl'].result_count == COMMENTS_COUNT
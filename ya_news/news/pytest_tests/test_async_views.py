@@ -0,0 +1,84 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory
+from django.test.signals import template_rendered
+
+from news import async_views
+from news.middleware import query_budget_middleware
+
+# Асинхронные представления работают с БД из потоков пула, поэтому
+# данные теста должны быть зафиксированы, а не висеть в транзакции.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def async_request():
+    def make_request(path, method='get', **data):
+        request = getattr(AsyncRequestFactory(), method)(path, data)
+        request.user = AnonymousUser()
+        return request
+    return make_request
+
+
+def test_async_home_renders_news(async_request, news, comment):
+    """Асинхронная главная отдаёт ту же разметку со счётчиком."""
+    response = async_to_sync(async_views.news_list)(async_request('/'))
+    content = response.content.decode()
+    assert response.status_code == HTTPStatus.OK
+    assert news.title in content
+    assert 'Комментариев: 1' in content
+
+
+def test_async_detail_renders_comments(async_request, news, comment):
+    """Асинхронная страница новости показывает комментарии."""
+    response = async_to_sync(async_views.news_detail)(
+        async_request(f'/news/{news.pk}/'), pk=news.pk
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
+
+
+def test_templates_rendered_outside_db_pool(
+        async_request, author, news, comment
+):
+    """Отрисовка идёт в цикле событий: запросы к БД из шаблона
+    вызвали бы SynchronousOnlyOperation.
+    """
+    threads = []
+
+    def record(sender, **kwargs):
+        threads.append(threading.current_thread().name)
+
+    request = async_request(f'/news/{news.pk}/')
+    request.user = author
+    template_rendered.connect(record)
+    try:
+        response = async_to_sync(async_views.news_detail)(request, pk=news.pk)
+    finally:
+        template_rendered.disconnect(record)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
+    assert threads
+    assert not any(name.startswith('news-db') for name in threads)
+
+
+def test_async_detail_post_requires_login(async_request, news):
+    """POST анонимного пользователя перенаправляется на вход."""
+    response = async_to_sync(async_views.news_detail)(
+        async_request(f'/news/{news.pk}/', 'post', text='Текст'), pk=news.pk
+    )
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_queries_in_db_pool_are_counted(async_request, news, settings):
+    """Запросы из потоков пула попадают в бюджет асинхронного запроса."""
+    settings.NEWS_PAGE_CACHE_ENABLED = False
+    middleware = query_budget_middleware(async_views.news_list)
+    request = async_request('/')
+    async_to_sync(middleware)(request)
+    # Валидаторы ETag и список новостей.
+    assert request.query_stats.count == 2
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from news.auth import shared_caches, user_cache, user_cache_key
+from yanews import settings as shipped
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def cached_auth(settings):
+    """Сессии и пользователи в кеше; тесты идут в одном процессе."""
+    settings.NEWS_PAGE_CACHE_ENABLED = False
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.USER_CACHE_ENABLED = True
+
+
+@pytest.mark.skipif(
+    bool(os.environ.get('SESSION_CACHE_BACKEND')),
+    reason='Общий кеш задан окружением.',
+)
+def test_user_cache_disabled_by_default(
+        author, author_client, urls_news_detail, settings
+):
+    """В поставляемых настройках сессии и пользователь читаются из БД,
+    и проверка кешей проходит.
+    """
+    settings.SESSION_ENGINE = shipped.SESSION_ENGINE
+    settings.USER_CACHE_ENABLED = shipped.USER_CACHE_ENABLED
+    assert shared_caches(None) == []
+    author_client.get(urls_news_detail)
+    assert user_cache().get(user_cache_key(author.pk)) is None
+
+
+def test_local_cache_is_refused(settings):
+    """Сессии и пользователи в LocMemCache не проходят проверку."""
+    errors = shared_caches(None)
+    assert [error.id for error in errors] == ['news.E001'] * 2
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    settings.USER_CACHE_ENABLED = False
+    assert shared_caches(None) == []
+
+
+def test_repeated_request_skips_session_and_user(
+        author_client, urls_news_detail, query_budget, settings
+):
+    """Сессия всегда из кеша, пользователь — со второго запроса.
+
+    С CSRF-cookie валидаторы ETag считаются на каждом запросе:
+    остаются валидаторы, новость и комментарии.
+    """
+    author_client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 64
+    for _ in range(3):
+        author_client.get(urls_news_detail)
+    (_, first), _, (_, last) = query_budget
+    assert last.count == first.count - 1 == 3
+
+
+def test_password_change_logs_out(
+        author, author_client, urls_news_detail, settings
+):
+    """После смены пароля сессия из кеша больше не действует."""
+    settings.QUERY_BUDGET_STRICT = False
+    author_client.get(urls_news_detail)
+    author.set_password('new-password')
+    author.save()
+    response = author_client.get(urls_news_detail)
+    assert not response.wsgi_request.user.is_authenticated
+
+
+def test_stale_cached_user_rechecked(
+        author, author_client, urls_news_detail
+):
+    """Пользователь в кеше с другим паролем перепроверяется по БД."""
+    author_client.get(urls_news_detail)
+    stale = get_user_model().objects.get(pk=author.pk)
+    stale.password = 'stale'
+    user_cache().set(user_cache_key(author.pk), stale)
+    response = author_client.get(urls_news_detail)
+    assert response.wsgi_request.user.is_authenticated
+    cached = user_cache().get(user_cache_key(author.pk))
+    assert cached.password == author.password
+
+
+def test_logout_drops_cached_user(author, author_client, urls_news_detail,
+                                  urls_users_logout):
+    author_client.get(urls_news_detail)
+    assert user_cache().get(user_cache_key(author.pk)) is not None
+    author_client.get(urls_users_logout)
+    assert user_cache().get(user_cache_key(author.pk)) is None
@@ -0,0 +1,103 @@
+import pytest
+
+from news.cache import CACHE_HEADER, page_cache_stats, page_version
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+COMMENT_TEXT = 'Текст нового комментария'
+
+
+@pytest.mark.parametrize(
+    'url',
+    (
+        pytest.lazy_fixture('urls_news_home'),
+        pytest.lazy_fixture('urls_news_detail'),
+    ),
+)
+def test_second_request_is_served_from_cache(
+        client, url, django_assert_num_queries
+):
+    """Повторный запрос страницы отдаётся из кеша: остаётся только
+    запрос валидаторов ETag.
+    """
+    first = client.get(url)
+    with django_assert_num_queries(1):
+        second = client.get(url)
+    assert first[CACHE_HEADER] == 'miss'
+    assert second[CACHE_HEADER] == 'hit'
+    assert second.content == first.content
+    assert page_cache_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_cache_is_separate_for_auth_state(
+        client, author_client, urls_news_detail
+):
+    """Анонимный и авторизованный пользователи не делят записи кеша."""
+    client.get(urls_news_detail)
+    author_client.get(urls_news_detail)
+    response = author_client.get(urls_news_detail)
+    assert response[CACHE_HEADER] == 'miss'
+    assert 'form' in response.context
+    assert author_client.get(urls_news_detail)[CACHE_HEADER] == 'hit'
+
+
+def test_new_comment_invalidates_pages(
+        author_client, urls_news_home, urls_news_detail,
+        django_capture_on_commit_callbacks
+):
+    """Отправка комментария сбрасывает главную и страницу новости."""
+    author_client.get(urls_news_home)
+    author_client.get(urls_news_detail)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(urls_news_detail, data={'text': COMMENT_TEXT})
+    home = author_client.get(urls_news_home)
+    detail = author_client.get(urls_news_detail)
+    assert home[CACHE_HEADER] == 'miss'
+    assert detail[CACHE_HEADER] == 'miss'
+    assert COMMENT_TEXT in detail.content.decode()
+
+
+def test_edit_and_delete_invalidate_detail(
+        client, author_client, urls_news_detail, urls_news_edit,
+        urls_news_delete, comment, django_capture_on_commit_callbacks
+):
+    """Правка и удаление комментария сбрасывают страницу новости."""
+    client.get(urls_news_detail)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(urls_news_edit, data={'text': COMMENT_TEXT})
+    response = client.get(urls_news_detail)
+    assert response[CACHE_HEADER] == 'miss'
+    assert COMMENT_TEXT in response.content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(urls_news_delete)
+    response = client.get(urls_news_detail)
+    assert response[CACHE_HEADER] == 'miss'
+    assert not Comment.objects.exists()
+    assert COMMENT_TEXT not in response.content.decode()
+
+
+def test_news_update_invalidates_pages(
+        client, urls_news_home, news, django_capture_on_commit_callbacks
+):
+    """Изменение новости сбрасывает главную страницу."""
+    client.get(urls_news_home)
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    response = client.get(urls_news_home)
+    assert response[CACHE_HEADER] == 'miss'
+    assert news.title in response.content.decode()
+
+
+def test_invalidation_waits_for_commit(
+        author, news, django_capture_on_commit_callbacks
+):
+    """До фиксации транзакции версия страниц не меняется."""
+    version = page_version(news.pk)
+    with django_capture_on_commit_callbacks() as callbacks:
+        Comment.objects.create(news=news, author=author, text=COMMENT_TEXT)
+    assert page_version(news.pk) == version
+    for callback in callbacks:
+        callback()
+    assert page_version(news.pk) != version
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from news.cache import page_cache
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+PAGES = (
+    pytest.lazy_fixture('urls_news_home'),
+    pytest.lazy_fixture('urls_news_detail'),
+)
+
+
+@pytest.fixture
+def settled(comment):
+    """Страницы менялись минуту назад: Last-Modified уже отдаётся."""
+    News.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+
+def add_comment(comment):
+    Comment.objects.create(
+        news=comment.news, author=comment.author, text='Новый'
+    )
+
+
+def edit_comment(comment):
+    comment.text = 'Исправлен'
+    comment.save()
+
+
+def delete_comment(comment):
+    comment.delete()
+
+
+@pytest.mark.parametrize('url', PAGES)
+def test_unchanged_page_not_modified(
+        client, url, settled, django_assert_num_queries
+):
+    """Неизменная страница — 304 без выполнения представления:
+    остаётся один запрос валидаторов.
+    """
+    first = client.get(url)
+    assert first['ETag'].startswith('W/"')
+    assert 'no-cache' in first['Cache-Control']
+    for headers in (
+        {'HTTP_IF_NONE_MATCH': first['ETag']},
+        {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']},
+    ):
+        with django_assert_num_queries(1):
+            response = client.get(url, **headers)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b''
+
+
+@pytest.mark.parametrize('url', PAGES)
+def test_validators_shared_between_processes(client, url, settled):
+    """Валидаторы не хранятся в кеше процесса: другой процесс с пустым
+    кешем отдаёт тот же ETag и отвечает 304.
+    """
+    first = client.get(url)
+    page_cache().clear()
+    response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response['ETag'] == first['ETag']
+
+
+@pytest.mark.parametrize(
+    'change', (add_comment, edit_comment, delete_comment)
+)
+def test_changed_page_rendered_again(
+        client, urls_news_detail, urls_news_home, comment, change,
+        django_capture_on_commit_callbacks
+):
+    """Изменение комментариев меняет ETag страницы новости и главной."""
+    etags = {
+        url: client.get(url)['ETag']
+        for url in (urls_news_detail, urls_news_home)
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        change(comment)
+    for url, etag in etags.items():
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+
+def test_etag_depends_on_user(client, author_client, urls_news_detail):
+    """Страница читателя и анонима не совпадают по ETag."""
+    author_client.get(urls_news_detail)
+    response = author_client.get(urls_news_detail)
+    assert 'private' in response['Cache-Control']
+    anonymous = client.get(urls_news_detail)
+    assert anonymous['ETag'] != response['ETag']
+    response = client.get(
+        urls_news_detail, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize('url', PAGES)
+@pytest.mark.parametrize(
+    'change', (add_comment, edit_comment, delete_comment)
+)
+def test_if_modified_since_after_change(
+        client, url, comment, settled, change,
+        django_capture_on_commit_callbacks
+):
+    """Любое изменение комментариев не даёт 304 по If-Modified-Since."""
+    first = client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        change(comment)
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != first['ETag']
+
+
+def test_news_removal_changes_home(
+        client, urls_news_home, news, settled,
+        django_capture_on_commit_callbacks
+):
+    """Удалённая новость пропадает с главной: Last-Modified растёт,
+    хотя удалена не самая свежая новость.
+    """
+    old = News.objects.create(title='Старая', text='Текст')
+    News.objects.filter(pk=old.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+    first = client.get(urls_news_home)
+    with django_capture_on_commit_callbacks(execute=True):
+        old.delete()
+    response = client.get(
+        urls_news_home, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert old.title not in response.content.decode()
+
+
+def test_no_last_modified_within_second(client, urls_news_detail, comment):
+    """Пока секунда изменения не закончилась, Last-Modified не отдаётся:
+    следующее изменение в ту же секунду If-Modified-Since не заметил бы.
+    """
+    response = client.get(urls_news_detail)
+    assert 'ETag' in response
+    assert 'Last-Modified' not in response
+
+
+def test_validators_without_page_cache(
+        client, urls_news_detail, settled, settings
+):
+    """Условные ответы не зависят от кеша страниц."""
+    settings.NEWS_PAGE_CACHE_ENABLED = False
+    first = client.get(urls_news_detail)
+    response = client.get(
+        urls_news_detail, HTTP_IF_NONE_MATCH=first['ETag']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
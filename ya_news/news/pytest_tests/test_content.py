@@ -1,7 +1,11 @@
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import Comment
 
 pytestmark = pytest.mark.django_db
 
@@ -54,3 +58,81 @@ def test_authorized_client_has_form(author_client, urls_news_detail):
     response = author_client.get(urls_news_detail)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.parametrize('mode', ('counter', 'aggregate', 'prefetch'))
+def test_comment_count_on_home_page(
+        client, urls_news_home, news, all_comments, settings, mode
+):
+    """Число комментариев на главной одинаково во всех режимах подсчёта."""
+    settings.NEWS_HOME_COMMENT_COUNT = mode
+    response = client.get(urls_news_home)
+    news_on_page = response.context['object_list'][0]
+    assert news_on_page.comment_count == news.comment_set.count()
+    assert f'Комментариев: {news_on_page.comment_count}' in (
+        response.content.decode()
+    )
+
+
+def test_home_page_counts_comments_in_one_query(
+        client, urls_news_home, all_news, all_comments,
+        django_assert_num_queries
+):
+    """Счётчик на главной не загружает комментарии: на главную — один
+    запрос и ещё один на валидаторы ETag.
+    """
+    with django_assert_num_queries(2):
+        client.get(urls_news_home)
+
+
+def test_detail_shows_first_page_of_comments(
+        client, urls_news_detail, all_comments, settings
+):
+    """На странице новости — только первая страница комментариев."""
+    settings.COMMENTS_PAGE_SIZE = 4
+    response = client.get(urls_news_detail)
+    comments = response.context['comments']
+    assert len(comments) == settings.COMMENTS_PAGE_SIZE
+    assert [comment.created for comment in comments] == sorted(
+        comment.created for comment in comments
+    )
+    assert response.context['next_cursor']
+
+
+def test_load_more_walks_all_comments_in_order(
+        client, news, urls_news_detail, all_comments, settings
+):
+    """«Показать ещё» отдаёт оставшиеся комментарии без пропусков."""
+    settings.COMMENTS_PAGE_SIZE = 4
+    response = client.get(urls_news_detail)
+    seen = list(response.context['comments'])
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = client.get(
+            reverse('news:comments', args=(news.id,)), {'after': cursor}
+        )
+        seen.extend(response.context['comments'])
+        cursor = response.context['next_cursor']
+    assert seen == list(news.comment_set.order_by('created', 'pk'))
+
+
+def test_detail_query_count_does_not_depend_on_comments(
+        client, news, author, urls_news_detail, django_assert_num_queries
+):
+    """Стоимость страницы новости не растёт с числом комментариев:
+    новость, комментарии и валидаторы ETag.
+    """
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(300)
+    )
+    with django_assert_num_queries(3):
+        client.get(urls_news_detail)
+
+
+def test_broken_cursor_is_bad_request(client, news):
+    """Испорченный курсор — ошибка 400, а не 500."""
+    response = client.get(
+        reverse('news:comments', args=(news.id,)), {'after': 'испорчен'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
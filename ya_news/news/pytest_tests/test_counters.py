@@ -0,0 +1,101 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news.cache import page_version
+from news.counters import refresh_counters
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def urls_news_discussed():
+    return reverse('news:discussed')
+
+
+def test_comment_form_increments_counter(
+        author_client, news, urls_news_detail
+):
+    """Комментарий из формы увеличивает счётчик и время последнего."""
+    author_client.post(urls_news_detail, data={'text': 'Новый'})
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == Comment.objects.get().created
+
+
+def test_delete_decrements_counter(author_client, news, urls_news_delete):
+    """Удаление уменьшает счётчик; время последнего пересчитывается."""
+    response = author_client.delete(urls_news_delete)
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert news.last_comment_at is None
+
+
+def test_older_comment_keeps_last_comment_at(news, comment, author):
+    """Комментарий с прошлой датой не сдвигает время последнего назад."""
+    Comment.objects.create(
+        news=news, author=author, text='Старый',
+        created=comment.created - timedelta(days=1),
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    assert news.last_comment_at == comment.created
+
+
+def test_refresh_counters_repairs_drift(news, comment):
+    """Пересчёт исправляет только новости с расхождением."""
+    News.objects.update(comment_count=5, last_comment_at=None)
+    assert refresh_counters() == 1
+    assert refresh_counters() == 0
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == comment.created
+
+
+def test_reconcile_command(
+        news, comment, django_capture_on_commit_callbacks
+):
+    """Исправленные новости сбрасываются в кеше страниц после фиксации."""
+    untouched = News.objects.create(title='Без расхождений', text='Текст')
+    News.objects.filter(pk=news.pk).update(comment_count=0)
+    versions = {pk: page_version(pk) for pk in (news.pk, untouched.pk)}
+    stdout = StringIO()
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        call_command('reconcile_comment_counts', batch_size=1, stdout=stdout)
+    assert 'Проверено новостей: 2, исправлено: 1' in stdout.getvalue()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert len(callbacks) == 2
+    assert page_version(news.pk) != versions[news.pk]
+    assert page_version(untouched.pk).split('.')[1] == (
+        versions[untouched.pk].split('.')[1]
+    )
+
+
+def test_discussed_orders_by_comment_count(
+        client, author, urls_news_discussed
+):
+    """Самое обсуждаемое: по числу комментариев, без новостей
+    без комментариев.
+    """
+    quiet, popular, _ = (
+        News.objects.create(title=title, text='Текст')
+        for title in ('Тихая', 'Популярная', 'Без комментариев')
+    )
+    now = timezone.now()
+    for news, count in ((quiet, 1), (popular, 3)):
+        for index in range(count):
+            Comment.objects.create(
+                news=news, author=author, text=f'Комментарий {index}',
+                created=now + timedelta(minutes=index),
+            )
+    response = client.get(urls_news_discussed)
+    assert list(response.context['object_list']) == [popular, quiet]
+    assert 'Комментариев: 3' in response.content.decode()
@@ -0,0 +1,101 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+
+from news import dataset
+from news.models import Comment, News
+from news.search import search_ids
+
+pytestmark = pytest.mark.django_db
+
+SIZES = {'users': 20, 'news': 50, 'comments': 1000, 'batch_size': 100}
+
+
+def snapshot():
+    """Набор без первичных ключей: они зависят от содержимого базы."""
+    news = list(News.objects.order_by('pk').values_list(
+        'title', 'text', 'date', 'comment_count', 'last_comment_at'
+    ))
+    comments = list(Comment.objects.order_by('pk').values_list(
+        'news__title', 'author__username', 'text', 'created'
+    ))
+    return news, comments
+
+
+def clear():
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    get_user_model().objects.all().delete()
+
+
+def test_same_seed_gives_same_dataset():
+    """Один seed — один набор, другой seed — другой."""
+    dataset.generate(**SIZES)
+    first = snapshot()
+    clear()
+    dataset.generate(**SIZES)
+    assert snapshot() == first
+    clear()
+    dataset.generate(seed=2, **SIZES)
+    assert snapshot() != first
+
+
+def test_comments_are_skewed_and_counted():
+    """Комментарии сосредоточены на немногих новостях, счётчики верны."""
+    counts = dataset.generate(**SIZES)
+    assert counts == {
+        get_user_model(): 20, News: 50, Comment: 1000,
+    }
+    top = list(
+        News.objects.order_by('-comment_count')
+        .values_list('comment_count', flat=True)
+    )
+    assert sum(top) == 1000
+    assert sum(top[:5]) > 1000 / 2
+    assert not Comment.objects.filter(
+        created__date__lt=F('news__date')
+    ).exists()
+    for news in News.objects.filter(comment_count__gt=0)[:5]:
+        assert news.comment_set.count() == news.comment_count
+
+
+def test_appends_to_existing_data(news, comment):
+    """Набор дописывается в непустую базу; новости попадают в поиск."""
+    dataset.generate(**SIZES)
+    assert News.objects.count() == SIZES['news'] + 1
+    assert Comment.objects.count() == SIZES['comments'] + 1
+    assert News.objects.get(pk=news.pk).comment_count == 1
+    word = News.objects.last().title.split()[0]
+    assert search_ids(word, limit=1)
+
+
+def test_sequences_reset_after_insert(monkeypatch):
+    """После вставки с явными id последовательности выставляются заново."""
+    reset = []
+
+    def sequence_reset_sql(style, models):
+        reset.extend(models)
+        return ['SELECT 1']
+
+    monkeypatch.setattr(
+        connection.ops, 'sequence_reset_sql', sequence_reset_sql
+    )
+    dataset.generate(**SIZES)
+    assert reset == [get_user_model(), News, Comment]
+    last = News.objects.latest('pk')
+    news = News.objects.create(title='Заголовок', text='Текст')
+    assert news.pk > last.pk
+
+
+def test_command():
+    stdout = StringIO()
+    call_command(
+        'generate_dataset', '--users=5', '--news=10', '--comments=30',
+        stdout=stdout,
+    )
+    assert Comment.objects.count() == 30
+    assert 'строк/с' in stdout.getvalue()
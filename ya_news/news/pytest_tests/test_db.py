@@ -0,0 +1,91 @@
+import pytest
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.views import View
+
+from news.db import RetryOnLockMixin, apply_sqlite_pragmas, retry_on_lock
+
+
+class LockedOnceView(RetryOnLockMixin, View):
+    """Первая попытка записи натыкается на блокировку БД."""
+    calls = None
+
+    def write(self, request):
+        self.calls.append(request.method)
+        if len(self.calls) == 1:
+            raise OperationalError('database is locked')
+        return HttpResponse('ok')
+
+    get = post = put = patch = delete = write
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied(settings):
+    """PRAGMA из настроек выполняются на новом соединении."""
+    settings.SQLITE_PRAGMAS = {'cache_size': -12345}
+    apply_sqlite_pragmas(sender=None, connection=connection)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone() == (-12345,)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_on_lock_repeats_transaction(settings):
+    """При блокировке БД транзакция повторяется."""
+    settings.DB_LOCK_RETRY_DELAY = 0
+    calls = []
+
+    def write():
+        calls.append(connection.in_atomic_block)
+        if len(calls) < 3:
+            raise OperationalError('database is locked')
+        return 'ok'
+
+    assert retry_on_lock(write) == 'ok'
+    assert calls == [True, True, True]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_on_lock_gives_up(settings):
+    """Число повторов ограничено, прочие ошибки не повторяются."""
+    settings.DB_LOCK_RETRIES = 2
+    settings.DB_LOCK_RETRY_DELAY = 0
+    calls = []
+
+    def locked():
+        calls.append(1)
+        raise OperationalError('database is locked')
+
+    with pytest.raises(OperationalError):
+        retry_on_lock(locked)
+    assert len(calls) == 3
+
+    def broken():
+        calls.append(1)
+        raise OperationalError('no such table: news_news')
+
+    calls.clear()
+    with pytest.raises(OperationalError):
+        retry_on_lock(broken)
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('method', ('post', 'put', 'patch', 'delete'))
+def test_mixin_retries_unsafe_methods(settings, method):
+    """Повторяются все записывающие методы, а не только POST."""
+    settings.DB_LOCK_RETRY_DELAY = 0
+    calls = []
+    view = LockedOnceView.as_view(calls=calls)
+    response = view(getattr(RequestFactory(), method)('/'))
+    assert response.content == b'ok'
+    assert calls == [method.upper()] * 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_mixin_does_not_retry_get():
+    """GET не пишет в БД и не повторяется."""
+    view = LockedOnceView.as_view(calls=[])
+    with pytest.raises(OperationalError):
+        view(RequestFactory().get('/'))
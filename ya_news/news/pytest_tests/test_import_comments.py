@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from news.cache import CACHE_HEADER
+from news.forms import BAD_WORDS
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def comments_file(tmp_path, news, author):
+    """JSONL-файл с корректными и ошибочными строками."""
+    rows = [
+        {'news': news.id, 'author': author.id, 'text': f'Комментарий {index}'}
+        for index in range(25)
+    ]
+    rows += [
+        {'news': news.id, 'author': author.id, 'text': BAD_WORDS[0]},
+        {'news': news.id + 1, 'author': author.id, 'text': 'Нет новости'},
+        {'news': news.id, 'author': author.id, 'text': '  '},
+        {'news': news.id, 'text': 'Нет автора'},
+        {
+            'news': news.id, 'author': author.id, 'text': 'С датой',
+            'created': '2020-01-02T03:04:05+00:00',
+        },
+    ]
+    path = tmp_path / 'comments.jsonl'
+    lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+    path.write_text('\n'.join(lines + ['не json']), encoding='utf-8')
+    return path
+
+
+def import_comments(path, **options):
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'import_comments', str(path), stdout=stdout, stderr=stderr, **options
+    )
+    return stdout.getvalue(), stderr.getvalue()
+
+
+def test_import_validates_and_saves_in_batches(comments_file):
+    """Корректные строки сохраняются пачками, ошибочные — отклоняются
+    с номером строки.
+    """
+    stdout, stderr = import_comments(
+        comments_file, batch_size=4, batches_per_transaction=2
+    )
+    assert Comment.objects.count() == 26
+    assert 'Импортировано 26, отклонено 5' in stdout
+    for line_number in (26, 27, 28, 29, 31):
+        assert f'Строка {line_number}:' in stderr
+    assert not Comment.objects.filter(text=BAD_WORDS[0]).exists()
+
+
+def test_import_keeps_original_date(comments_file):
+    """Дата комментария из файла сохраняется."""
+    import_comments(comments_file)
+    comment = Comment.objects.get(text='С датой')
+    assert comment.created == datetime(
+        2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc
+    )
+
+
+def test_import_updates_comment_counters(comments_file, news):
+    """bulk_create не отправляет сигналы: счётчики новости
+    пересчитываются самим импортом.
+    """
+    import_comments(comments_file, batch_size=4, batches_per_transaction=2)
+    news.refresh_from_db()
+    assert news.comment_count == 26
+    assert news.last_comment_at == Comment.objects.latest(
+        'created'
+    ).created
+
+
+def test_import_invalidates_page_cache(
+        client, urls_news_detail, comments_file,
+        django_capture_on_commit_callbacks
+):
+    """После фиксации транзакции импорт сбрасывает кеш страницы новости."""
+    client.get(urls_news_detail)
+    with django_capture_on_commit_callbacks(execute=True):
+        import_comments(comments_file)
+    assert client.get(urls_news_detail)[CACHE_HEADER] == 'miss'
@@ -0,0 +1,29 @@
+import pytest
+from django.urls import reverse
+
+from news.loadtest import VirtualUser, percentile, run_load, summarize
+from yanews.wsgi import application
+
+
+def test_percentile():
+    """Перцентиль считается по ближайшему рангу."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_load_reports_each_url(news, author, comment):
+    """Замеры собираются по именам URL вместе с числом SQL-запросов."""
+    anonymous = VirtualUser([
+        ('news:home', reverse('news:home')),
+        ('news:detail', reverse('news:detail', args=(news.pk,))),
+    ])
+    samples, elapsed = run_load(application, [anonymous], 20, threads=2)
+    results = {row['url_name']: row for row in summarize(samples, elapsed)}
+    assert set(results) == {'news:home', 'news:detail'}
+    assert all(row['requests'] == 10 for row in results.values())
+    assert all(row['errors'] == 0 for row in results.values())
+    assert results['news:detail']['queries_per_request'] > 0
+    assert results['news:home']['p50_ms'] <= results['news:home']['p99_ms']
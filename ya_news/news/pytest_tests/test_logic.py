@@ -111,3 +111,27 @@ def test_user_cant_delete_comments_of_other_users(
     response = reader_client.delete(urls_news_delete)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == comments_before
+
+
+@pytest.mark.parametrize(
+    'url, data, queries',
+    (
+        (pytest.lazy_fixture('urls_news_detail'), {'text': COMMENT_TEXT_UPD},
+         5),
+        (pytest.lazy_fixture('urls_news_edit'), {'text': COMMENT_TEXT_UPD},
+         5),
+        (pytest.lazy_fixture('urls_news_delete'), {}, 5),
+    ),
+)
+def test_comment_post_query_count(
+        author_client, url, data, queries, comment,
+        django_assert_num_queries
+):
+    """Каждый POST с комментарием загружает объект один раз:
+    сессия, пользователь, объект и сама запись — четыре запроса.
+    Каждое изменение ещё отмечается в новости: счётчик комментариев
+    и время изменения страницы.
+    """
+    with django_assert_num_queries(queries):
+        response = author_client.post(url, data=data)
+    assert response.status_code == HTTPStatus.FOUND
@@ -0,0 +1,51 @@
+import pytest
+
+from news.forms import CommentForm, WARNING, bad_words_matcher
+from news.moderation import BadWordMatcher
+
+WORDS = ('редиска', 'негодяй', 'ёж', 'he', 'she', 'hers')
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('Ты РЕДИСКА!', 'редиска'),
+        ('Какой негодяйка', 'негодяй'),
+        ('Колючий ЕЖ', 'ёж'),
+        ('Она — ushers', None),
+        ('hers', 'he'),
+        ('Сегодня хорошая погода', None),
+        ('негодяя', None),
+    ),
+)
+def test_matcher_finds_words_at_word_start(text, expected):
+    """Слово ищется без учёта регистра и «ё», с начала слова в тексте."""
+    found = BadWordMatcher(WORDS).search(text)
+    assert found == (expected and expected.replace('ё', 'е'))
+
+
+def test_matcher_whole_words():
+    """В режиме whole_words слово должно совпасть целиком."""
+    matcher = BadWordMatcher(WORDS, whole_words=True)
+    assert matcher.search('Какой негодяйка') is None
+    assert matcher.search('Какой негодяй!') == 'негодяй'
+    assert matcher.search('she said') == 'she'
+
+
+def test_matcher_uses_suffix_links():
+    """Слово внутри другого слова словаря находится по суффиксной ссылке."""
+    matcher = BadWordMatcher(('abcd', 'bc', 'c'))
+    assert matcher.search('x bcx') == 'bc'
+    assert matcher.search('abce c') == 'c'
+
+
+def test_bad_words_file_extends_dictionary(tmp_path, settings):
+    """Словарь из файла дополняет BAD_WORDS и применяется в форме."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь модерации\nбяка\n\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    form = CommentForm(data={'text': 'Сам ты Бяка'})
+    assert not form.is_valid()
+    assert form.errors['text'] == [WARNING]
+    settings.BAD_WORDS_FILE = None
+    assert bad_words_matcher().search('Сам ты бяка') is None
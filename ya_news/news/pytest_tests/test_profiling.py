@@ -0,0 +1,126 @@
+import json
+import sys
+import threading
+import time
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from news.profiling import (
+    PROFILE_ID_HEADER, RequestProfile, load_profiles, profiling_token,
+    sampler, save_profile,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.PROFILING_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create(username='Сотрудник', is_staff=True)
+    )
+    return client
+
+
+def busy_loop(seconds):
+    finish = time.perf_counter() + seconds
+    while time.perf_counter() < finish:
+        pass
+
+
+def test_sampler_collects_collapsed_stacks():
+    """Стеки потока снимаются от кадра-корня до самого глубокого."""
+    profile = RequestProfile(sys._getframe())
+    sampler.add(threading.get_ident(), profile)
+    try:
+        busy_loop(0.1)
+    finally:
+        sampler.remove(threading.get_ident())
+    assert profile.stacks
+    for line in profile.collapsed().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+        assert stack.split(';')[0].endswith(':busy_loop')
+
+
+def test_not_profiled_by_default(profiling, client, news, urls_news_detail):
+    response = client.get(urls_news_detail)
+    assert PROFILE_ID_HEADER not in response
+    assert not list(profiling.iterdir())
+
+
+@pytest.mark.parametrize('token_valid', (True, False))
+def test_signed_header_enables_profile(
+        profiling, client, news, urls_news_detail, token_valid
+):
+    """Профиль пишется только по верно подписанному заголовку."""
+    token = profiling_token() if token_valid else 'profile:bad'
+    response = client.get(urls_news_detail, HTTP_X_PROFILE=token)
+    assert (PROFILE_ID_HEADER in response) is token_valid
+    if not token_valid:
+        return
+    profile_id = response[PROFILE_ID_HEADER]
+    meta = json.loads(
+        (profiling / f'{profile_id}.json').read_text(encoding='utf-8')
+    )
+    assert meta['view_name'] == 'news:detail'
+    assert meta['status'] == 200
+    assert meta['sql_count'] == len(meta['queries']) > 0
+    assert all(query['ms'] >= 0 for query in meta['queries'])
+    assert (profiling / f'{profile_id}.collapsed').exists()
+
+
+def test_staff_flag_and_sample_rate(
+        profiling, settings, client, staff_client, reader_client,
+        urls_news_home
+):
+    url = urls_news_home + '?profile=1'
+    assert PROFILE_ID_HEADER in staff_client.get(url)
+    assert PROFILE_ID_HEADER not in reader_client.get(url)
+    settings.PROFILING_SAMPLE_RATE = 1
+    assert PROFILE_ID_HEADER in Client().get(urls_news_home)
+
+
+def test_disk_usage_is_bounded(profiling, settings, rf):
+    """Старые профили удаляются сверх лимита числа файлов и байт."""
+    settings.PROFILING_MAX_FILES = 3
+    request = rf.get('/')
+    request.resolver_match = None
+    response = Client().get(reverse('news:home'))
+    profile = RequestProfile(None)
+    profile.stacks['a;b'] = 1
+    ids = [save_profile(request, response, profile, 0.01) for _ in range(5)]
+    assert [meta['id'] for meta in load_profiles()] == ids[:1:-1]
+    assert len(list(profiling.iterdir())) == 6
+    settings.PROFILING_MAX_BYTES = 1
+    save_profile(request, response, profile, 0.01)
+    assert load_profiles() == []
+
+
+def test_index_lists_profiles_for_staff_only(
+        profiling, staff_client, reader_client, urls_news_home
+):
+    profile_id = staff_client.get(urls_news_home + '?profile=1')[
+        PROFILE_ID_HEADER
+    ]
+    index = reverse('profiling:index')
+    assert reader_client.get(index).status_code == 302
+    response = staff_client.get(index)
+    assert response.context['profiles'][0]['id'] == profile_id
+    collapsed = staff_client.get(
+        reverse('profiling:file', args=(profile_id, 'collapsed'))
+    )
+    assert collapsed.status_code == 200
+    assert staff_client.get(
+        reverse('profiling:file', args=(profile_id, 'other'))
+    ).status_code == 404
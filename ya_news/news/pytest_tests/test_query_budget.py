@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.middleware import BUDGET_HEADER, QueryBudgetExceeded
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    'url, parametrized_client',
+    (
+        (pytest.lazy_fixture('urls_news_home'),
+         pytest.lazy_fixture('client')),
+        (pytest.lazy_fixture('urls_news_home'),
+         pytest.lazy_fixture('author_client')),
+        (pytest.lazy_fixture('urls_news_detail'),
+         pytest.lazy_fixture('client')),
+        (pytest.lazy_fixture('urls_news_detail'),
+         pytest.lazy_fixture('author_client')),
+    ),
+)
+def test_pages_fit_budget_with_data(
+        url, parametrized_client, all_news, all_comments, query_budget,
+        settings
+):
+    """Главная и страница новости укладываются в бюджет
+    при полном наборе новостей и комментариев.
+    """
+    settings.NEWS_PAGE_CACHE_ENABLED = False
+    parametrized_client.get(url)
+    [(view_name, stats)] = query_budget
+    assert stats.count <= settings.QUERY_BUDGETS[view_name]
+    assert stats.duration > 0
+
+
+def test_exceeded_budget_fails_in_strict_mode(
+        client, urls_news_home, all_news, settings
+):
+    """Превышение бюджета в строгом режиме — исключение."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(urls_news_home)
+
+
+def test_exceeded_budget_is_logged_in_production(
+        client, urls_news_home, all_news, settings, caplog
+):
+    """Без строгого режима превышение бюджета пишется в лог."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    settings.QUERY_BUDGET_STRICT = False
+    client.get(urls_news_home)
+    assert 'news:home' in caplog.text
+
+
+def test_committed_write_is_not_failed(
+        author_client, urls_news_detail, settings, caplog
+):
+    """Комментарий уже сохранён: в строгом режиме превышение
+    отмечается заголовком и в логе, а не ответом 500.
+    """
+    settings.QUERY_BUDGETS = {'news:detail': 0}
+    settings.QUERY_BUDGET_STRICT = True
+    response = author_client.post(urls_news_detail, data={'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert response[BUDGET_HEADER].endswith('/0')
+    assert 'news:detail' in caplog.text
+    assert Comment.objects.filter(text='Текст').exists()
+
+
+def test_views_without_budget_are_only_reported(client, query_budget):
+    """Для представлений без бюджета запросы только учитываются."""
+    client.get(reverse('users:login'))
+    assert [view for view, _ in query_budget] == ['users:login']
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+
+from news.pagination import comments_queryset, encode_cursor
+from news.views import CommentBase, NewsDiscussed, NewsList
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN — SQLite'
+    ),
+]
+
+
+def query_plan(queryset):
+    """Строки плана запроса SQLite для queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_uses_indexes(queryset):
+    """Ни одна таблица не читается полным сканированием,
+    и для сортировки не строится временное B-дерево.
+    """
+    plan = query_plan(queryset)
+    full_scans = [
+        step for step in plan
+        if step.startswith('SCAN') and 'USING' not in step
+    ]
+    assert not full_scans, plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+@pytest.fixture
+def view_querysets(rf, author, news, comment):
+    comment_view = CommentBase()
+    comment_view.request = rf.get('/')
+    comment_view.request.user = author
+    return {
+        'news:home': NewsList().get_queryset(),
+        'news:discussed': NewsDiscussed().get_queryset(),
+        'news:detail': comments_queryset(news),
+        'news:comments': comments_queryset(news, encode_cursor(comment)),
+        'news:edit': comment_view.get_queryset().filter(pk=comment.pk),
+    }
+
+
+@pytest.mark.parametrize(
+    'view_name', (
+        'news:home', 'news:discussed', 'news:detail', 'news:comments',
+        'news:edit',
+    )
+)
+def test_view_queryset_uses_index(view_querysets, view_name):
+    """Запросы представлений идут по индексам, а не по всей таблице."""
+    assert_uses_indexes(view_querysets[view_name])
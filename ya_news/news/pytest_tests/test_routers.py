@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from django.conf import settings as django_settings
+
+from news.models import News
+from news.routers import ReplicaRouter, read_stats, reset_read_stats
+
+pytestmark = pytest.mark.django_db
+
+COMMENT_TEXT = 'Текст нового комментария'
+
+
+@pytest.fixture
+def replicas(settings):
+    """Роль реплики играет сама тестовая база: проверяется выбор базы
+    роутером, а не репликация.
+    """
+    settings.DATABASE_REPLICAS = ['default']
+    reset_read_stats()
+
+
+def test_reads_outside_replica_views_go_to_primary():
+    reset_read_stats()
+    assert ReplicaRouter().db_for_read(News) == 'default'
+    assert read_stats()['replicas'] == 0
+
+
+@pytest.mark.parametrize(
+    'url',
+    (
+        pytest.lazy_fixture('urls_news_home'),
+        pytest.lazy_fixture('urls_news_detail'),
+    ),
+)
+def test_replica_views_read_from_replica(client, url, replicas):
+    """Главная и страница новости целиком читаются с реплики."""
+    client.get(url)
+    stats = read_stats()
+    assert stats['primary'] == 0
+    assert stats['replica_fraction'] == 1.0
+    assert stats['by_alias'] == {'default': stats['replicas']}
+
+
+def test_session_and_user_read_from_primary(
+        author_client, urls_news_detail, replicas
+):
+    """Сессия и пользователь читаются с основной базы, страница —
+    с реплики.
+    """
+    author_client.get(urls_news_detail)
+    stats = read_stats()
+    assert stats['primary'] == 2
+    assert stats['replicas'] > 0
+
+
+def test_write_pins_client_to_primary(
+        author_client, urls_news_detail, replicas
+):
+    """После записи клиент какое-то время читает с основной базы."""
+    response = author_client.post(
+        urls_news_detail, data={'text': COMMENT_TEXT}
+    )
+    pin = response.cookies[django_settings.REPLICA_PIN_COOKIE]
+    assert float(pin.value) > time.time()
+    reset_read_stats()
+    author_client.get(urls_news_detail)
+    assert read_stats()['replicas'] == 0
+
+
+def test_expired_pin_reads_from_replica(client, urls_news_home, replicas):
+    client.cookies[django_settings.REPLICA_PIN_COOKIE] = str(time.time() - 1)
+    client.get(urls_news_home)
+    assert read_stats()['primary'] == 0
+
+
+def test_reads_without_writes_do_not_pin(client, urls_news_home, replicas):
+    response = client.get(urls_news_home)
+    assert django_settings.REPLICA_PIN_COOKIE not in response.cookies
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from news.models import News
+from news.search import FTS_TABLE, index_news, rebuild_index, search_ids
+
+pytestmark = pytest.mark.django_db
+
+
+def titles(query):
+    news = News.objects.in_bulk(search_ids(query, 10))
+    return [news[pk].title for pk in search_ids(query, 10)]
+
+
+def test_index_follows_save_and_delete(news):
+    """Индекс обновляется при создании, изменении и удалении новости."""
+    assert titles('заголовок') == ['Заголовок']
+    news.title = 'Погода'
+    news.save()
+    assert titles('заголовок') == []
+    assert titles('погода') == ['Погода']
+    news.delete()
+    assert titles('погода') == []
+
+
+def test_bulk_created_news_indexed(all_news):
+    """bulk_create сигналов не отправляет: новости индексирует
+    index_news().
+    """
+    index_news(News.objects.all())
+    assert len(search_ids('новость', 100)) == News.objects.count()
+
+
+def test_raw_sql_writes_do_not_need_django():
+    """Запись в news_news не вызывает функций Python: её может делать
+    любой клиент SQLite, а индекс догоняет rebuild_index().
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'news_news'"
+        )
+        assert cursor.fetchall() == []
+        cursor.execute(
+            "INSERT INTO news_news (title, text, date, comment_count, "
+            "updated_at) "
+            "VALUES ('Мосты города', 'Текст', '2024-01-01', 0, "
+            "'2024-01-01 00:00:00')"
+        )
+    assert titles('мост') == []
+    rebuild_index()
+    assert titles('мост') == ['Мосты города']
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        assert cursor.fetchone() == (1,)
+
+
+def test_russian_word_forms():
+    """Находятся другие формы слова и «ё» через «е»."""
+    News.objects.create(title='Ёлки в городе', text='Праздничные новости')
+    assert titles('ёлка') == ['Ёлки в городе']
+    assert titles('елкам') == ['Ёлки в городе']
+    assert titles('новость праздничная') == ['Ёлки в городе']
+
+
+def test_title_match_ranked_first():
+    """Совпадение в заголовке важнее совпадения в тексте."""
+    News.objects.create(title='Спорт', text='Матч по футболу')
+    News.objects.create(title='Футбол', text='Итоги матча')
+    assert titles('футбол') == ['Футбол', 'Спорт']
+
+
+@pytest.mark.parametrize('query', ('"', 'AND OR', 'NEAR(', '*', '   '))
+def test_query_syntax_not_interpreted(query, news):
+    """Служебный синтаксис в запросе не ломает поиск."""
+    search_ids(query, 10)
+
+
+def test_search_page_paginated(client, settings):
+    """Результаты разбиты на страницы без COUNT."""
+    settings.SEARCH_PAGE_SIZE = 2
+    News.objects.bulk_create(
+        News(title=f'Выборы {index}', text='Текст') for index in range(3)
+    )
+    index_news(News.objects.all())
+    url = reverse('news:search')
+    response = client.get(url, {'q': 'выборы'})
+    assert len(response.context['results']) == 2
+    assert response.context['has_next']
+    response = client.get(url, {'q': 'выборы', 'page': 2})
+    assert len(response.context['results']) == 1
+    assert not response.context['has_next']
+
+
+@pytest.mark.parametrize('page', ('0', '-1', 'abc'))
+def test_search_bad_page(client, page):
+    response = client.get(reverse('news:search'), {'q': 'x', 'page': page})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
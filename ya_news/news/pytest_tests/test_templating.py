@@ -0,0 +1,76 @@
+import pytest
+from django.template import engines
+from django.template.base import Parser, Template
+from django.template.loader_tags import IncludeNode
+
+from news.templating import install_profiler, warm_templates
+
+pytestmark = pytest.mark.django_db
+
+PATCHED = (
+    (Template, '_render'), (IncludeNode, 'render'), (Parser, 'find_filter'),
+)
+
+
+def django_methods():
+    return [getattr(cls, name) for cls, name in PATCHED]
+
+
+@pytest.fixture
+def profiling(settings):
+    """Профилировщик включён только на время теста."""
+    originals = django_methods()
+    settings.TEMPLATE_PROFILING = True
+    uninstall = install_profiler()
+    yield
+    uninstall()
+    assert django_methods() == originals
+
+
+def test_production_templates_warmed(settings):
+    """Кеширующий загрузчик получает все шаблоны проекта при прогреве."""
+    settings.TEMPLATES = [dict(
+        settings.TEMPLATES[0],
+        APP_DIRS=False,
+        OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS'], loaders=[
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ]),
+    )]
+    assert warm_templates() > 0
+    [loader] = engines['django'].engine.template_loaders
+    for name in ('news/detail.html', 'includes/errors.html',
+                 'registration/login.html'):
+        assert name in loader.get_template_cache
+
+
+def test_render_profile_in_server_timing(
+        author_client, urls_news_detail, comment, settings, profiling
+):
+    """Профиль содержит шаблоны, include и фильтры."""
+    settings.NEWS_PAGE_CACHE_ENABLED = False
+    response = author_client.get(urls_news_detail)
+    timing = response['Server-Timing']
+    for entry in ('template-', 'desc="news/detail.html"',
+                  'desc="includes/errors.html"', 'include-',
+                  'desc="linebreaksbr"', 'filter-'):
+        assert entry in timing
+
+
+def test_profiler_off_by_default(client, urls_news_home):
+    response = client.get(urls_news_home)
+    assert not response.has_header('Server-Timing')
+
+
+def test_uninstall_restores_django_methods():
+    """Обработчик, который вернула install_profiler(), возвращает
+    исходные методы Django; повторная установка отдаёт тот же обработчик.
+    """
+    originals = django_methods()
+    uninstall = install_profiler()
+    assert django_methods() != originals
+    assert install_profiler() is uninstall
+    uninstall()
+    assert django_methods() == originals
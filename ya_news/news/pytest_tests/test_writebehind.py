@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+
+from news import writebehind
+from news.cache import CACHE_HEADER
+from news.models import Comment
+from news.writebehind import (
+    JournalCommentQueue, comment_queue, to_row, write_rows,
+)
+
+pytestmark = pytest.mark.django_db
+
+COMMENT_TEXT = 'Текст нового комментария'
+
+
+@pytest.fixture
+def queue_settings(settings, monkeypatch, tmp_path):
+    """Очередь без фонового потока: пачки пишет сам тест."""
+    settings.COMMENT_QUEUE = 'memory'
+    settings.COMMENT_QUEUE_WORKER = False
+    settings.COMMENT_QUEUE_DIR = tmp_path
+    monkeypatch.setattr(writebehind, '_queue', None)
+    return settings
+
+
+def unsaved_comments(news, author, count):
+    return [
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(count)
+    ]
+
+
+def test_post_is_queued_and_redirects_as_pending(
+        author_client, news, urls_news_detail, queue_settings,
+        django_assert_max_num_queries
+):
+    """POST не пишет в БД: комментарий ждёт в очереди."""
+    # Сессия, пользователь и новость.
+    with django_assert_max_num_queries(3):
+        response = author_client.post(
+            urls_news_detail, data={'text': COMMENT_TEXT}
+        )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f'{urls_news_detail}?pending=1#comments'
+    assert not Comment.objects.exists()
+    assert len(comment_queue()) == 1
+    page = author_client.get(response.url)
+    assert 'появится через несколько секунд' in page.content.decode()
+
+
+def test_flush_writes_batch_and_counters(
+        client, author_client, news, urls_news_detail, queue_settings,
+        django_capture_on_commit_callbacks
+):
+    """Пачка пишется в БД вместе со счётчиками и сбросом кеша страниц."""
+    author_client.post(urls_news_detail, data={'text': COMMENT_TEXT})
+    client.get(urls_news_detail)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert comment_queue().flush() == 1
+    comment = Comment.objects.get()
+    assert comment.text == COMMENT_TEXT
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert client.get(urls_news_detail)[CACHE_HEADER] == 'miss'
+
+
+def test_flush_takes_at_most_batch(news, author, queue_settings):
+    queue_settings.COMMENT_FLUSH_BATCH = 3
+    queue = comment_queue()
+    for comment in unsaved_comments(news, author, 7):
+        queue.put(to_row(comment))
+    assert queue.flush() == 3
+    queue.drain()
+    assert (queue.batches, queue.written) == (3, 7)
+    assert Comment.objects.count() == 7
+
+
+def test_journal_survives_crash(news, author, queue_settings):
+    """Журнал упавшего процесса подхватывает новая очередь; записанные
+    до падения строки не дублируются.
+    """
+    queue_settings.COMMENT_QUEUE = 'file'
+    queue_settings.COMMENT_FLUSH_BATCH = 2
+    queue = comment_queue()
+    rows = [to_row(comment) for comment in unsaved_comments(news, author, 5)]
+    for row in rows:
+        queue.put(row)
+    queue.flush()
+    # Падение после записи пачки в БД, но до сдвига смещения журнала.
+    write_rows(rows[2:3])
+    queue._journal.close()
+    recovered = JournalCommentQueue(queue_settings.COMMENT_QUEUE_DIR)
+    assert len(recovered) == 3
+    recovered.drain()
+    recovered.close()
+    assert sorted(Comment.objects.values_list('text', flat=True)) == [
+        row['text'] for row in rows
+    ]
+    assert not list(queue_settings.COMMENT_QUEUE_DIR.glob('*.jsonl'))
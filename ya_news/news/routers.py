@@ -0,0 +1,187 @@
+"""Чтение с реплик БД и закрепление пользователя за основной базой.
+
+Реплики перечисляются в settings.DATABASE_REPLICAS (псевдонимы
+DATABASES). Представления с ReplicaReadMixin на GET читают с одной
+случайно выбранной реплики; всё остальное, в том числе любые записи,
+идёт в default.
+
+Read-your-writes: если за время HTTP-запроса была запись в БД,
+replica_pin_middleware ставит cookie REPLICA_PIN_COOKIE на
+REPLICA_PIN_SECONDS. Пока она действует, запросы этого клиента читают
+с основной базы и видят собственные изменения, даже если реплика
+отстаёт. Отставание реплики дольше этого окна пользователь увидит.
+
+Сессия и пользователь всегда читаются с основной базы: ReplicaReadMixin
+загружает их до выбора реплики, и отставшая реплика не вернёт
+удалённую сессию или старый пароль.
+
+Кеш приложения (cache.py) хранит и данные, прочитанные с реплики.
+Версия кеша растёт сразу после фиксации записи, и если реплика ещё
+отстаёт, запрос без cookie закрепления (чужой клиент, другое
+устройство, истёкшее окно) закеширует старые данные уже под новой
+версией: они живут в кеше до его таймаута.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+# Реплика, с которой читает текущий HTTP-запрос; None — основная база.
+_read_alias = ContextVar('read_alias', default=None)
+# Состояние текущего HTTP-запроса: была ли запись в БД.
+_request_state = ContextVar('replica_request_state', default=None)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(role, alias):
+    with _stats_lock:
+        _stats[role, alias] += 1
+
+
+def read_stats():
+    """Сколько чтений ушло на основную базу и на реплики."""
+    with _stats_lock:
+        counts = dict(_stats)
+    primary = sum(
+        count for (role, _), count in counts.items() if role == 'primary'
+    )
+    replicas = sum(counts.values()) - primary
+    total = primary + replicas
+    return {
+        'primary': primary,
+        'replicas': replicas,
+        'by_alias': {
+            alias: count for (role, alias), count in counts.items()
+            if role == 'replica'
+        },
+        'replica_fraction': replicas / total if total else 0.0,
+    }
+
+
+def reset_read_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def read_counts():
+    """Сырые счётчики чтений: {(роль, псевдоним): число}."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def add_read_stats(counts):
+    """Добавляет счётчики read_counts() другого процесса."""
+    with _stats_lock:
+        _stats.update(counts)
+
+
+class ReplicaRouter:
+    """Чтение — с реплики текущего запроса, запись и миграции — default."""
+
+    def db_for_read(self, model, **hints):
+        replica = _read_alias.get()
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же базы, что и сам объект.
+            alias = instance._state.db
+        else:
+            alias = replica or DEFAULT_DB_ALIAS
+        role = 'replica' if replica is not None and alias == replica else (
+            'primary'
+        )
+        _record(role, alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_pinned(request):
+    """Клиент недавно писал в БД и читает с основной базы."""
+    try:
+        until = float(request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+class ReplicaReadMixin:
+    """GET и HEAD CBV читают с реплики, если клиент не закреплён.
+
+    Сессия и пользователь загружаются до выбора реплики, с основной
+    базы. Ответ отрисовывается здесь же: ленивые QuerySet в шаблоне
+    должны выполниться, пока выбрана реплика.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas or request.method not in ('GET', 'HEAD')
+            or is_pinned(request)
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        request.user.is_authenticated
+        token = _read_alias.set(random.choice(replicas))
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        finally:
+            _read_alias.reset(token)
+
+
+def _pin(response, state):
+    if state['wrote'] and settings.DATABASE_REPLICAS:
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            str(time.time() + settings.REPLICA_PIN_SECONDS),
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax',
+        )
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """Закрепляет клиента за основной базой после записи в БД.
+
+    Ставится перед SessionMiddleware, чтобы учитывалась и запись сессии.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = {'wrote': False}
+            token = _request_state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _request_state.reset(token)
+            _pin(response, state)
+            return response
+    else:
+        def middleware(request):
+            state = {'wrote': False}
+            token = _request_state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                _request_state.reset(token)
+            _pin(response, state)
+            return response
+    return middleware
@@ -0,0 +1,172 @@
+"""Полнотекстовый поиск по новостям.
+
+SQLite: виртуальная таблица FTS5 news_news_fts с rowid = id новости.
+В индекс пишется нормализованный текст: регистр, «ё» и русские окончания
+(стеммер snowballstemmer). Пишет его Python, а не триггеры: триггеры
+с функцией нормализации ломали запись в news_news из любого соединения
+без этой функции (dbshell, sqlite3, резервные копии) и пропадали, когда
+SQLite пересоздаёт таблицу в миграциях. Сохранение и удаление новости
+обновляют индекс сигналами в той же транзакции; bulk_create сигналов
+не отправляет, после него вызывается index_news(). Запись в news_news
+в обход ORM индекс не обновляет — его перестраивает rebuild_index().
+
+PostgreSQL: GIN-индекс по выражению tsvector с конфигурацией russian,
+поддерживать его вручную не нужно.
+
+После смены версии snowballstemmer индекс SQLite тоже нужно
+перестроить: rebuild_index().
+"""
+import itertools
+import re
+from functools import lru_cache
+
+import snowballstemmer
+from django.core.exceptions import BadRequest
+from django.db import connection
+
+from .models import News
+from .moderation import normalize
+
+FTS_TABLE = 'news_news_fts'
+# Новостей на один INSERT в индекс.
+INDEX_BATCH_SIZE = 1000
+
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')"
+)
+
+# Вес совпадения в заголовке относительно совпадения в тексте.
+TITLE_WEIGHT = 10.0
+
+WORD_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=None)
+def _stemmer():
+    return snowballstemmer.stemmer('russian')
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    return _stemmer().stemWord(word)
+
+
+def terms(text):
+    """Нормализованные основы слов текста."""
+    return [stem(word) for word in WORD_RE.findall(normalize(text or ''))]
+
+
+def index_text(text):
+    return ' '.join(terms(text))
+
+
+def index_rows(rows, using=connection):
+    """Заново индексирует новости из строк (id, title, text)."""
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        # FTS5 заменяет строку с тем же rowid: отдельный DELETE не нужен.
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            [
+                (pk, index_text(title), index_text(text))
+                for pk, title, text in rows
+            ],
+        )
+
+
+def index_news(queryset, using=connection):
+    """Заново индексирует новости queryset пачками."""
+    if using.vendor != 'sqlite':
+        return
+    rows = queryset.values_list('id', 'title', 'text').iterator(
+        chunk_size=INDEX_BATCH_SIZE
+    )
+    while True:
+        batch = list(itertools.islice(rows, INDEX_BATCH_SIZE))
+        if not batch:
+            return
+        index_rows(batch, using)
+
+
+def unindex_news(ids, using=connection):
+    """Убирает новости из индекса SQLite."""
+    if using.vendor == 'sqlite':
+        with using.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in ids],
+            )
+
+
+def rebuild_index(using=connection):
+    """Заново заполняет индекс SQLite из news_news."""
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    index_news(News.objects.using(using.alias).order_by(), using)
+
+
+def _sqlite_query(words):
+    # Каждое слово — префиксный запрос в кавычках: синтаксис FTS5
+    # в пользовательском вводе не интерпретируется.
+    match = ' '.join(f'"{word}"*' for word in words)
+    sql = (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0), rowid DESC '
+        f'LIMIT %s OFFSET %s'
+    )
+    return sql, [match]
+
+
+def _postgres_query(words):
+    query = ' & '.join(f'{word}:*' for word in words)
+    sql = (
+        f"SELECT id FROM news_news "
+        f"WHERE ({POSTGRES_VECTOR}) @@ to_tsquery('russian', %s) "
+        f"ORDER BY ts_rank(({POSTGRES_VECTOR}), "
+        f"to_tsquery('russian', %s)) DESC, id DESC "
+        f"LIMIT %s OFFSET %s"
+    )
+    return sql, [query, query]
+
+
+def search_ids(query, limit, offset=0):
+    """Возвращает id новостей по запросу в порядке релевантности."""
+    if connection.vendor == 'postgresql':
+        words = WORD_RE.findall(normalize(query))
+        sql, params = _postgres_query(words)
+    else:
+        words = terms(query)
+        sql, params = _sqlite_query(words)
+    if not words:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def parse_page(value):
+    """Номер страницы из GET-параметра; 1, если параметра нет."""
+    if value is None:
+        return 1
+    if not value.isdigit() or int(value) < 1:
+        raise BadRequest('Некорректный номер страницы.')
+    return int(value)
+
+
+def search_page(query, page, page_size):
+    """Страница результатов: новости и признак следующей страницы.
+
+    Запрашивается на одну запись больше страницы, чтобы узнать
+    о следующей странице без COUNT по индексу.
+    """
+    ids = search_ids(query, page_size + 1, (page - 1) * page_size)
+    news = News.objects.in_bulk(ids[:page_size])
+    return {
+        'results': [news[pk] for pk in ids[:page_size] if pk in news],
+        'has_next': len(ids) > page_size,
+    }
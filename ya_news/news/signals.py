@@ -0,0 +1,61 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_pages
+from .counters import (
+    comment_added, comment_changed, comment_removed, news_removed,
+)
+from .models import Comment, News
+from .search import index_rows, unindex_news
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Изменилась новость — сбрасываем главную и страницу новости.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос успел бы закешировать под новой версией ещё старые данные.
+    """
+    transaction.on_commit(partial(invalidate_pages, news_id=instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        comment_added(instance)
+    else:
+        comment_changed(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_removed_comment(sender, instance, **kwargs):
+    comment_removed(instance)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Изменился комментарий — меняется и счётчик на главной."""
+    transaction.on_commit(
+        partial(invalidate_pages, news_id=instance.news_id)
+    )
+
+
+@receiver(post_save, sender=News)
+def index_saved_news(sender, instance, **kwargs):
+    """Поисковый индекс SQLite пишется в той же транзакции."""
+    index_rows([(instance.pk, instance.title, instance.text)])
+
+
+@receiver(post_delete, sender=News)
+def unindex_deleted_news(sender, instance, **kwargs):
+    unindex_news([instance.pk])
+
+
+@receiver(post_delete, sender=News)
+def touch_remaining_news(sender, instance, **kwargs):
+    news_removed()
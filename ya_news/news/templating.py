@@ -0,0 +1,243 @@
+"""Прогрев шаблонов и профилирование их отрисовки.
+
+warm_templates() компилирует все шаблоны проекта и приложений при
+старте, чтобы кеширующий загрузчик (TEMPLATE_PROFILE = 'production')
+не разбирал их на первых запросах.
+
+Профилировщик включается настройкой TEMPLATE_PROFILING. Он считает
+собственное время (без вложенных) каждого шаблона, каждого
+{% include %} и каждого фильтра. Итог по запросу пишется в лог
+этого модуля и в заголовок Server-Timing.
+"""
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.base import Parser, Template
+from django.template.loader_tags import IncludeNode
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+# Профиль текущего HTTP-запроса; None — профилирование не идёт.
+_current_profile = ContextVar('render_profile', default=None)
+
+# Исходные методы Django, которые оборачивает install_profiler().
+_originals = {}
+
+
+def template_names(engine):
+    """Имена всех шаблонов, которые видят загрузчики движка."""
+    dirs = set()
+    for loader in engine.engine.template_loaders:
+        if hasattr(loader, 'get_dirs'):
+            dirs.update(loader.get_dirs())
+    names = set()
+    for directory in map(Path, dirs):
+        names.update(
+            path.relative_to(directory).as_posix()
+            for path in directory.rglob('*.html')
+        )
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны; возвращает число скомпилированных."""
+    warmed = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                logger.warning('Шаблон %s не скомпилирован: %s', name, error)
+            else:
+                warmed += 1
+    return warmed
+
+
+class RenderProfile:
+    """Время отрисовки по (вид, имя): вызовы, полное и собственное время.
+
+    Собственное время — без вложенных шаблонов, include и фильтров,
+    поэтому сумма собственного времени равна времени отрисовки.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._children = []
+
+    @contextlib.contextmanager
+    def measure(self, kind, name):
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            entry = self.stats.setdefault((kind, name), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - children
+
+    def rows(self):
+        """Строки отчёта по убыванию собственного времени."""
+        return sorted(
+            (
+                (kind, name, calls, total, own)
+                for (kind, name), (calls, total, own) in self.stats.items()
+            ),
+            key=lambda row: row[4],
+            reverse=True,
+        )
+
+    def server_timing(self):
+        return ', '.join(
+            f'{kind}-{index};desc="{name}";dur={own * 1000:.2f}'
+            for index, (kind, name, _, _, own) in enumerate(self.rows())
+        )
+
+
+def _measured(kind, name, func, *args):
+    profile = _current_profile.get()
+    if profile is None:
+        return func(*args)
+    with profile.measure(kind, name):
+        return func(*args)
+
+
+def _profiled_filter(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        with profile.measure('filter', name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _reset_loaders():
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            for loader in engine.engine.template_loaders:
+                if hasattr(loader, 'reset'):
+                    loader.reset()
+
+
+def install_profiler():
+    """Оборачивает отрисовку шаблонов, include и поиск фильтров.
+
+    Фильтры подменяются при разборе шаблона, поэтому уже скомпилированные
+    шаблоны сбрасываются из кеша загрузчиков. Пока профиль запроса
+    не начат, обёртки сразу вызывают исходный код.
+
+    Возвращает uninstall_profiler, который восстанавливает исходные
+    методы Django.
+    """
+    if _originals:
+        return uninstall_profiler
+    _originals.update(
+        render=Template._render,
+        include=IncludeNode.render,
+        find_filter=Parser.find_filter,
+    )
+
+    def render(self, context):
+        name = self.origin.template_name or self.origin.name
+        return _measured(
+            'template', name, _originals['render'], self, context
+        )
+
+    def include(self, context):
+        name = self.template.token.strip('\'"')
+        return _measured(
+            'include', name, _originals['include'], self, context
+        )
+
+    @functools.lru_cache(maxsize=None)
+    def wrapped_filter(name, func):
+        return _profiled_filter(name, func)
+
+    def find_filter(self, filter_name):
+        func = _originals['find_filter'](self, filter_name)
+        return wrapped_filter(filter_name, func)
+
+    Template._render = render
+    IncludeNode.render = include
+    Parser.find_filter = find_filter
+    _reset_loaders()
+    return uninstall_profiler
+
+
+def uninstall_profiler():
+    """Возвращает методы Django, подменённые install_profiler().
+
+    Шаблоны, разобранные с обёрнутыми фильтрами, сбрасываются из кеша
+    загрузчиков. Без установленного профилировщика ничего не делает.
+    """
+    if not _originals:
+        return
+    Template._render = _originals.pop('render')
+    IncludeNode.render = _originals.pop('include')
+    Parser.find_filter = _originals.pop('find_filter')
+    _reset_loaders()
+
+
+def _report(request, response, profile):
+    if not profile.stats:
+        return
+    response['Server-Timing'] = profile.server_timing()
+    logger.info(
+        '%s %s\n%s', request.method, request.path,
+        '\n'.join(
+            f'{kind:<8} {name:<40} {calls:>4} '
+            f'{total * 1000:8.2f} ms {own * 1000:8.2f} ms'
+            for kind, name, calls, total, own in profile.rows()
+        ),
+    )
+
+
+@sync_and_async_middleware
+def template_profiler_middleware(get_response):
+    """Профилирует отрисовку шаблонов каждого запроса.
+
+    Без TEMPLATE_PROFILING middleware отключается при загрузке.
+    """
+    if not settings.TEMPLATE_PROFILING:
+        raise MiddlewareNotUsed
+    install_profiler()
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            profile = RenderProfile()
+            token = _current_profile.set(profile)
+            try:
+                response = await get_response(request)
+            finally:
+                _current_profile.reset(token)
+            _report(request, response, profile)
+            return response
+    else:
+        def middleware(request):
+            profile = RenderProfile()
+            token = _current_profile.set(profile)
+            try:
+                response = get_response(request)
+            finally:
+                _current_profile.reset(token)
+            _report(request, response, profile)
+            return response
+    return middleware
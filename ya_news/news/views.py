@@ -4,46 +4,133 @@ from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views import generic
 
+from .cache import PageCacheMixin
+from .conditional import (
+    ConditionalGetMixin, detail_validators, home_validators,
+)
+from .counters import actual_count
+from .db import RetryOnLockMixin
 from .forms import CommentForm
+from .mixins import CachedObjectMixin
 from .models import Comment, News
+from .pagination import comments_page
+from .routers import ReplicaReadMixin
+from .search import parse_page, search_page
+from .writebehind import enqueue
 
 
-class NewsList(generic.ListView):
+class NewsList(
+        ReplicaReadMixin, ConditionalGetMixin, PageCacheMixin,
+        generic.ListView
+):
     """Список новостей."""
     model = News
+    page_cache_name = 'home'
     template_name = 'news/home.html'
 
+    def get_validators(self):
+        return home_validators()
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев к каждой новости берётся из счётчика
+        News.comment_count (режим ``counter``), считается базой данных
+        (``aggregate``) или по загруженным целиком комментариям
+        (``prefetch``, как раньше).
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        queryset = self.model.objects.all()
+        mode = settings.NEWS_HOME_COMMENT_COUNT
+        if mode == 'prefetch':
+            queryset = queryset.prefetch_related('comment_set')
+        elif mode == 'aggregate':
+            queryset = queryset.annotate(counted_comments=actual_count())
+        return queryset[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        mode = settings.NEWS_HOME_COMMENT_COUNT
+        for news in context['object_list']:
+            if mode == 'prefetch':
+                news.comment_count = len(news.comment_set.all())
+            elif mode == 'aggregate':
+                news.comment_count = news.counted_comments
+        return context
 
 
-class NewsDetail(generic.DetailView):
+class NewsDiscussed(PageCacheMixin, generic.ListView):
+    """Самое обсуждаемое: новости по числу комментариев.
+
+    Сортировка по денормализованному счётчику идёт по индексу
+    news_discussed_idx и не трогает таблицу комментариев.
+    """
     model = News
+    page_cache_name = 'discussed'
+    template_name = 'news/discussed.html'
+
+    def get_queryset(self):
+        return self.model.objects.filter(comment_count__gt=0).order_by(
+            '-comment_count', '-last_comment_at', '-id'
+        )[:settings.NEWS_COUNT_ON_DISCUSSED_PAGE]
+
+
+class NewsDetail(
+        ReplicaReadMixin, ConditionalGetMixin, PageCacheMixin,
+        generic.DetailView
+):
+    model = News
+    page_cache_name = 'detail'
     template_name = 'news/detail.html'
 
+    def get_validators(self):
+        return detail_validators(self.kwargs['pk'])
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """Показываем только первую страницу комментариев."""
         context = super().get_context_data(**kwargs)
+        context.update(comments_page(self.object))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class CommentList(generic.TemplateView):
+    """Следующая страница комментариев к новости («Показать ещё»)."""
+    template_name = 'includes/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        news = get_object_or_404(News.objects.only('pk'), pk=kwargs['pk'])
+        context['news'] = news
+        context.update(comments_page(news, self.request.GET.get('after')))
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям: результаты по релевантности, постранично."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = parse_page(self.request.GET.get('page'))
+        context.update(query=query, page=page)
+        if query:
+            context.update(
+                search_page(query, page, settings.SEARCH_PAGE_SIZE)
+            )
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        RetryOnLockMixin,
+        CachedObjectMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,16 +142,29 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(comments_page(self.object))
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if settings.COMMENT_QUEUE:
+            enqueue(comment)
+            self.pending = True
+        else:
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
         post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        url = reverse('news:detail', kwargs={'pk': post.pk})
+        if getattr(self, 'pending', False):
+            # Комментарий ещё в очереди записи, см. news/writebehind.py.
+            url += '?pending=1'
+        return url + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,14 +178,14 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(LoginRequiredMixin, RetryOnLockMixin, CachedObjectMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
         comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': comment.news_id}
         ) + '#comments'
 
     def get_queryset(self):
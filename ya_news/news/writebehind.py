@@ -0,0 +1,339 @@
+"""Отложенная запись комментариев (write-behind) с групповой фиксацией.
+
+При COMMENT_QUEUE = 'memory' или 'file' представление не пишет
+комментарий в БД: проверенная форма превращается в строку очереди,
+а пользователь сразу получает редирект с ?pending=1. Фоновый поток
+процесса забирает очередь, как только в ней COMMENT_FLUSH_BATCH строк
+или прошло COMMENT_FLUSH_INTERVAL секунд, и пишет всю пачку одним
+bulk_create в одной транзакции вместе со счётчиками новостей.
+
+Надёжность:
+- 'memory' — очередь в памяти; при падении процесса несохранённые
+  комментарии теряются (при обычном завершении очередь дописывается);
+- 'file' — каждая строка сначала дописывается в журнал процесса
+  в COMMENT_QUEUE_DIR. Журнал переживает падение процесса, а при
+  COMMENT_QUEUE_FSYNC — и отключение питания, ценой fsync на запрос.
+  Журнал упавшего процесса подхватывает следующий запущенный процесс
+  или команда flush_comment_queue. Строки, успевшие попасть в БД перед
+  падением, при этом повторно не записываются.
+
+Комментарий виден не сразу, а через время до COMMENT_FLUSH_INTERVAL
+плюс длительность записи пачки.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_pages
+from .counters import refresh_counters
+from .db import retry_on_lock
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def to_row(comment):
+    return {
+        'news': comment.news_id,
+        'author': comment.author_id,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def from_row(row):
+    return Comment(
+        news_id=row['news'], author_id=row['author'], text=row['text'],
+        created=parse_datetime(row['created']),
+    )
+
+
+def _drop_saved(rows):
+    """Строки без уже сохранённых комментариев (после падения процесса)."""
+    saved = set(
+        Comment.objects.filter(
+            created__in={parse_datetime(row['created']) for row in rows}
+        ).values_list('news_id', 'author_id', 'created')
+    )
+    return [
+        row for row in rows
+        if (row['news'], row['author'], parse_datetime(row['created']))
+        not in saved
+    ]
+
+
+def _insert(comments):
+    Comment.objects.bulk_create(comments)
+    news_ids = {comment.news_id for comment in comments}
+    refresh_counters(news_ids)
+    transaction.on_commit(
+        lambda: [invalidate_pages(news_id=news_id) for news_id in news_ids]
+    )
+
+
+def write_rows(rows, recovered=False):
+    """Пишет пачку одной транзакцией; возвращает число записанных строк.
+
+    Если пачка не проходит целиком (новость или автор удалены, пока
+    комментарий ждал в очереди), строки пишутся по одной, а ошибочные
+    отбрасываются с записью в лог.
+    """
+    if recovered:
+        rows = retry_on_lock(_drop_saved, rows)
+    comments = [from_row(row) for row in rows]
+    try:
+        retry_on_lock(_insert, comments)
+        return len(comments)
+    except IntegrityError:
+        written = 0
+        for comment in comments:
+            try:
+                retry_on_lock(_insert, [comment])
+                written += 1
+            except IntegrityError as error:
+                logger.error('Комментарий не записан: %s (%s)', error,
+                             to_row(comment))
+        return written
+
+
+class CommentQueue:
+    """Очередь строк в памяти с фоновым потоком записи."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._rows = []
+        # Сколько строк в начале очереди восстановлено после падения.
+        self._recovered = 0
+        self._condition = threading.Condition()
+        self._worker = None
+        self._stopping = False
+        self.written = self.batches = 0
+
+    def __len__(self):
+        with self._condition:
+            return len(self._rows)
+
+    def put(self, row):
+        with self._condition:
+            self._append(row)
+            self._rows.append(row)
+            if len(self._rows) >= settings.COMMENT_FLUSH_BATCH:
+                self._condition.notify()
+        if settings.COMMENT_QUEUE_WORKER:
+            self.start()
+
+    def _append(self, row):
+        """Вызывается до постановки строки в очередь (для журнала)."""
+
+    def _committed(self, count):
+        """Вызывается после записи count строк из начала очереди."""
+
+    def flush(self):
+        """Пишет в БД одну пачку из начала очереди; возвращает её размер."""
+        with self._condition:
+            rows = self._rows[:settings.COMMENT_FLUSH_BATCH]
+            recovered = self._recovered > 0
+        if not rows:
+            return 0
+        self.written += write_rows(rows, recovered)
+        self.batches += 1
+        with self._condition:
+            del self._rows[:len(rows)]
+            self._recovered = max(self._recovered - len(rows), 0)
+            self._committed(len(rows))
+        return len(rows)
+
+    def drain(self):
+        """Пишет всю очередь."""
+        while self.flush():
+            pass
+
+    def close(self):
+        pass
+
+    def start(self):
+        with self._condition:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopping = False
+            self._worker = threading.Thread(
+                target=self._run, name='comment-queue', daemon=True
+            )
+            self._worker.start()
+
+    def stop(self):
+        """Останавливает поток и дописывает остаток очереди."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            worker = self._worker
+        if worker is not None:
+            worker.join()
+        self.drain()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if (
+                    len(self._rows) < settings.COMMENT_FLUSH_BATCH
+                    and not self._stopping
+                ):
+                    self._condition.wait(settings.COMMENT_FLUSH_INTERVAL)
+                if self._stopping:
+                    return
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                # Пачка остаётся в очереди и пишется на следующем шаге.
+                logger.exception('Ошибка записи очереди комментариев')
+                with self._condition:
+                    self._condition.wait(settings.COMMENT_FLUSH_INTERVAL)
+
+
+def _encode(row):
+    return (json.dumps(row, ensure_ascii=False) + '\n').encode()
+
+
+class JournalCommentQueue(CommentQueue):
+    """Очередь с журналом на диске: <pid>.jsonl и смещение записанного
+    в <pid>.offset.
+
+    Журнал принадлежит процессу, пока тот держит на нём flock; журналы
+    без блокировки остались от упавших процессов и переносятся в журнал
+    этого процесса при его создании.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f'{self.pid}.jsonl'
+        self._sizes = []
+        orphans = self._lock_orphans()
+        try:
+            rows = [row for path, journal in orphans
+                    for row in self._read(path, journal)]
+            # Журнал появляется под своим именем уже заблокированным,
+            # иначе другой процесс мог бы принять его за брошенный.
+            temporary = self.path.with_suffix('.tmp')
+            self._journal = open(temporary, 'wb')
+            fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.replace(temporary, self.path)
+            # Строки сначала надёжно попадают в свой журнал, и только
+            # потом удаляются чужие.
+            for row in rows:
+                self._append(row)
+            self._rows.extend(rows)
+            self._recovered = len(rows)
+            for path, _ in orphans:
+                if path != self.path:
+                    path.unlink()
+                path.with_suffix('.offset').unlink(missing_ok=True)
+        finally:
+            for _, journal in orphans:
+                journal.close()
+        if rows:
+            logger.warning('Из журналов восстановлено комментариев: %d',
+                           len(rows))
+
+    def _lock_orphans(self):
+        orphans = []
+        for path in sorted(self.directory.glob('*.jsonl')):
+            try:
+                journal = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # Пока ждали, журнал мог перенести другой процесс.
+                skip = os.fstat(journal.fileno()).st_ino != (
+                    os.stat(path).st_ino
+                )
+            except (BlockingIOError, FileNotFoundError):
+                skip = True
+            if skip:
+                journal.close()
+            else:
+                orphans.append((path, journal))
+        return orphans
+
+    def close(self):
+        """Закрывает журнал; пустой журнал удаляется."""
+        if not self._rows:
+            self.path.unlink(missing_ok=True)
+            self.path.with_suffix('.offset').unlink(missing_ok=True)
+        self._journal.close()
+
+    @staticmethod
+    def _read(path, journal):
+        offset_path = path.with_suffix('.offset')
+        if offset_path.exists():
+            journal.seek(int(offset_path.read_text()))
+        # Оборванная последняя строка не была подтверждена клиенту.
+        return [json.loads(line) for line in journal
+                if line.endswith(b'\n')]
+
+    def _append(self, row):
+        data = _encode(row)
+        self._journal.write(data)
+        self._journal.flush()
+        if settings.COMMENT_QUEUE_FSYNC:
+            os.fsync(self._journal.fileno())
+        self._sizes.append(len(data))
+
+    def _committed(self, count):
+        offset_path = self.path.with_suffix('.offset')
+        del self._sizes[:count]
+        if not self._rows:
+            # Всё записано: журнал начинается заново.
+            self._journal.truncate(0)
+            self._journal.seek(0)
+            offset_path.unlink(missing_ok=True)
+            return
+        offset = self._journal.tell() - sum(self._sizes)
+        temporary = offset_path.with_suffix('.offset-tmp')
+        temporary.write_text(str(offset))
+        os.replace(temporary, offset_path)
+
+
+def comment_queue():
+    """Очередь этого процесса; после fork создаётся заново."""
+    global _queue
+    with _queue_lock:
+        if _queue is None or _queue.pid != os.getpid():
+            if settings.COMMENT_QUEUE == 'file':
+                _queue = JournalCommentQueue(settings.COMMENT_QUEUE_DIR)
+            else:
+                _queue = CommentQueue()
+        return _queue
+
+
+def reset_comment_queue():
+    """Дописывает и закрывает очередь процесса; следующая будет новой."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None and queue.pid == os.getpid():
+        queue.stop()
+        queue.close()
+    return queue
+
+
+def enqueue(comment):
+    """Ставит несохранённый комментарий в очередь записи."""
+    comment_queue().put(to_row(comment))
+
+
+atexit.register(reset_comment_queue)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,10 +23,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.query_budget_middleware',
+    'news.templating.template_profiler_middleware',
+    'news.routers.replica_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.auth.CachedAuthenticationMiddleware',
+    'news.profiling.profiling_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -48,16 +53,197 @@ TEMPLATES = [
     },
 ]
 
+# Профиль шаблонов выбирается переменной окружения TEMPLATE_PROFILE:
+# 'development' — шаблоны перечитываются с диска, 'production' —
+# кеширующий загрузчик, все шаблоны компилируются при старте.
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'development')
+
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+TEMPLATE_WARMUP = TEMPLATE_PROFILE == 'production'
+
+# Время отрисовки шаблонов, include и фильтров по каждому запросу:
+# лог news.templating и заголовок Server-Timing.
+TEMPLATE_PROFILING = os.environ.get('TEMPLATE_PROFILING') == '1'
+
+# Выборочное профилирование запросов (news/profiling.py): переменная
+# окружения PROFILING=1 включает middleware, PROFILING_SAMPLE_RATE — доля
+# профилируемых запросов помимо заголовка X-Profile и ?profile=1.
+PROFILING_ENABLED = os.environ.get('PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = BASE_DIR / '.profiles'
+PROFILING_MAX_FILES = 200
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
-DATABASES = {
-    'default': {
+# Профиль БД выбирается переменной окружения DATABASE_PROFILE:
+# 'sqlite' — разработка, 'sqlite-wal' — боевой SQLite (WAL, постоянные
+# соединения), 'postgres' — PostgreSQL с повторным использованием
+# соединений (параметры — из переменных POSTGRES_*).
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'sqlite-wal': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 20},
+    },
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'yanews'),
+        'USER': os.environ.get('POSTGRES_USER', 'yanews'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DATABASE_PROFILE],
+}
+
+# Реплики для чтения главной и страниц новостей: переменная окружения
+# DATABASE_REPLICAS — через запятую пути к файлам SQLite (локально их
+# заполняет команда sync_replicas) или хосты PostgreSQL. Псевдонимы —
+# replica1, replica2 и т. д.; в тестах реплики смотрят в тестовую default.
+DATABASES.update({
+    f'replica{index}': {
+        **DATABASES['default'],
+        'HOST' if DATABASE_PROFILE == 'postgres' else 'NAME': source,
+        'TEST': {'MIRROR': 'default'},
     }
+    for index, source in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')),
+        start=1,
+    )
+})
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['news.routers.ReplicaRouter']
+
+# Отложенная запись комментариев (news/writebehind.py): переменная
+# окружения COMMENT_QUEUE — 'memory' или 'file'; не задана — комментарий
+# пишется в БД сразу. Пачка пишется каждые COMMENT_FLUSH_INTERVAL секунд
+# или по набору COMMENT_FLUSH_BATCH строк. Журналы очереди 'file' —
+# в COMMENT_QUEUE_DIR; COMMENT_QUEUE_FSYNC — fsync каждой строки.
+COMMENT_QUEUE = os.environ.get('COMMENT_QUEUE') or None
+COMMENT_QUEUE_DIR = BASE_DIR / '.queue' / 'comments'
+COMMENT_QUEUE_FSYNC = os.environ.get('COMMENT_QUEUE_FSYNC') == '1'
+COMMENT_FLUSH_INTERVAL = 0.05
+COMMENT_FLUSH_BATCH = 500
+# False — фоновый поток не запускается, очередь пишет flush() (тесты).
+COMMENT_QUEUE_WORKER = True
+
+# Сколько секунд после записи клиент читает с основной базы
+# (read-your-writes) и имя cookie, которая это отмечает.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'db_pin'
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,
+    'temp_store': 'memory',
+} if DATABASE_PROFILE == 'sqlite-wal' else {}
+
+# Повторы записывающих запросов при «database is locked»: число повторов
+# и начальная пауза в секундах (удваивается с каждой попыткой).
+DB_LOCK_RETRIES = 5
+DB_LOCK_RETRY_DELAY = 0.05
+
+
+# Кеш отрендеренных страниц новостей. Бэкенд выбирается переменной
+# окружения NEWS_PAGE_CACHE_BACKEND: 'locmem' (по умолчанию) или 'file'.
+# В этом же кеше хранится версия данных, которую увеличивает запись
+# новости или комментария. У LocMemCache она своя в каждом процессе:
+# запись сбрасывает страницы только в том процессе, который её сделал,
+# а остальные отдают старые страницы до NEWS_PAGE_CACHE_TIMEOUT.
+# Поэтому 'locmem' годится только для одного процесса (runserver,
+# тесты); под несколькими процессами gunicorn или uvicorn нужен 'file'
+# на общем диске или NEWS_PAGE_CACHE_ENABLED = False.
+NEWS_PAGE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': NEWS_PAGE_CACHE_BACKENDS[
+        os.environ.get('NEWS_PAGE_CACHE_BACKEND', 'locmem')
+    ],
 }
 
+# Общий кеш сессий и пользователей: переменная окружения
+# SESSION_CACHE_BACKEND — 'memcached' или 'redis' (пакет django-redis),
+# SESSION_CACHE_LOCATION — адрес сервера. Без общего кеша сессия
+# и пользователь читаются из БД: LocMemCache у каждого процесса свой,
+# и после выхода или смены пароля другой процесс видел бы старую
+# сессию.
+SHARED_CACHE_BACKENDS = {
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+SESSION_CACHE_BACKEND = os.environ.get('SESSION_CACHE_BACKEND') or None
+
+if SESSION_CACHE_BACKEND:
+    CACHES['sessions'] = {
+        **SHARED_CACHE_BACKENDS[SESSION_CACHE_BACKEND],
+        **({'LOCATION': os.environ['SESSION_CACHE_LOCATION']}
+           if os.environ.get('SESSION_CACHE_LOCATION') else {}),
+    }
+
+# С общим кешем сессии читаются из кеша, в БД только пишутся. Вариант
+# без хранилища — 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SESSION_CACHE_BACKEND
+    else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'sessions' if SESSION_CACHE_BACKEND else 'default'
+
+# Кеш пользователей для news.auth.CachedAuthenticationMiddleware:
+# без общего кеша пользователь читается из БД на каждом запросе.
+USER_CACHE_ENABLED = bool(SESSION_CACHE_BACKEND)
+USER_CACHE_ALIAS = SESSION_CACHE_ALIAS
+USER_CACHE_TIMEOUT = 60
+
+NEWS_PAGE_CACHE_ENABLED = True
+NEWS_PAGE_CACHE_ALIAS = 'pages'
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +266,44 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+NEWS_COUNT_ON_DISCUSSED_PAGE = 10
+
+# Как считать комментарии на главной: 'counter' — денормализованный
+# счётчик News.comment_count, 'aggregate' — подзапросом в БД,
+# 'prefetch' — загружая все комментарии (прежнее поведение).
+NEWS_HOME_COMMENT_COUNT = 'counter'
+
+# Сколько комментариев показывать на странице новости за один раз.
+COMMENTS_PAGE_SIZE = 50
+
+# Результатов поиска на одной странице.
+SEARCH_PAGE_SIZE = 20
+
+# Комментариев на одной странице инлайна новости в админке.
+NEWS_ADMIN_COMMENTS_PER_PAGE = 20
+
+# Дополнительный словарь запрещённых слов: путь к файлу, одно слово
+# на строке. Слова из news.forms.BAD_WORDS проверяются всегда.
+BAD_WORDS_FILE = os.environ.get('BAD_WORDS_FILE')
+# True — слово должно совпасть целиком, False — достаточно начала слова.
+BAD_WORDS_WHOLE_WORDS = False
+
+# Допустимое число SQL-запросов на один HTTP-запрос к представлению.
+# Учитываются и запросы сессии и пользователя (по одному; с общим кешем
+# сессий — только при промахе кеша).
+QUERY_BUDGETS = {
+    'news:home': 4,
+    'news:detail': 6,
+    'news:comments': 4,
+    'news:discussed': 3,
+    'news:edit': 5,
+    'news:delete': 5,
+    'news:search': 4,
+}
+# True — превышение бюджета вызывает исключение, False — предупреждение.
+QUERY_BUDGET_STRICT = DEBUG
+
+# Асинхронные NewsList и NewsDetail (включаются в yanews/asgi.py)
+# и размер пула потоков, в котором они работают с БД.
+NEWS_ASYNC_VIEWS = os.environ.get('NEWS_ASYNC_VIEWS') == '1'
+NEWS_ASYNC_DB_WORKERS = int(os.environ.get('NEWS_ASYNC_DB_WORKERS', 8))
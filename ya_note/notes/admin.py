@@ -1,5 +1,20 @@
+from functools import partial
+
 from django.contrib import admin
+from django.db import transaction
 
+from .cache import invalidate_notes
 from .models import Note
 
-admin.site.register(Note)
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Сигнал post_save сбросит кеш нового автора, а заметка
+        # пропала и из кеша прежнего.
+        if change and 'author' in form.changed_data:
+            transaction.on_commit(
+                partial(invalidate_notes, form.initial['author'])
+            )
@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from . import auth, cache, search  # noqa: F401
+        from .db import apply_sqlite_pragmas
+        from .middleware import install_query_counter
+        from .profiling import install_query_recorder
+        from .templating import install_profiler, warm_templates
+        connection_created.connect(install_query_counter)
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(apply_sqlite_pragmas)
+        if settings.TEMPLATE_PROFILING:
+            install_profiler()
+        if settings.TEMPLATE_WARMUP:
+            warm_templates()
@@ -0,0 +1,113 @@
+"""Пользователь запроса из кеша вместо запроса к БД.
+
+AuthenticationMiddleware загружает пользователя из БД на каждом
+запросе. CachedAuthenticationMiddleware держит его в кеше
+USER_CACHE_ALIAS не дольше USER_CACHE_TIMEOUT секунд; проверки
+django.contrib.auth.get_user (бэкенд из настроек, хеш пароля в сессии)
+выполняются и для пользователя из кеша. Запись сбрасывается при
+сохранении и удалении пользователя (смена пароля, блокировка) и при
+выходе.
+
+Кеш включает USER_CACHE_ENABLED. Сброс записи виден другим процессам
+только в общем кеше (memcached, redis), поэтому проверка shared_caches
+не даёт запустить проект, если пользователи или сессии хранятся
+в LocMemCache: у каждого процесса он свой.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import caches
+from django.core.checks import Error, Tags, register
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+# Сессии этих бэкендов читаются из кеша SESSION_CACHE_ALIAS.
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_user(user_id):
+    user_cache().delete(user_cache_key(user_id))
+
+
+def get_user(request):
+    """Как django.contrib.auth.get_user, но пользователь — из кеша."""
+    session = request.session
+    user_id = session.get(auth.SESSION_KEY)
+    backend_path = session.get(auth.BACKEND_SESSION_KEY)
+    if (
+        not settings.USER_CACHE_ENABLED
+        or user_id is None
+        or backend_path not in settings.AUTHENTICATION_BACKENDS
+    ):
+        return auth.get_user(request)
+    key = user_cache_key(user_id)
+    user = user_cache().get(key)
+    if user is not None:
+        session_hash = session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+                session_hash, user.get_session_auth_hash()):
+            user.backend = backend_path
+            return user
+    # Промах кеша или пароль сменился в обход save(): решает БД.
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        user_cache().set(key, user, settings.USER_CACHE_TIMEOUT)
+    else:
+        user_cache().delete(key)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware с пользователем из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+@register(Tags.caches)
+def shared_caches(app_configs, **kwargs):
+    """Сессии и пользователи не кешируются в LocMemCache."""
+    aliases = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        aliases.append(('SESSION_CACHE_ALIAS', settings.SESSION_CACHE_ALIAS))
+    if settings.USER_CACHE_ENABLED:
+        aliases.append(('USER_CACHE_ALIAS', settings.USER_CACHE_ALIAS))
+    return [
+        Error(
+            f'{setting} = {alias!r}: LocMemCache у каждого процесса свой, '
+            'и выход или смена пароля не дойдут до других процессов.',
+            hint='Задайте SESSION_CACHE_BACKEND (memcached, redis).',
+            id=f'{__package__}.E001',
+        )
+        for setting, alias in aliases
+        if settings.CACHES[alias]['BACKEND'] == LOCAL_CACHE_BACKEND
+    ]
+
+
+@receiver((post_save, post_delete), sender=get_user_model())
+def invalidate_saved_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,76 @@
+"""Вспомогательные средства для замеров производительности."""
+import contextlib
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextlib.contextmanager
+def isolated_database(verbosity=0):
+    """Создаёт временную базу с применёнными миграциями.
+
+    Замеры не трогают рабочую базу: после выхода из контекста
+    временная база удаляется. SQLite-база создаётся в файле, чтобы
+    к ней могли обращаться несколько потоков и процессов. Реплики
+    на это время смотрят во временную базу, как в тестах.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    replicas = {
+        alias: dict(connections[alias].settings_dict)
+        for alias in settings.DATABASE_REPLICAS
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = str(Path(tmp_dir) / 'bench.sqlite3')
+        connection.creation.create_test_db(
+            verbosity=verbosity, autoclobber=True, serialize=False
+        )
+        for alias in replicas:
+            connections[alias].close()
+            connections[alias].creation.set_as_test_mirror(
+                connection.settings_dict
+            )
+        try:
+            yield
+        finally:
+            for alias, replica_settings in replicas.items():
+                connections[alias].close()
+                connections[alias].settings_dict.update(replica_settings)
+            connection.creation.destroy_test_db(
+                old_name, verbosity=verbosity
+            )
+            test_settings['NAME'] = old_test_name
+
+
+def measure(func, runs):
+    """Вызывает func runs раз и возвращает сводку по времени и памяти.
+
+    Время — в миллисекундах, память — пик выделений Python-объектов
+    за один вызов в килобайтах, queries — число SQL-запросов за вызов.
+    Память снимается отдельным прогоном: tracemalloc искажает время.
+    """
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as captured:
+        func()
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'peak_kib': peak,
+        'queries': len(captured),
+    }
@@ -0,0 +1,119 @@
+"""Кеш заметок пользователя для notes:list и notes:detail.
+
+Заметки пользователя меняет только он сам (и администратор), поэтому
+страницы списка и заметки по slug кешируются в NOTES_CACHE_ALIAS
+по пользователю. Ключ включает версию заметок пользователя: создание,
+изменение и удаление заметки, в том числе в админке, увеличивают версию
+одним incr после фиксации транзакции, и все старые записи пользователя
+перестают находиться — их вытеснит сам бэкенд по таймауту.
+
+В кеш попадают только найденные данные: 404 и ошибки не кешируются.
+Данные, прочитанные с отстающей реплики уже после роста версии, живут
+в кеше до NOTES_CACHE_TIMEOUT (см. routers).
+"""
+import threading
+import time
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+
+VERSION_KEY = 'notes:version:{user_id}'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def notes_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def notes_cache_stats():
+    """Счётчики попаданий и промахов кеша в текущем процессе."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def reset_notes_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def notes_version(user_id):
+    """Текущая версия заметок; при первом обращении создаётся заново.
+
+    Начальное значение берётся из часов, чтобы версия, вытесненная
+    из кеша и созданная повторно, не совпала со старой.
+    """
+    cache = notes_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_notes(user_id):
+    """Сбрасывает все закешированные заметки пользователя.
+
+    Внутри транзакции вызывается через transaction.on_commit: иначе
+    параллельный запрос успел бы закешировать под новой версией ещё
+    старые заметки.
+    """
+    cache = notes_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def cached_for_user(user_id, part, compute):
+    """Значение compute() для пользователя из кеша или вычисленное.
+
+    part отличает данные пользователя друг от друга: страницу списка,
+    заметку по slug.
+    """
+    if not settings.NOTES_CACHE_ENABLED:
+        return compute()
+    cache = notes_cache()
+    key = f'notes:{user_id}:{notes_version(user_id)}:{part}'
+    value = cache.get(key)
+    if value is not None:
+        _record('hits')
+        return value
+    _record('misses')
+    value = compute()
+    cache.set(key, value, settings.NOTES_CACHE_TIMEOUT)
+    return value
+
+
+@receiver((post_save, post_delete), sender=Note)
+def invalidate_saved_note(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_notes, instance.author_id))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user(sender, instance, created, **kwargs):
+    """Новый пользователь мог получить id удалённого: его кеш не нужен."""
+    if created:
+        transaction.on_commit(partial(invalidate_notes, instance.pk))
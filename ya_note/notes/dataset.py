@@ -0,0 +1,190 @@
+"""Синтетический набор данных для замеров и оценки ёмкости.
+
+generate() пишет в БД пользователей и заметки пачками bulk_create:
+миллионы строк без построчных save(). Один и тот же seed даёт один и тот
+же набор (заголовки, тексты, распределение заметок), поэтому замеры
+на разных машинах и в разное время можно сравнивать между собой.
+
+Заметки распределены по авторам по закону Ципфа с показателем skew:
+у немногих пользователей тысячи заметок, у большинства — единицы или
+ни одной. Slug — транслитерация слов заголовка с id заметки, поэтому
+уникален без запросов к базе.
+
+Первичные ключи задаются явно, начиная с MAX(id) + 1: внешние ключи
+известны до вставки, и набор можно дописать в непустую базу. Явные id
+не двигают последовательности PostgreSQL, поэтому в конце они
+выставляются по MAX(id) — иначе следующий обычный INSERT получил бы
+уже занятый id.
+"""
+import itertools
+import random
+from bisect import bisect
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from pytils.translit import slugify
+
+from .models import Note
+from .search import index_notes
+from .slugs import SUFFIX_RESERVE, slug_field_length
+
+DEFAULT_SEED = 1
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SKEW = 1.1
+
+# Словарь с грубыми весами употребительности: частые слова чаще
+# попадают в текст, как в живом языке.
+WORDS = {
+    'и': 40, 'в': 35, 'не': 25, 'на': 25, 'что': 15, 'с': 15, 'это': 12,
+    'как': 10, 'по': 10, 'но': 8, 'из': 6, 'за': 6, 'для': 6, 'уже': 5,
+    'так': 5, 'все': 5, 'только': 4, 'ещё': 4, 'надо': 4, 'когда': 4,
+    'купить': 3, 'позвонить': 3, 'написать': 3, 'сделать': 3,
+    'проверить': 2, 'записаться': 2, 'оплатить': 2, 'забрать': 2,
+    'отправить': 2, 'прочитать': 2, 'посмотреть': 2, 'повторить': 1,
+    'молоко': 1, 'хлеб': 1, 'продукты': 2, 'подарок': 1, 'билеты': 1,
+    'врач': 1, 'стоматолог': 1, 'банк': 1, 'квартира': 2, 'счёт': 1,
+    'отчёт': 2, 'встреча': 2, 'созвон': 1, 'проект': 2, 'задача': 3,
+    'план': 2, 'список': 2, 'идея': 2, 'книга': 1, 'фильм': 1, 'курс': 1,
+    'лекция': 1, 'конспект': 1, 'экзамен': 1, 'рецепт': 1, 'пароль': 1,
+    'отпуск': 1, 'поездка': 1, 'дача': 1, 'машина': 1, 'ремонт': 1,
+    'завтра': 3, 'сегодня': 3, 'вечером': 2, 'утром': 2, 'в понедельник': 1,
+    'на неделе': 1, 'до пятницы': 1, 'срочно': 1, 'потом': 2,
+    'важно': 2, 'не забыть': 2, 'обязательно': 1, 'может быть': 1,
+    'маме': 1, 'коллегам': 1, 'начальнику': 1, 'друзьям': 1, 'соседу': 1,
+}
+_WORD_LIST = list(WORDS)
+_WORD_WEIGHTS = list(itertools.accumulate(WORDS.values()))
+# Транслитерация считается один раз на слово, а не на каждую заметку.
+_SLUG_WORDS = {word: slugify(word) for word in WORDS}
+
+
+class TextGenerator:
+    """Русские предложения из WORDS; случайность — только из rng."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def words(self, count):
+        return self.rng.choices(_WORD_LIST, cum_weights=_WORD_WEIGHTS,
+                                k=count)
+
+    def sentence(self, min_words=4, max_words=14):
+        text = ' '.join(self.words(self.rng.randint(min_words, max_words)))
+        return text[0].upper() + text[1:] + self.rng.choice('.....!?')
+
+    def paragraph(self, min_sentences, max_sentences):
+        return ' '.join(
+            self.sentence()
+            for _ in range(self.rng.randint(min_sentences, max_sentences))
+        )
+
+    def title(self, max_length):
+        """Заголовок и slug из тех же слов (slug — без суффикса)."""
+        words = self.words(self.rng.randint(2, 6))
+        title = ' '.join(words)
+        slug = '-'.join(_SLUG_WORDS[word] for word in words)
+        return (title[0].upper() + title[1:])[:max_length].rstrip(), slug
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса рангов 1..count по закону Ципфа."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+class SkewedChoice:
+    """Выбор из items с весами Ципфа по случайной перестановке рангов.
+
+    Перестановка нужна, чтобы популярность не совпадала с порядком id.
+    """
+
+    def __init__(self, rng, items, skew):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.weights = zipf_weights(len(self.items), skew)
+
+    def __call__(self):
+        total = self.weights[-1]
+        return self.items[bisect(self.weights, self.rng.random() * total)]
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _reset_sequences(models):
+    """Выставляет последовательности id по MAX(id); в SQLite не нужно."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def _insert(model, objects, batch_size, progress=None):
+    """Пишет объекты пачками, каждую — в своей транзакции."""
+    inserted = 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            return inserted
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        inserted += len(batch)
+        if progress is not None:
+            progress(model, inserted)
+
+
+def note_slug(stem, note_id):
+    """Slug с id заметки: уникален без проверки в базе."""
+    stem = stem[:slug_field_length(Note) - SUFFIX_RESERVE].rstrip('-')
+    return f'{stem}-{note_id}'
+
+
+def generate(users=1000, notes=100_000, seed=DEFAULT_SEED,
+             skew=DEFAULT_SKEW, batch_size=DEFAULT_BATCH_SIZE,
+             username_prefix='user', progress=None):
+    """Генерирует набор данных; возвращает число строк по моделям.
+
+    progress(model, inserted) вызывается после каждой пачки.
+    """
+    if notes and not users:
+        raise ValueError('Для заметок нужны пользователи.')
+    User = get_user_model()
+    rng = random.Random(seed)
+    text = TextGenerator(rng)
+    title_length = Note._meta.get_field('title').max_length
+
+    first_user = _next_id(User)
+    user_ids = range(first_user, first_user + users)
+    counts = {User: _insert(User, (
+        User(
+            pk=user_id, username=f'{username_prefix}{user_id}',
+            password=UNUSABLE_PASSWORD_PREFIX,
+        )
+        for user_id in user_ids
+    ), batch_size, progress)}
+
+    pick_author = SkewedChoice(rng, user_ids, skew) if notes else None
+
+    first_note = _next_id(Note)
+
+    def make_notes():
+        for note_id in range(first_note, first_note + notes):
+            title, stem = text.title(title_length)
+            yield Note(
+                pk=note_id, title=title, text=text.paragraph(1, 6),
+                slug=note_slug(stem, note_id), author_id=pick_author(),
+            )
+
+    counts[Note] = _insert(Note, make_notes(), batch_size, progress)
+    # bulk_create не отправляет post_save: индекс поиска — отдельно.
+    index_notes(Note.objects.filter(pk__gte=first_note))
+    _reset_sequences([User, Note])
+    return counts
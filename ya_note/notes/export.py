@@ -0,0 +1,107 @@
+"""Потоковая выгрузка заметок пользователя: NDJSON, CSV, ZIP с Markdown.
+
+Заметки читаются iterator() пачками по NOTES_EXPORT_CHUNK_SIZE по
+индексу (author, id) и сразу пишутся в ответ, поэтому память не зависит
+от числа заметок. Прерванную выгрузку можно продолжить: ?after=<id>
+или ?after_slug=<slug> последней полученной заметки.
+"""
+import csv
+import json
+import zipfile
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import Http404
+
+from .models import Note
+
+FIELDS = ('id', 'slug', 'title', 'text')
+
+
+class _StreamBuffer:
+    """Файл только для записи: накопленное забирается через take()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Для csv.writer: writerow() возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def markdown(title, text):
+    return f'# {title}\n\n{text}\n'
+
+
+def export_zip(rows):
+    """ZIP пишется в поток без seek: у записей — дескрипторы данных."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for _, slug, title, text in rows:
+            archive.writestr(f'{slug}.md', markdown(title, text))
+            yield buffer.take()
+    yield buffer.take()
+
+
+# Формат: (генератор, Content-Type, расширение файла).
+FORMATS = {
+    'ndjson': (
+        export_ndjson, 'application/x-ndjson; charset=utf-8', 'ndjson'
+    ),
+    'csv': (export_csv, 'text/csv; charset=utf-8', 'csv'),
+    'zip': (export_zip, 'application/zip', 'zip'),
+}
+
+
+def resume_after(user, after=None, after_slug=None):
+    """Id заметки, после которой продолжается выгрузка, или 0."""
+    if after_slug:
+        note_id = Note.objects.filter(
+            author=user, slug=after_slug
+        ).values_list('id', flat=True).first()
+        if note_id is None:
+            raise Http404('Заметка для продолжения выгрузки не найдена.')
+        return note_id
+    if not after:
+        return 0
+    try:
+        return int(after)
+    except ValueError as error:
+        raise BadRequest('Некорректный курсор.') from error
+
+
+def export_rows(user, after=0):
+    """Строки заметок пользователя по возрастанию id."""
+    return (
+        Note.objects.filter(author=user, id__gt=after)
+        .order_by('id')
+        .values_list(*FIELDS)
+        .iterator(chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE)
+    )
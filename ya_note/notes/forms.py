@@ -1,9 +1,8 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
 from .models import Note
+from .slugs import slug_taken
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -16,14 +15,12 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
+        """Обрабатывает случай, если slug не уникален.
+
+        Пустой slug не проверяем: модель подберёт свободный при
+        сохранении, добавив при необходимости числовой суффикс.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and slug_taken(Note, slug, exclude_pk=self.instance.pk):
             raise ValidationError(slug + WARNING)
         return slug
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from notes.bench import isolated_database, measure
+from notes.models import Note
+
+
+def profiles():
+    """Прежняя схема (сессия и пользователь из БД) и кешированная.
+
+    Замер идёт в одном процессе, поэтому кешированной схеме хватает
+    LocMemCache.
+    """
+    return {
+        'db': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+            'USER_CACHE_ENABLED': False,
+        },
+        'cached': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'USER_CACHE_ENABLED': True,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сколько SQL-запросов и времени экономят кешированные сессия '
+        'и пользователь на списке заметок залогиненного автора.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with isolated_database(), override_settings(
+            QUERY_BUDGET_STRICT=False, ALLOWED_HOSTS=['testserver']
+        ):
+            user = get_user_model().objects.create(username='bench')
+            Note.objects.bulk_create(
+                Note(title=f'Заметка {index}', text='Текст',
+                     slug=f'note-{index}', author=user)
+                for index in range(settings.NOTES_PAGE_SIZE)
+            )
+            url = reverse('notes:list')
+            for name, overrides in profiles().items():
+                with override_settings(**overrides):
+                    client = Client()
+                    client.force_login(user)
+                    client.get(url)
+                    result = measure(lambda: client.get(url), options['runs'])
+                self.stdout.write(
+                    '{name:>7}: mean {mean_ms:6.2f} ms, p95 {p95_ms:6.2f} ms, '
+                    'queries {queries}'.format(name=name, **result)
+                )
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from notes.bench import isolated_database, measure
+from notes.models import Note
+
+DEFAULT_SIZES = (10_000, 100_000)
+
+
+def create_notes(author, start, count):
+    Note.objects.bulk_create(
+        (Note(
+            title=f'Заметка {index}',
+            text='Длинный текст заметки. ' * 50,
+            slug=f'note-{index}',
+            author=author,
+        ) for index in range(start, count)),
+        batch_size=5000,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сколько стоит первая страница списка заметок при разном размере '
+        'коллекции автора: время и число SQL-запросов. С курсорной '
+        'пагинацией они не должны расти вместе с коллекцией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=DEFAULT_SIZES,
+                            help='Размеры коллекции по возрастанию.')
+        parser.add_argument('--runs', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with isolated_database(), override_settings(
+            NOTES_CACHE_ENABLED=False, QUERY_BUDGET_STRICT=False,
+            ALLOWED_HOSTS=['testserver'],
+        ):
+            author = get_user_model().objects.create(username='bench')
+            client = Client()
+            client.force_login(author)
+            url = reverse('notes:list')
+            created = 0
+            baseline = None
+            for size in sorted(options['sizes']):
+                create_notes(author, created, size)
+                created = size
+                client.get(url)
+                result = measure(lambda: client.get(url), options['runs'])
+                baseline = baseline or result['mean_ms']
+                self.stdout.write(
+                    '{size:>9}: mean {mean_ms:6.2f} ms, p95 {p95_ms:6.2f} ms, '
+                    'queries {queries}, x{ratio:.2f}'.format(
+                        size=size, ratio=result['mean_ms'] / baseline,
+                        **result,
+                    )
+                )
@@ -0,0 +1,151 @@
+import json
+import platform
+from importlib import import_module
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.bench import isolated_database
+from notes.loadtest import VirtualUser, format_results, run_load, summarize
+from notes.models import Note
+from notes.routers import read_stats, reset_read_stats
+from notes.search import index_notes
+
+ROLES = ('anonymous', 'user')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест всех страниц ya_note: WSGI-приложение '
+        'yanote.wsgi вызывается внутри процесса из нескольких потоков '
+        'и процессов от имени анонимных и залогиненных пользователей. '
+        'Для каждого имени URL выводятся p50/p95/p99, запросов в секунду '
+        'и SQL-запросов на запрос, а также доля чтений с реплик БД; '
+        '--output сохраняет отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--notes', type=int, default=200,
+                            help='Заметок на одного пользователя.')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Запросов на каждую роль.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--roles', nargs='+', choices=ROLES,
+                            default=list(ROLES))
+        parser.add_argument('--output',
+                            help='Файл для JSON-отчёта; «-» — stdout.')
+
+    def handle(self, *args, **options):
+        report = {
+            'project': 'ya_note',
+            'started_at': timezone.now().isoformat(),
+            'options': {
+                name: options[name] for name in (
+                    'users', 'notes', 'requests', 'threads', 'processes',
+                    'roles',
+                )
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'database_profile': settings.DATABASE_PROFILE,
+                'database_replicas': settings.DATABASE_REPLICAS,
+            },
+            'phases': [],
+        }
+        with isolated_database(), override_settings(
+            QUERY_BUDGET_STRICT=False
+        ):
+            users = self.seed(options['users'], options['notes'])
+            application = import_module('yanote.wsgi').application
+            for role in options['roles']:
+                reset_read_stats()
+                samples, elapsed = run_load(
+                    application, self.virtual_users(role, users),
+                    options['requests'], options['threads'],
+                    options['processes'],
+                )
+                results = summarize(samples, elapsed)
+                reads = read_stats()
+                report['phases'].append({
+                    'role': role,
+                    'requests': len(samples),
+                    'elapsed_s': elapsed,
+                    'rps': len(samples) / elapsed,
+                    'reads': reads,
+                    'results': results,
+                })
+                if options['output'] != '-':
+                    self.stdout.write(
+                        f'{role}: {len(samples) / elapsed:.1f} req/s, '
+                        f'reads from replicas '
+                        f'{reads["replica_fraction"]:.0%}'
+                    )
+                    self.stdout.write(format_results(results))
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+
+    def seed(self, users_count, notes_per_user):
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user{index}')
+            for index in range(users_count)
+        )
+        users = list(get_user_model().objects.order_by('pk'))
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}', text='Текст заметки. ' * 20,
+                slug=f'user{user.pk}-note-{index}', author=user,
+            )
+            for user in users for index in range(notes_per_user)
+        )
+        index_notes(Note.objects.all())
+        return users
+
+    def virtual_users(self, role, users):
+        if role == 'anonymous':
+            pages = [
+                ('notes:home', reverse('notes:home')),
+                ('users:login', reverse('users:login')),
+                ('users:signup', reverse('users:signup')),
+            ]
+            return [VirtualUser(pages) for _ in users]
+        virtual_users = []
+        for user in users:
+            note = Note.objects.filter(author=user).first()
+            pages = [
+                ('notes:home', reverse('notes:home')),
+                ('notes:list', reverse('notes:list')),
+                ('notes:add', reverse('notes:add')),
+                ('notes:success', reverse('notes:success')),
+                ('notes:export', reverse('notes:export')),
+                ('notes:search', reverse('notes:search') + '?' + urlencode(
+                    {'q': 'заметка'}
+                )),
+            ]
+            if note is not None:
+                pages += [
+                    ('notes:detail',
+                     reverse('notes:detail', args=(note.slug,))),
+                    ('notes:edit', reverse('notes:edit', args=(note.slug,))),
+                    ('notes:delete',
+                     reverse('notes:delete', args=(note.slug,))),
+                ]
+            client = Client()
+            client.force_login(user)
+            virtual_users.append(VirtualUser(pages, {
+                name: morsel.value for name, morsel in client.cookies.items()
+            }))
+        return virtual_users
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from ._search_index import recreate_table
+
+
+class Migration(migrations.Migration):
+    """Пересоздаёт индекс SQLite, созданный прежней версией 0003.
+
+    Триггеры вызывали функцию нормализации, которой нет вне Django,
+    и пропадали при пересоздании notes_note, а поиск перебирал термины
+    заметок всех авторов. Теперь индекс пишет Python, и каждый термин
+    начинается с автора.
+    """
+
+    dependencies = [
+        ('notes', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_table, migrations.RunPython.noop),
+    ]
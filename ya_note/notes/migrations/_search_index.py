@@ -0,0 +1,86 @@
+"""SQL поискового индекса для миграций 0003 и 0004.
+
+Модуль с «_» в начале имени загрузчик миграций не считает миграцией.
+SQL и нормализация текста зафиксированы здесь, а не берутся
+из notes.search: миграции должны делать то же, что и при создании, как
+бы ни менялся код приложения. Индекс SQLite заполняется из Python,
+триггеров нет: дальше его ведут сигналы notes.search.
+"""
+import re
+
+import snowballstemmer
+
+FTS_TABLE = 'notes_note_fts'
+# «_» — часть токена: термины хранятся с автором, «u42_слов».
+FTS_TOKENIZER = "unicode61 tokenchars '_'"
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')"
+)
+WORD_RE = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def index_text(stemmer, text, author_id):
+    words = WORD_RE.findall((text or '').casefold().replace('ё', 'е'))
+    return ' '.join(f'u{author_id}_{term}'
+                    for term in stemmer.stemWords(words))
+
+
+def fill_index(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    stemmer = snowballstemmer.stemmer('russian')
+    rows = Note.objects.values_list(
+        'id', 'author_id', 'title', 'text'
+    ).iterator(chunk_size=BATCH_SIZE)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            (
+                (pk, index_text(stemmer, title, author_id),
+                 index_text(stemmer, text, author_id))
+                for pk, author_id, title, text in rows
+            ),
+        )
+
+
+def drop_triggers(schema_editor):
+    for suffix in ('insert', 'update', 'delete'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+
+
+def create_table(apps, schema_editor):
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+        f'USING fts5(title, text, tokenize="{FTS_TOKENIZER}")'
+    )
+    fill_index(apps, schema_editor)
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX notes_search_idx ON notes_note '
+            f'USING gin (({POSTGRES_VECTOR}))'
+        )
+    elif vendor == 'sqlite':
+        create_table(apps, schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX notes_search_idx')
+    elif vendor == 'sqlite':
+        drop_triggers(schema_editor)
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+
+
+def recreate_table(apps, schema_editor):
+    """Индекс прежней версии 0003: с триггерами и без автора в терминах."""
+    if schema_editor.connection.vendor == 'sqlite':
+        drop_triggers(schema_editor)
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        create_table(apps, schema_editor)
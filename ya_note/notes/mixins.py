@@ -0,0 +1,14 @@
+class CachedObjectMixin:
+    """Запоминает результат get_object() на время запроса.
+
+    Экземпляр CBV создаётся заново для каждого запроса, поэтому объект
+    хранится прямо в представлении, и повторные вызовы get_object()
+    (например, из get_success_url) не ходят в БД.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_cached_object'):
+            self._cached_object = super().get_object()
+        return self._cached_object
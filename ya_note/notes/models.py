@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.db import models
 
-from pytils.translit import slugify
+from .slugs import save_with_unique_slug
 
 
 class Note(models.Model):
@@ -26,13 +26,23 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    class Meta:
+        indexes = (
+            # Заметки пользователя по порядку id: список заметок
+            # и курсор следующей страницы. Заменяет индекс внешнего
+            # ключа author. Поиск по author и slug идёт по уникальному
+            # индексу slug.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Пустой slug подбирается по заголовку, без конфликтов."""
+        if self.slug:
+            return super().save(*args, **kwargs)
+        return save_with_unique_slug(self, super().save, *args, **kwargs)
@@ -0,0 +1,323 @@
+"""Выборочное профилирование HTTP-запросов.
+
+Профилируется доля PROFILING_SAMPLE_RATE запросов, а также запросы
+с подписанным заголовком X-Profile (токен — на странице профилей)
+и запросы сотрудников с ?profile=1. Без PROFILING_ENABLED middleware
+отключается при загрузке.
+
+Профиль — стеки вызовов, которые поток StackSampler снимает с потока
+запроса каждые PROFILING_INTERVAL секунд (на практике не чаще интервала
+переключения GIL, 5 ms), и время каждого SQL-запроса. Стеки пишутся
+в формате collapsed stacks («кадр;кадр;кадр число») — его принимают
+flamegraph.pl, speedscope и inferno, — а сведения о запросе и SQL —
+в JSON рядом. Кадр — «модуль:функция»; по самому глубокому кадру
+Django каждая выборка относится к ORM, шаблонам или формам.
+
+В PROFILING_DIR хранятся не больше PROFILING_MAX_FILES профилей
+и PROFILING_MAX_BYTES байт: старые профили удаляются при записи новых.
+
+Под ASGI запросы одного цикла событий идут в одном потоке, и выборку
+нельзя отнести к запросу, поэтому профилируется только синхронная
+обработка.
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.utils.decorators import sync_and_async_middleware
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+TOKEN_SALT = __name__
+# Категории выборок по модулю самого глубокого кадра Django.
+CATEGORIES = (
+    ('django.db', 'orm'),
+    ('django.template', 'templates'),
+    ('django.forms', 'forms'),
+)
+# Длина текста SQL, которая сохраняется в профиле.
+SQL_PREVIEW = 500
+
+# Профиль текущего HTTP-запроса; None — профилирование не идёт.
+_current_profile = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Стеки и SQL-запросы одного HTTP-запроса."""
+
+    def __init__(self, root):
+        # Кадр middleware: кадры ниже него в профиль не попадают.
+        self.root = root
+        self.stacks = Counter()
+        self.categories = Counter()
+        self.queries = []
+
+    def add_sample(self, frame):
+        names = []
+        category = 'other'
+        while frame is not None and frame is not self.root:
+            module = frame.f_globals.get('__name__', '?')
+            names.append(f'{module}:{frame.f_code.co_name}')
+            if category == 'other':
+                category = next((
+                    name for prefix, name in CATEGORIES
+                    if module.startswith(prefix)
+                ), 'other')
+            frame = frame.f_back
+        if names:
+            self.stacks[';'.join(reversed(names))] += 1
+            self.categories[category] += 1
+
+    def collapsed(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql[:SQL_PREVIEW],
+                'many': many,
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+class StackSampler:
+    """Поток, который снимает стеки с зарегистрированных потоков."""
+
+    def __init__(self):
+        self._profiles = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def add(self, thread_id, profile):
+        with self._condition:
+            self._profiles[thread_id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='stack-sampler', daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def remove(self, thread_id):
+        with self._condition:
+            self._profiles.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._profiles:
+                    self._condition.wait()
+                profiles = list(self._profiles.items())
+            frames = sys._current_frames()
+            for thread_id, profile in profiles:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    profile.add_sample(frame)
+            del frames
+            time.sleep(settings.PROFILING_INTERVAL)
+
+
+sampler = StackSampler()
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка соединения: передаёт запрос профилю текущего запроса."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает record_query."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def profiling_token():
+    """Значение заголовка X-Profile; действует PROFILING_TOKEN_MAX_AGE."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        return _valid_token(token)
+    if request.GET.get('profile') == '1':
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def _profile_paths(directory, profile_id):
+    return (
+        directory / f'{profile_id}.collapsed',
+        directory / f'{profile_id}.json',
+    )
+
+
+def _prune(directory):
+    """Удаляет старые профили сверх PROFILING_MAX_FILES и _MAX_BYTES."""
+    profiles = []
+    for meta in directory.glob('*.json'):
+        paths = _profile_paths(directory, meta.stem)
+        try:
+            size = sum(path.stat().st_size for path in paths)
+        except FileNotFoundError:
+            continue
+        profiles.append((meta.stem, size))
+    # Id начинается со времени записи: сортировка — от новых к старым.
+    profiles.sort(reverse=True)
+    total = 0
+    for index, (profile_id, size) in enumerate(profiles):
+        total += size
+        if (
+            index >= settings.PROFILING_MAX_FILES
+            or total > settings.PROFILING_MAX_BYTES
+        ):
+            for path in _profile_paths(directory, profile_id):
+                path.unlink(missing_ok=True)
+
+
+def save_profile(request, response, profile, elapsed):
+    """Пишет профиль на диск; возвращает его id."""
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    profile_id = '{}{:06d}-{}'.format(
+        time.strftime('%Y%m%dT%H%M%S', time.localtime(now)),
+        int(now % 1 * 1_000_000), uuid.uuid4().hex[:8],
+    )
+    match = request.resolver_match
+    meta = {
+        'id': profile_id,
+        'created': now,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view_name': match.view_name if match else None,
+        'status': response.status_code,
+        'total_ms': elapsed * 1000,
+        'samples': sum(profile.stacks.values()),
+        'categories': dict(profile.categories),
+        'sql_count': len(profile.queries),
+        'sql_ms': sum(query['ms'] for query in profile.queries),
+        'queries': profile.queries,
+    }
+    collapsed_path, meta_path = _profile_paths(directory, profile_id)
+    collapsed_path.write_text(profile.collapsed(), encoding='utf-8')
+    # JSON пишется последним: по нему профиль попадает в список.
+    meta_path.write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8'
+    )
+    _prune(directory)
+    return profile_id
+
+
+@sync_and_async_middleware
+def profiling_middleware(get_response):
+    """Профилирует выбранные запросы и сохраняет профили на диск.
+
+    Ставится после AuthenticationMiddleware, чтобы ?profile=1 проверял
+    сотрудника.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise MiddlewareNotUsed
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            return await get_response(request)
+        return middleware
+
+    def middleware(request):
+        if not should_profile(request):
+            return get_response(request)
+        profile = RequestProfile(sys._getframe())
+        thread_id = threading.get_ident()
+        token = _current_profile.set(profile)
+        sampler.add(thread_id, profile)
+        started = time.perf_counter()
+        try:
+            response = get_response(request)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            sampler.remove(thread_id)
+            _current_profile.reset(token)
+        elapsed = time.perf_counter() - started
+        response[PROFILE_ID_HEADER] = save_profile(
+            request, response, profile, elapsed
+        )
+        return response
+    return middleware
+
+
+def load_profiles():
+    """Сведения о профилях без SQL, от новых к старым."""
+    directory = Path(settings.PROFILING_DIR)
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            continue
+        meta.pop('queries', None)
+        profiles.append(meta)
+    return profiles
+
+
+@staff_member_required
+def profile_index(request):
+    """Список последних профилей и токен для заголовка X-Profile."""
+    return render(request, 'profiling/index.html', {
+        'profiles': load_profiles(),
+        'token': profiling_token(),
+        'token_max_age': settings.PROFILING_TOKEN_MAX_AGE,
+    })
+
+
+@staff_member_required
+def profile_file(request, profile_id, kind):
+    """Файл профиля: collapsed-стеки или JSON с SQL."""
+    if kind not in ('collapsed', 'json'):
+        raise Http404('Неизвестный файл профиля.')
+    collapsed_path, meta_path = _profile_paths(
+        Path(settings.PROFILING_DIR), profile_id
+    )
+    path = collapsed_path if kind == 'collapsed' else meta_path
+    if not path.is_file():
+        raise Http404('Профиль не найден.')
+    return FileResponse(
+        open(path, 'rb'), as_attachment=kind == 'collapsed',
+        content_type=(
+            'text/plain; charset=utf-8' if kind == 'collapsed'
+            else 'application/json'
+        ),
+    )
@@ -0,0 +1,204 @@
+"""Полнотекстовый поиск по заметкам.
+
+SQLite: виртуальная таблица FTS5 notes_note_fts с rowid = id заметки.
+В индекс пишется нормализованный текст: регистр, «ё» и русские окончания
+(стеммер snowballstemmer). Каждый термин начинается с автора
+(«u42_слов»), поэтому запрос читает только списки терминов своего
+автора и не растёт вместе с заметками остальных пользователей.
+
+Индекс пишет Python, а не триггеры: триггеры с функцией нормализации
+ломали запись в notes_note из любого соединения без этой функции
+(dbshell, sqlite3, резервные копии) и пропадали, когда SQLite
+пересоздаёт таблицу в миграциях. Сохранение и удаление заметки
+обновляют индекс сигналами в той же транзакции; bulk_create сигналов
+не отправляет, после него вызывается index_notes(). Запись в notes_note
+в обход ORM индекс не обновляет — его перестраивает rebuild_index().
+
+PostgreSQL: GIN-индекс по выражению tsvector с конфигурацией russian,
+поддерживать его вручную не нужно; заметки автора отбирает индекс
+по author_id.
+
+После смены версии snowballstemmer индекс SQLite тоже нужно
+перестроить: rebuild_index().
+"""
+import itertools
+import re
+from functools import lru_cache
+
+import snowballstemmer
+from django.core.exceptions import BadRequest
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Заметок на один INSERT в индекс.
+INDEX_BATCH_SIZE = 1000
+
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')"
+)
+
+# Вес совпадения в заголовке относительно совпадения в тексте.
+TITLE_WEIGHT = 10.0
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Приводит текст к виду для сравнения: регистр и «ё»."""
+    return text.casefold().replace('ё', 'е')
+
+
+@lru_cache(maxsize=None)
+def _stemmer():
+    return snowballstemmer.stemmer('russian')
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    return _stemmer().stemWord(word)
+
+
+def terms(text):
+    """Нормализованные основы слов текста."""
+    return [stem(word) for word in WORD_RE.findall(normalize(text or ''))]
+
+
+def author_term(author_id, term):
+    # «_» — символ токена в индексе (tokenchars), а id автора состоит
+    # из цифр: термины разных авторов не совпадают.
+    return f'u{author_id}_{term}'
+
+
+def index_text(text, author_id):
+    return ' '.join(author_term(author_id, term) for term in terms(text))
+
+
+def index_rows(rows, using=connection):
+    """Заново индексирует заметки из строк (id, author_id, title, text)."""
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        # FTS5 заменяет строку с тем же rowid: отдельный DELETE не нужен.
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            [
+                (pk, index_text(title, author_id),
+                 index_text(text, author_id))
+                for pk, author_id, title, text in rows
+            ],
+        )
+
+
+def index_notes(queryset, using=connection):
+    """Заново индексирует заметки queryset пачками."""
+    if using.vendor != 'sqlite':
+        return
+    rows = queryset.values_list('id', 'author_id', 'title', 'text').iterator(
+        chunk_size=INDEX_BATCH_SIZE
+    )
+    while True:
+        batch = list(itertools.islice(rows, INDEX_BATCH_SIZE))
+        if not batch:
+            return
+        index_rows(batch, using)
+
+
+def unindex_notes(ids, using=connection):
+    """Убирает заметки из индекса SQLite."""
+    if using.vendor == 'sqlite':
+        with using.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in ids],
+            )
+
+
+def rebuild_index(using=connection):
+    """Заново заполняет индекс SQLite из notes_note."""
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    index_notes(Note.objects.using(using.alias).order_by(), using)
+
+
+@receiver(post_save, sender=Note)
+def index_saved_note(sender, instance, **kwargs):
+    """Поисковый индекс SQLite пишется в той же транзакции."""
+    index_rows([
+        (instance.pk, instance.author_id, instance.title, instance.text)
+    ])
+
+
+@receiver(post_delete, sender=Note)
+def unindex_deleted_note(sender, instance, **kwargs):
+    unindex_notes([instance.pk])
+
+
+def _sqlite_query(words, author_id):
+    # Каждое слово — префиксный запрос в кавычках: синтаксис FTS5
+    # в пользовательском вводе не интерпретируется.
+    match = ' '.join(f'"{author_term(author_id, word)}"*' for word in words)
+    sql = (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0), rowid DESC '
+        f'LIMIT %s OFFSET %s'
+    )
+    return sql, [match]
+
+
+def _postgres_query(words, author_id):
+    query = ' & '.join(f'{word}:*' for word in words)
+    sql = (
+        f"SELECT id FROM notes_note "
+        f"WHERE ({POSTGRES_VECTOR}) @@ to_tsquery('russian', %s) "
+        f"AND author_id = %s "
+        f"ORDER BY ts_rank(({POSTGRES_VECTOR}), "
+        f"to_tsquery('russian', %s)) DESC, id DESC "
+        f"LIMIT %s OFFSET %s"
+    )
+    return sql, [query, author_id, query]
+
+
+def search_ids(query, author, limit, offset=0):
+    """Возвращает id заметок автора по запросу в порядке релевантности."""
+    if connection.vendor == 'postgresql':
+        words = WORD_RE.findall(normalize(query))
+        sql, params = _postgres_query(words, author.pk)
+    else:
+        words = terms(query)
+        sql, params = _sqlite_query(words, author.pk)
+    if not words:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def parse_page(value):
+    """Номер страницы из GET-параметра; 1, если параметра нет."""
+    if value is None:
+        return 1
+    if not value.isdigit() or int(value) < 1:
+        raise BadRequest('Некорректный номер страницы.')
+    return int(value)
+
+
+def search_page(query, author, page, page_size):
+    """Страница результатов: заметки и признак следующей страницы.
+
+    Запрашивается на одну запись больше страницы, чтобы узнать
+    о следующей странице без COUNT по индексу.
+    """
+    ids = search_ids(query, author, page_size + 1, (page - 1) * page_size)
+    notes = Note.objects.only('id', 'slug', 'title').in_bulk(ids[:page_size])
+    return {
+        'results': [notes[pk] for pk in ids[:page_size] if pk in notes],
+        'has_next': len(ids) > page_size,
+    }
@@ -0,0 +1,78 @@
+"""Выдача уникальных slug для заметок.
+
+Свободный slug подбирается одним агрегирующим запросом по префиксу:
+база занимает либо сам slug, либо slug с числовым суффиксом «-N».
+Если между проверкой и вставкой slug успеет занять другой запрос,
+сохранение повторяется с новым суффиксом.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, When
+from django.db.models.functions import Cast, Substr
+from pytils.translit import slugify
+
+# Сколько раз пробовать сохранить заметку при гонке за один slug.
+MAX_ATTEMPTS = 5
+# Место под суффикс «-N» в поле slug.
+SUFFIX_RESERVE = 11
+DEFAULT_SLUG = 'note'
+
+
+def slug_field_length(model):
+    return model._meta.get_field('slug').max_length
+
+
+def base_slug(model, title):
+    """Slug из заголовка без учёта занятости."""
+    return slugify(title)[:slug_field_length(model)] or DEFAULT_SLUG
+
+
+def slug_taken(model, slug, exclude_pk=None):
+    return model.objects.filter(slug=slug).exclude(pk=exclude_pk).exists()
+
+
+def allocate_slug(model, title, exclude_pk=None):
+    """Свободный slug для заголовка за один запрос к БД.
+
+    Возвращает slug из заголовка, а если он занят — тот же slug
+    с суффиксом, на единицу большим максимального из занятых.
+    """
+    base = base_slug(model, title)
+    stem = base[:slug_field_length(model) - SUFFIX_RESERVE]
+    suffixed = Q(slug__regex=r'^{}-[0-9]+$'.format(re.escape(stem)))
+    taken = model.objects.filter(
+        Q(slug=base) | Q(slug__startswith=f'{stem}-') & suffixed
+    ).exclude(pk=exclude_pk).aggregate(
+        base_taken=Count('pk', filter=Q(slug=base)),
+        last_suffix=Max(Case(
+            When(suffixed, then=Cast(
+                Substr('slug', len(stem) + 2), IntegerField()
+            )),
+            output_field=IntegerField(),
+        )),
+    )
+    if not taken['base_taken']:
+        return base
+    return '{}-{}'.format(stem, (taken['last_suffix'] or 1) + 1)
+
+
+def save_with_unique_slug(instance, save, *args, **kwargs):
+    """Сохраняет объект, подбирая slug и повторяя попытку при гонке.
+
+    save — исходный метод сохранения модели. Каждая попытка идёт
+    в своей точке сохранения, чтобы ошибка уникальности не ломала
+    внешнюю транзакцию.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = allocate_slug(
+            type(instance), instance.title, exclude_pk=instance.pk
+        )
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1 or not slug_taken(
+                    type(instance), instance.slug, instance.pk
+            ):
+                raise
@@ -0,0 +1,13 @@
+import pytest
+
+from notes.cache import notes_cache, reset_notes_cache_stats
+
+
+@pytest.fixture(autouse=True)
+def clear_notes_cache():
+    """Каждый тест начинает с пустого кеша заметок.
+
+    Откат транзакции теста не откатывает версии заметок в кеше.
+    """
+    notes_cache().clear()
+    reset_notes_cache_stats()
@@ -0,0 +1,73 @@
+import os
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.auth import shared_caches, user_cache, user_cache_key
+from yanote import settings as shipped
+
+User = get_user_model()
+
+
+# Тесты идут в одном процессе: LocMemCache для сессий достаточно.
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    USER_CACHE_ENABLED=True,
+)
+class TestCachedAuth(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        self.auth_author = Client()
+        self.auth_author.force_login(self.author)
+        self.url = reverse('notes:list')
+
+    @override_settings(NOTES_CACHE_ENABLED=False)
+    def test_session_and_user_from_cache(self):
+        """Со второго запроса ни сессия, ни пользователь не читаются из БД."""
+        with self.assertNumQueries(2):
+            self.auth_author.get(self.url)
+        with self.assertNumQueries(1):
+            self.auth_author.get(self.url)
+
+    def test_password_change_logs_out(self):
+        """Смена пароля сбрасывает пользователя в кеше и вход."""
+        self.auth_author.get(self.url)
+        self.author.set_password('new-password')
+        self.author.save()
+        self.assertIsNone(user_cache().get(user_cache_key(self.author.pk)))
+        response = self.auth_author.get(self.url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_logout_drops_cached_user(self):
+        self.auth_author.get(self.url)
+        self.auth_author.get(reverse('users:logout'))
+        self.assertIsNone(user_cache().get(user_cache_key(self.author.pk)))
+
+    @skipIf(
+        os.environ.get('SESSION_CACHE_BACKEND'), 'Общий кеш задан окружением.'
+    )
+    def test_user_cache_disabled_by_default(self):
+        """В поставляемых настройках сессии и пользователь читаются
+        из БД, и проверка кешей проходит.
+        """
+        with self.settings(
+            SESSION_ENGINE=shipped.SESSION_ENGINE,
+            USER_CACHE_ENABLED=shipped.USER_CACHE_ENABLED,
+        ):
+            self.assertEqual(shared_caches(None), [])
+            self.auth_author.get(self.url)
+        self.assertIsNone(user_cache().get(user_cache_key(self.author.pk)))
+
+    def test_local_cache_is_refused(self):
+        """Сессии и пользователи в LocMemCache не проходят проверку."""
+        self.assertEqual(
+            [error.id for error in shared_caches(None)], ['notes.E001'] * 2
+        )
+        with self.settings(
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+            USER_CACHE_ENABLED=False,
+        ):
+            self.assertEqual(shared_caches(None), [])
@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.cache import notes_cache_stats, notes_version
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestNotesCache(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note-slug',
+            author=cls.author,
+        )
+        cls.list_url = reverse('notes:list')
+        cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        self.auth_author = Client()
+        self.auth_author.force_login(self.author)
+
+    def titles(self):
+        response = self.auth_author.get(self.list_url)
+        return [note.title for note in response.context['object_list']]
+
+    def test_repeated_pages_do_not_query_notes(self):
+        """Повторные список и заметка не читают заметки из БД."""
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url=url):
+                self.auth_author.get(url)
+                # Только сессия и пользователь.
+                with self.assertNumQueries(2):
+                    response = self.auth_author.get(url)
+                self.assertContains(response, self.note.title)
+        self.assertEqual(
+            notes_cache_stats(),
+            {'hits': 2, 'misses': 2, 'hit_rate': 0.5},
+        )
+
+    def test_cursor_spellings_share_cache_entry(self):
+        """Ключ списка строится из числа: «?after=07» и «?after=7»
+        — одна запись кеша.
+        """
+        after = self.note.pk - 1
+        self.auth_author.get(self.list_url, {'after': after})
+        with self.assertNumQueries(2):
+            response = self.auth_author.get(
+                self.list_url, {'after': f'00{after}'}
+            )
+        self.assertContains(response, self.note.title)
+
+    def test_views_invalidate_cache(self):
+        """Создание, изменение и удаление заметки видны сразу."""
+        self.assertEqual(self.titles(), ['Заголовок'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_author.post(reverse('notes:add'), {
+                'title': 'Новая', 'text': 'Текст', 'slug': 'new',
+            })
+        self.assertEqual(self.titles(), ['Заголовок', 'Новая'])
+        self.auth_author.get(self.detail_url)
+        edit_url = reverse('notes:edit', args=(self.note.slug,))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_author.post(edit_url, {
+                'title': 'Изменённая', 'text': 'Текст',
+                'slug': self.note.slug,
+            })
+        self.assertContains(
+            self.auth_author.get(self.detail_url), 'Изменённая'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_author.post(reverse('notes:delete', args=('new',)))
+        self.assertEqual(self.titles(), ['Изменённая'])
+
+    def test_invalidation_waits_for_commit(self):
+        """До фиксации транзакции версия заметок не меняется."""
+        version = notes_version(self.author.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.note.title = 'Изменённая'
+            self.note.save()
+        self.assertEqual(notes_version(self.author.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(notes_version(self.author.pk), version)
+
+    def test_other_users_cache_is_kept(self):
+        """Запись одного пользователя не сбрасывает кеш другого."""
+        auth_reader = Client()
+        auth_reader.force_login(self.reader)
+        auth_reader.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_author.post(reverse('notes:add'), {
+                'title': 'Новая', 'text': 'Текст', 'slug': 'new',
+            })
+        # Из БД читаются только сессия и пользователь.
+        with self.assertNumQueries(2):
+            auth_reader.get(self.list_url)
+
+    def test_admin_changes_invalidate_cache(self):
+        """Смена автора в админке убирает заметку из кеша обоих."""
+        admin = User.objects.create_superuser('admin', 'admin@example.com')
+        auth_admin = Client()
+        auth_admin.force_login(admin)
+        auth_reader = Client()
+        auth_reader.force_login(self.reader)
+        self.assertEqual(self.titles(), ['Заголовок'])
+        auth_reader.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            auth_admin.post(
+                reverse('admin:notes_note_change', args=(self.note.pk,)),
+                {
+                    'title': 'Заголовок', 'text': 'Текст',
+                    'slug': 'note-slug', 'author': self.reader.pk,
+                },
+            )
+        self.assertEqual(self.titles(), [])
+        response = auth_reader.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), [self.note])
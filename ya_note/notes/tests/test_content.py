@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.contrib.auth import get_user, get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from notes.forms import NoteForm
@@ -65,3 +66,59 @@ class TestContent(TestCase):
                     response.context['form'],
                     NoteForm,
                     msg=None)
+
+
+# Измеряется стоимость запроса заметок, а не кеш заметок.
+@override_settings(NOTES_CACHE_ENABLED=False)
+class TestNotesListPagination(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.auth_author = Client()
+        cls.auth_author.force_login(cls.author)
+        cls.url = reverse('notes:list')
+
+    def create_notes(self, count):
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}', text='Текст',
+                slug=f'note-{index}', author=self.author,
+            ) for index in range(count)
+        )
+
+    def test_pages_walk_all_notes(self):
+        """Страницы по курсору проходят все заметки ровно по одному разу."""
+        self.create_notes(settings.NOTES_PAGE_SIZE * 2 + 1)
+        seen = []
+        url = self.url
+        while url:
+            response = self.auth_author.get(url)
+            seen.extend(note.id for note in response.context['object_list'])
+            next_after = response.context['next_after']
+            url = next_after and f'{self.url}?after={next_after}'
+        all_ids = Note.objects.order_by('id').values_list('id', flat=True)
+        self.assertEqual(seen, list(all_ids))
+
+    def test_text_column_is_not_loaded(self):
+        """Список не загружает текст заметок."""
+        self.create_notes(3)
+        response = self.auth_author.get(self.url)
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_page_cost_does_not_grow_with_collection(self):
+        """Страница стоит одинаковое число запросов при любой длине
+        коллекции. Время на 10k и 100k заметок сравнивает команда
+        bench_notes_list.
+        """
+        self.create_notes(settings.NOTES_PAGE_SIZE * 3)
+        # Сессия, пользователь и заметки.
+        with self.assertNumQueries(3):
+            response = self.auth_author.get(self.url)
+        self.assertEqual(
+            len(response.context['object_list']), settings.NOTES_PAGE_SIZE
+        )
+        next_url = f"{self.url}?after={response.context['next_after']}"
+        with self.assertNumQueries(3):
+            self.auth_author.get(next_url)
@@ -0,0 +1,63 @@
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.views import View
+
+from notes.db import RetryOnLockMixin, retry_on_lock
+
+
+class LockedOnceView(RetryOnLockMixin, View):
+    """Первая попытка записи натыкается на блокировку БД."""
+    calls = None
+
+    def write(self, request):
+        self.calls.append(request.method)
+        if len(self.calls) == 1:
+            raise OperationalError('database is locked')
+        return HttpResponse('ok')
+
+    get = post = put = patch = delete = write
+
+
+@override_settings(DB_LOCK_RETRIES=2, DB_LOCK_RETRY_DELAY=0)
+class TestRetryOnLock(TransactionTestCase):
+
+    def test_retries_locked_transaction(self):
+        """Запись повторяется при блокировке, но не бесконечно."""
+        calls = []
+
+        def locked():
+            calls.append(1)
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(locked)
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_not_retried(self):
+        """Прочие ошибки БД пробрасываются сразу."""
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise OperationalError('no such table: notes_note')
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(broken)
+        self.assertEqual(len(calls), 1)
+
+    def test_mixin_retries_unsafe_methods(self):
+        """Повторяются все записывающие методы, а не только POST."""
+        for method in ('post', 'put', 'patch', 'delete'):
+            with self.subTest(method=method):
+                calls = []
+                view = LockedOnceView.as_view(calls=calls)
+                response = view(getattr(RequestFactory(), method)('/'))
+                self.assertEqual(response.content, b'ok')
+                self.assertEqual(calls, [method.upper()] * 2)
+
+    def test_mixin_does_not_retry_get(self):
+        """GET не пишет в БД и не повторяется."""
+        view = LockedOnceView.as_view(calls=[])
+        with self.assertRaises(OperationalError):
+            view(RequestFactory().get('/'))
@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import zipfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+def content(response):
+    return b''.join(response.streaming_content)
+
+
+@override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+class TestExport(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        reader = User.objects.create(username='Читатель')
+        cls.auth_author = Client()
+        cls.auth_author.force_login(cls.author)
+        cls.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text=f'Текст, "{index}"\nстрока',
+                slug=f'note-{index}', author=cls.author,
+            )
+            for index in range(5)
+        ]
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='other', author=reader
+        )
+        cls.url = reverse('notes:export')
+
+    def test_ndjson_streams_only_own_notes(self):
+        response = self.auth_author.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn('notes.ndjson', response['Content-Disposition'])
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual(
+            [row['slug'] for row in rows],
+            [note.slug for note in self.notes],
+        )
+        self.assertEqual(rows[0]['text'], self.notes[0].text)
+
+    def test_csv(self):
+        response = self.auth_author.get(self.url, {'format': 'csv'})
+        rows = list(csv.reader(io.StringIO(content(response).decode())))
+        self.assertEqual(rows[0], ['id', 'slug', 'title', 'text'])
+        self.assertEqual(len(rows), len(self.notes) + 1)
+        self.assertEqual(rows[1][3], self.notes[0].text)
+
+    def test_zip_of_markdown(self):
+        response = self.auth_author.get(self.url, {'format': 'zip'})
+        archive = zipfile.ZipFile(io.BytesIO(content(response)))
+        self.assertEqual(
+            archive.namelist(), [f'{note.slug}.md' for note in self.notes]
+        )
+        self.assertEqual(
+            archive.read('note-0.md').decode(),
+            f'# Заметка 0\n\n{self.notes[0].text}\n',
+        )
+
+    def test_resume_by_id_and_slug(self):
+        """Выгрузка продолжается после указанной заметки."""
+        for params in (
+            {'after': self.notes[2].id}, {'after_slug': self.notes[2].slug}
+        ):
+            with self.subTest(params=params):
+                response = self.auth_author.get(self.url, params)
+                slugs = [
+                    json.loads(line)['slug']
+                    for line in content(response).splitlines()
+                ]
+                self.assertEqual(slugs, ['note-3', 'note-4'])
+
+    def test_bad_requests(self):
+        for params, status in (
+            ({'format': 'xml'}, HTTPStatus.BAD_REQUEST),
+            ({'after': 'x'}, HTTPStatus.BAD_REQUEST),
+            ({'after_slug': 'other'}, HTTPStatus.NOT_FOUND),
+        ):
+            with self.subTest(params=params):
+                response = self.auth_author.get(self.url, params)
+                self.assertEqual(response.status_code, status)
+
+    def test_anonymous_redirected_to_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from notes.loadtest import VirtualUser, run_load, summarize
+from notes.models import Note
+from yanote.wsgi import application
+
+User = get_user_model()
+
+
+class TestLoadTest(TransactionTestCase):
+
+    def test_logged_in_user_pages(self):
+        """Залогиненный виртуальный пользователь видит свои заметки."""
+        author = User.objects.create(username='Автор')
+        note = Note.objects.create(title='Заголовок', text='Текст',
+                                   author=author)
+        client = Client()
+        client.force_login(author)
+        user = VirtualUser(
+            [
+                ('notes:list', reverse('notes:list')),
+                ('notes:detail', reverse('notes:detail', args=(note.slug,))),
+            ],
+            {name: morsel.value for name, morsel in client.cookies.items()},
+        )
+        samples, elapsed = run_load(application, [user], 10, threads=2)
+        self.assertEqual({status for *_, status in samples}, {200})
+        results = summarize(samples, elapsed)
+        self.assertEqual(
+            [row['url_name'] for row in results],
+            ['notes:detail', 'notes:list'],
+        )
+        for row in results:
+            self.assertEqual(row['requests'], 5)
+            self.assertGreater(row['queries_per_request'], 0)
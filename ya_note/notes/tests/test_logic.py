@@ -1,10 +1,12 @@
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 from pytils.translit import slugify
 
+from notes import forms, slugs
 from notes.forms import WARNING
 from notes.models import Note
 
@@ -148,3 +150,143 @@ class TestNoteCreation(TestCase):
         )
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), notes_before)
+
+    def test_post_query_count(self):
+        """Каждый POST загружает заметку не больше одного раза."""
+        edit_data = dict(self.form_data, slug=self.note.slug)
+        cases = (
+            # Сессия, пользователь, проверки slug в форме и в модели,
+            # вставка, запись в поисковый индекс.
+            ('notes:add', None, self.form_data, 6),
+            # Сессия, пользователь, заметка, две проверки slug,
+            # обновление, запись в индекс.
+            ('notes:edit', (self.note.slug,), edit_data, 7),
+            # Сессия, пользователь, заметка, удаление, удаление из индекса.
+            ('notes:delete', (self.note.slug,), {}, 5),
+        )
+        for name, args, data, queries in cases:
+            with self.subTest(name=name):
+                with self.assertNumQueries(queries):
+                    response = self.auth_author.post(
+                        reverse(name, args=args), data=data
+                    )
+                self.assertRedirects(response, self.URLS_NOTES_SUCCESS)
+
+
+class TestSlugRace(TransactionTestCase):
+    """Slug заняли между проверкой формы и записью заметки."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        self.client.force_login(self.author)
+        self.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='taken', author=self.author
+        )
+        passes = []
+        validate_unique = forms.NoteForm.validate_unique
+
+        # В первом проходе проверки формы не видят заметку
+        # параллельного запроса: её находит только INSERT.
+        def race_slug_taken(*args, **kwargs):
+            return bool(passes) and slugs.slug_taken(*args, **kwargs)
+
+        def race_validate_unique(form):
+            if passes:
+                return validate_unique(form)
+            passes.append(form)
+
+        for patcher in (
+            mock.patch.object(forms, 'slug_taken', race_slug_taken),
+            mock.patch.object(
+                forms.NoteForm, 'validate_unique', race_validate_unique
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_create_returns_form_error(self):
+        response = self.client.post(reverse('notes:add'), data={
+            'title': 'Новая', 'text': 'Текст', 'slug': 'taken',
+        })
+        self.assertFormError(response, 'form', 'slug', 'taken' + WARNING)
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_update_returns_form_error(self):
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        response = self.client.post(
+            reverse('notes:edit', args=(other.slug,)),
+            data={'title': 'Другая', 'text': 'Текст', 'slug': 'taken'},
+        )
+        self.assertFormError(response, 'form', 'slug', 'taken' + WARNING)
+        other.refresh_from_db()
+        self.assertEqual(other.slug, 'other')
+
+
+class TestSlugAllocation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.title = 'Повторяющийся заголовок'
+        cls.slug = slugify(cls.title)
+
+    def create_note(self):
+        return Note.objects.create(
+            title=self.title, text='Текст', author=self.author
+        )
+
+    def test_repeated_titles_get_numeric_suffix(self):
+        """Заметки с одинаковым заголовком получают суффиксы -2, -3."""
+        created = [self.create_note().slug for _ in range(3)]
+        self.assertEqual(
+            created, [self.slug, f'{self.slug}-2', f'{self.slug}-3']
+        )
+
+    def test_allocation_takes_one_query(self):
+        """Свободный slug подбирается одним запросом при любом числе
+        заметок с таким же заголовком.
+        """
+        for _ in range(5):
+            self.create_note()
+        with self.assertNumQueries(1):
+            slug = slugs.allocate_slug(Note, self.title)
+        self.assertEqual(slug, f'{self.slug}-6')
+
+    def test_form_without_slug_resolves_collision(self):
+        """Форма без slug не падает на занятом slug, а подбирает новый."""
+        self.create_note()
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse('notes:add'), data={'title': self.title, 'text': 'Т'}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertTrue(Note.objects.filter(slug=f'{self.slug}-2').exists())
+
+    def test_save_retries_when_slug_is_taken_concurrently(self):
+        """Если slug заняли между подбором и вставкой, сохранение
+        повторяется со следующим свободным slug.
+        """
+        self.create_note()
+        allocate = slugs.allocate_slug
+        stale_results = iter([self.slug])
+
+        def allocate_after_race(*args, **kwargs):
+            return next(stale_results, None) or allocate(*args, **kwargs)
+
+        with mock.patch.object(
+                slugs, 'allocate_slug', side_effect=allocate_after_race
+        ):
+            note = self.create_note()
+        self.assertEqual(note.slug, f'{self.slug}-2')
+
+    def test_regex_metacharacters_in_stem_are_literal(self):
+        """Символы регулярных выражений в основе slug экранируются."""
+        for slug in ('a(b', 'a(b-3'):
+            Note.objects.create(
+                title='Т', text='Т', slug=slug, author=self.author
+            )
+        with mock.patch.object(slugs, 'base_slug', return_value='a(b'):
+            self.assertEqual(slugs.allocate_slug(Note, 'a(b'), 'a(b-4')
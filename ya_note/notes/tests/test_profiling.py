@@ -0,0 +1,123 @@
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.profiling import (
+    PROFILE_ID_HEADER, RequestProfile, load_profiles, profiling_token,
+    sampler, save_profile,
+)
+
+User = get_user_model()
+
+
+def busy_loop(seconds):
+    finish = time.perf_counter() + seconds
+    while time.perf_counter() < finish:
+        pass
+
+
+class TestProfiling(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.staff = User.objects.create(username='Сотрудник', is_staff=True)
+        Note.objects.create(title='Заголовок', text='Текст', author=cls.author)
+        cls.url = reverse('notes:list')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0,
+            PROFILING_DIR=self.directory,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.auth_author = Client()
+        self.auth_author.force_login(self.author)
+        self.auth_staff = Client()
+        self.auth_staff.force_login(self.staff)
+
+    def test_sampler_collects_collapsed_stacks(self):
+        """Стеки потока снимаются от кадра-корня до самого глубокого."""
+        profile = RequestProfile(sys._getframe())
+        sampler.add(threading.get_ident(), profile)
+        try:
+            busy_loop(0.1)
+        finally:
+            sampler.remove(threading.get_ident())
+        self.assertTrue(profile.stacks)
+        for line in profile.collapsed().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+            self.assertTrue(stack.split(';')[0].endswith(':busy_loop'))
+
+    def test_signed_header_enables_profile(self):
+        """Профиль пишется только по верно подписанному заголовку."""
+        # Первый запрос: заметки ещё не в кеше и читаются из БД.
+        response = self.auth_author.get(
+            self.url, HTTP_X_PROFILE=profiling_token()
+        )
+        profile_id = response[PROFILE_ID_HEADER]
+        meta = json.loads(
+            (self.directory / f'{profile_id}.json').read_text('utf-8')
+        )
+        self.assertEqual(meta['view_name'], 'notes:list')
+        self.assertEqual(meta['status'], 200)
+        self.assertEqual(meta['sql_count'], len(meta['queries']))
+        self.assertGreater(meta['sql_count'], 0)
+        self.assertTrue((self.directory / f'{profile_id}.collapsed').exists())
+        response = self.auth_author.get(self.url)
+        self.assertNotIn(PROFILE_ID_HEADER, response)
+        response = self.auth_author.get(self.url, HTTP_X_PROFILE='bad')
+        self.assertNotIn(PROFILE_ID_HEADER, response)
+
+    def test_staff_flag_and_sample_rate(self):
+        url = self.url + '?profile=1'
+        self.assertIn(PROFILE_ID_HEADER, self.auth_staff.get(url))
+        self.assertNotIn(PROFILE_ID_HEADER, self.auth_author.get(url))
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            self.assertIn(PROFILE_ID_HEADER, Client().get(self.url))
+
+    @override_settings(PROFILING_MAX_FILES=3)
+    def test_disk_usage_is_bounded(self):
+        """Старые профили удаляются сверх лимита числа файлов и байт."""
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        response = Client().get(reverse('notes:home'))
+        profile = RequestProfile(None)
+        profile.stacks['a;b'] = 1
+        ids = [
+            save_profile(request, response, profile, 0.01) for _ in range(5)
+        ]
+        self.assertEqual(
+            [meta['id'] for meta in load_profiles()], ids[:1:-1]
+        )
+        self.assertEqual(len(list(self.directory.iterdir())), 6)
+        with self.settings(PROFILING_MAX_BYTES=1):
+            save_profile(request, response, profile, 0.01)
+        self.assertEqual(load_profiles(), [])
+
+    def test_index_lists_profiles_for_staff_only(self):
+        profile_id = self.auth_staff.get(self.url + '?profile=1')[
+            PROFILE_ID_HEADER
+        ]
+        index = reverse('profiling:index')
+        self.assertEqual(self.auth_author.get(index).status_code, 302)
+        response = self.auth_staff.get(index)
+        self.assertEqual(response.context['profiles'][0]['id'], profile_id)
+        collapsed = self.auth_staff.get(
+            reverse('profiling:file', args=(profile_id, 'collapsed'))
+        )
+        self.assertEqual(collapsed.status_code, 200)
+        collapsed.close()
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.middleware import (
+    BUDGET_HEADER, QueryBudgetExceeded, queries_counted,
+)
+from notes.models import Note
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class TestQueryBudget(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.auth_author = Client()
+        cls.auth_author.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(settings.NOTES_PAGE_SIZE + 1)
+        )
+        cls.note = Note.objects.first()
+
+    def setUp(self):
+        self.records = []
+        queries_counted.connect(self.collect)
+        self.addCleanup(queries_counted.disconnect, self.collect)
+
+    def collect(self, sender, view_name, stats, budget, **kwargs):
+        self.records.append((view_name, stats.count, budget))
+
+    def test_pages_fit_budget(self):
+        """Страницы заметок укладываются в бюджет запросов."""
+        urls = (
+            reverse('notes:home'),
+            reverse('notes:list'),
+            reverse('notes:detail', args=(self.note.slug,)),
+            reverse('notes:edit', args=(self.note.slug,)),
+            reverse('notes:delete', args=(self.note.slug,)),
+            reverse('notes:add'),
+            reverse('notes:success'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.auth_author.get(url)
+                view_name, count, budget = self.records[-1]
+                self.assertLessEqual(count, budget, view_name)
+
+    @override_settings(QUERY_BUDGETS={'notes:list': 0})
+    def test_exceeded_budget_fails_in_strict_mode(self):
+        """Превышение бюджета в строгом режиме — исключение."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.auth_author.get(reverse('notes:list'))
+
+    @override_settings(
+        QUERY_BUDGETS={'notes:list': 0}, QUERY_BUDGET_STRICT=False
+    )
+    def test_exceeded_budget_is_logged_in_production(self):
+        """Без строгого режима превышение бюджета пишется в лог."""
+        with self.assertLogs('notes.middleware', level='WARNING') as logs:
+            self.auth_author.get(reverse('notes:list'))
+        self.assertIn('notes:list', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'notes:add': 0})
+    def test_committed_write_is_not_failed(self):
+        """Запись уже зафиксирована: в строгом режиме превышение
+        отмечается заголовком и в логе, а не ответом 500.
+        """
+        with self.assertLogs('notes.middleware', level='WARNING'):
+            response = self.auth_author.post(reverse('notes:add'), data={
+                'title': 'Новая', 'text': 'Текст', 'slug': 'new',
+            })
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertTrue(response[BUDGET_HEADER].endswith('/0'))
+        self.assertTrue(Note.objects.filter(slug='new').exists())
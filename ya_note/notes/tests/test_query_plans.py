@@ -0,0 +1,57 @@
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+
+from notes.models import Note
+from notes.views import NoteDetail, NotesList
+
+User = get_user_model()
+
+
+@skipIf(connection.vendor != 'sqlite', 'EXPLAIN QUERY PLAN — SQLite')
+class TestQueryPlans(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note-slug',
+            author=cls.author
+        )
+
+    def get_view(self, view_class, path='/'):
+        request = RequestFactory().get(path)
+        request.user = self.author
+        view = view_class()
+        view.setup(request, slug=self.note.slug)
+        return view
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_view_querysets_use_indexes(self):
+        """Запросы представлений не читают таблицу целиком
+        и не сортируют результат во временном B-дереве.
+        """
+        querysets = {
+            'notes:list': self.get_view(NotesList).get_queryset(),
+            'notes:list?after': self.get_view(
+                NotesList, f'/?after={self.note.id}'
+            ).get_queryset(),
+            'notes:detail': self.get_view(NoteDetail).get_queryset().filter(
+                slug=self.note.slug
+            ),
+        }
+        for view_name, queryset in querysets.items():
+            with self.subTest(view_name=view_name):
+                plan = self.query_plan(queryset)
+                for step in plan:
+                    self.assertFalse(
+                        step.startswith('SCAN') and 'USING' not in step, plan
+                    )
+                    self.assertNotIn('TEMP B-TREE', step, plan)
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.routers import read_stats, reset_read_stats
+
+User = get_user_model()
+
+
+# Роль реплики играет сама тестовая база: проверяется выбор базы
+# роутером, а не репликация.
+@override_settings(DATABASE_REPLICAS=['default'])
+class TestReplicaRouting(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+
+    def setUp(self):
+        self.auth_author = Client()
+        self.auth_author.force_login(self.author)
+        reset_read_stats()
+
+    def test_list_and_detail_read_from_replica(self):
+        """Заметки читаются с реплики, а сессия и пользователь — всегда
+        с основной базы: отставшая реплика не вернёт удалённую сессию.
+        """
+        for url in (
+            reverse('notes:list'),
+            reverse('notes:detail', args=(self.note.slug,)),
+        ):
+            with self.subTest(url=url):
+                reset_read_stats()
+                self.auth_author.get(url)
+                stats = read_stats()
+                self.assertEqual(stats['primary'], 2)
+                self.assertGreater(stats['replicas'], 0)
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент какое-то время читает с основной базы."""
+        response = self.auth_author.post(
+            reverse('notes:add'), {'title': 'Новая', 'text': 'Текст'}
+        )
+        pin = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertGreater(float(pin.value), time.time())
+        reset_read_stats()
+        self.auth_author.get(reverse('notes:list'))
+        self.assertEqual(read_stats()['replicas'], 0)
+
+    def test_reads_do_not_pin(self):
+        response = self.auth_author.get(reverse('notes:list'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
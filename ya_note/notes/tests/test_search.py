@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import FTS_TABLE, index_notes, rebuild_index, search_ids
+
+User = get_user_model()
+
+
+class TestSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.auth_author = Client()
+        cls.auth_author.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Покупки', text='Купить молоко и хлеб', author=cls.author
+        )
+        Note.objects.create(
+            title='Молоко', text='Чужая заметка', author=cls.reader
+        )
+        cls.url = reverse('notes:search')
+
+    def test_search_scoped_to_author(self):
+        """Поиск идёт только по заметкам пользователя."""
+        response = self.auth_author.get(self.url, {'q': 'молоко'})
+        self.assertEqual(response.context['results'], [self.note])
+
+    def test_index_follows_save_and_delete(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        self.note.text = 'Купить сыр'
+        self.note.save()
+        self.assertEqual(search_ids('молоко', self.author, 10), [])
+        self.assertEqual(
+            search_ids('сыр', self.author, 10), [self.note.pk]
+        )
+        self.note.delete()
+        self.assertEqual(search_ids('сыр', self.author, 10), [])
+
+    def test_index_terms_carry_author(self):
+        """Термины индекса начинаются с автора: чужие заметки запрос
+        не перебирает.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT title FROM {FTS_TABLE} WHERE rowid = %s',
+                [self.note.pk],
+            )
+            self.assertEqual(cursor.fetchone(), (f'u{self.author.pk}_покупк',))
+
+    def test_bulk_created_notes_indexed(self):
+        """bulk_create сигналов не отправляет: заметки индексирует
+        index_notes().
+        """
+        Note.objects.bulk_create(
+            Note(title=f'Рецепт {index}', text='Тесто', slug=f'recipe-{index}',
+                 author=self.author)
+            for index in range(3)
+        )
+        recipes = Note.objects.filter(slug__startswith='recipe-')
+        self.assertEqual(search_ids('рецепт', self.author, 10), [])
+        index_notes(recipes)
+        self.assertCountEqual(
+            search_ids('рецепт', self.author, 10),
+            recipes.values_list('pk', flat=True),
+        )
+
+    def test_raw_sql_writes_do_not_need_django(self):
+        """Запись в notes_note не вызывает функций Python: её может делать
+        любой клиент SQLite, а индекс догоняет rebuild_index().
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'notes_note'"
+            )
+            self.assertEqual(cursor.fetchall(), [])
+            cursor.execute(
+                'INSERT INTO notes_note (title, text, slug, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                ['Мосты', 'Текст', 'mosty', self.author.pk],
+            )
+        self.assertEqual(search_ids('мост', self.author, 10), [])
+        rebuild_index()
+        self.assertEqual(
+            search_ids('мост', self.author, 10),
+            [Note.objects.get(slug='mosty').pk],
+        )
+
+    @override_settings(SEARCH_PAGE_SIZE=1)
+    def test_results_paginated(self):
+        """Результаты выдаются страницами, сначала — совпадения в заголовке."""
+        title_match = Note.objects.create(
+            title='Хлеб', text='Ржаной', author=self.author
+        )
+        response = self.auth_author.get(self.url, {'q': 'хлеб'})
+        self.assertEqual(response.context['results'], [title_match])
+        self.assertTrue(response.context['has_next'])
+        response = self.auth_author.get(self.url, {'q': 'хлеб', 'page': 2})
+        self.assertEqual(response.context['results'], [self.note])
+        self.assertFalse(response.context['has_next'])
+
+    def test_bad_page(self):
+        response = self.auth_author.get(self.url, {'q': 'хлеб', 'page': '0'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_anonymous_redirected(self):
+        response = self.client.get(self.url, {'q': 'хлеб'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.template.base import Parser, Template
+from django.template.loader_tags import IncludeNode
+from django.urls import reverse
+
+from notes.models import Note
+from notes.templating import install_profiler
+
+User = get_user_model()
+
+PATCHED = (
+    (Template, '_render'), (IncludeNode, 'render'), (Parser, 'find_filter'),
+)
+
+
+def django_methods():
+    return [getattr(cls, name) for cls, name in PATCHED]
+
+
+@override_settings(TEMPLATE_PROFILING=True)
+class TestRenderProfiler(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note-slug',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.auth_author = Client()
+        self.auth_author.force_login(self.author)
+        # Профилировщик включён только на время теста.
+        self.originals = django_methods()
+        self.addCleanup(
+            lambda: self.assertEqual(django_methods(), self.originals)
+        )
+        self.addCleanup(install_profiler())
+
+    def test_form_page_profile(self):
+        """В профиле есть шаблоны, include с ошибками формы и фильтры."""
+        response = self.auth_author.post(
+            reverse('notes:edit', args=(self.note.slug,)), data={}
+        )
+        timing = response['Server-Timing']
+        for entry in ('desc="notes/form.html"', 'desc="base.html"',
+                      'include-', 'desc="includes/errors.html"',
+                      'desc="escape"', 'filter-'):
+            self.assertIn(entry, timing)
+
+    def test_uninstall_restores_django_methods(self):
+        """Обработчик, который вернула install_profiler(), возвращает
+        исходные методы Django.
+        """
+        uninstall = install_profiler()
+        self.assertNotEqual(django_methods(), self.originals)
+        self.assertIs(install_profiler(), uninstall)
+        uninstall()
+        self.assertEqual(django_methods(), self.originals)
@@ -1,9 +1,19 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError, connection
+from django.http import StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
+from .cache import cached_for_user
+from .db import RetryOnLockMixin
+from .export import FORMATS, export_rows, resume_after
 from .forms import NoteForm
+from .mixins import CachedObjectMixin
 from .models import Note
+from .routers import ReplicaReadMixin
+from .search import parse_page, search_page
 
 
 class Home(generic.TemplateView):
@@ -16,7 +26,7 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
-class NoteBase(LoginRequiredMixin):
+class NoteBase(LoginRequiredMixin, RetryOnLockMixin, CachedObjectMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
@@ -26,19 +36,36 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class SlugRaceMixin:
+    """Повторяет POST один раз, если slug заняли во время запроса.
+
+    Форма проверяет явно указанный slug заранее, но параллельный
+    запрос может занять его до INSERT. Тогда транзакция откатывается,
+    а при повторе clean_slug уже видит занятый slug, и пользователь
+    получает форму с обычной ошибкой вместо 500. Ошибка, которая повторилась,
+    пробрасывается. Внутри уже открытой транзакции повторять нельзя.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except IntegrityError:
+            if request.method != 'POST' or connection.in_atomic_block:
+                raise
+        return super().dispatch(request, *args, **kwargs)
+
+
+class NoteCreate(SlugRaceMixin, NoteBase, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(SlugRaceMixin, NoteBase, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
@@ -49,11 +76,107 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+class NotesList(ReplicaReadMixin, NoteBase, generic.ListView):
+    """Список всех заметок пользователя.
+
+    Заметки выводятся страницами по NOTES_PAGE_SIZE. Следующая страница
+    выбирается по id последней показанной заметки (?after=<id>), поэтому
+    запрос не замедляется на дальних страницах. Страницы берутся из кеша
+    заметок пользователя.
+    """
     template_name = 'notes/list.html'
 
+    def get_cursor(self):
+        """Id последней показанной заметки или None для первой страницы.
+
+        Ключ кеша строится из числа, а не из строки запроса: «?after=07»
+        и «?after=7» — одна и та же страница.
+        """
+        after = self.request.GET.get('after')
+        if not after:
+            return None
+        try:
+            return int(after)
+        except ValueError as error:
+            raise BadRequest('Некорректный курсор.') from error
 
-class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    def get_queryset(self):
+        """Загружаем только поля, которые нужны списку."""
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.get_cursor()
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        page_size = settings.NOTES_PAGE_SIZE
+        after = self.get_cursor()
+        notes = cached_for_user(
+            self.request.user.pk,
+            'list:{}:{}'.format(page_size, '' if after is None else after),
+            lambda: list(self.object_list[:page_size + 1]),
+        )
+        next_after = None
+        if len(notes) > page_size:
+            notes = notes[:page_size]
+            next_after = notes[-1].id
+        return super().get_context_data(
+            object_list=notes, next_after=next_after, **kwargs
+        )
+
+
+class NoteDetail(ReplicaReadMixin, NoteBase, generic.DetailView):
+    """Заметка подробно; заметка берётся из кеша заметок пользователя."""
     template_name = 'notes/detail.html'
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        return cached_for_user(
+            self.request.user.pk, 'detail:{}'.format(self.kwargs['slug']),
+            super().get_object,
+        )
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заметкам пользователя, по релевантности, постранично."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = parse_page(self.request.GET.get('page'))
+        context.update(query=query, page=page)
+        if query:
+            context.update(search_page(
+                query, self.request.user, page, settings.SEARCH_PAGE_SIZE
+            ))
+        return context
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя потоком.
+
+    ?format= — ndjson (по умолчанию), csv или zip; ?after= или
+    ?after_slug= продолжают прерванную выгрузку.
+    """
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in FORMATS:
+            raise BadRequest('Неизвестный формат выгрузки.')
+        export, content_type, extension = FORMATS[export_format]
+        after = resume_after(
+            request.user,
+            request.GET.get('after'), request.GET.get('after_slug'),
+        )
+        response = StreamingHttpResponse(
+            export(export_rows(request.user, after)),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{extension}"'
+        )
+        return response
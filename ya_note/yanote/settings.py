@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -23,10 +24,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'notes.middleware.query_budget_middleware',
+    'notes.templating.template_profiler_middleware',
+    'notes.routers.replica_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.auth.CachedAuthenticationMiddleware',
+    'notes.profiling.profiling_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -49,16 +54,165 @@ TEMPLATES = [
     },
 ]
 
+# Профиль шаблонов выбирается переменной окружения TEMPLATE_PROFILE:
+# 'development' — шаблоны перечитываются с диска, 'production' —
+# кеширующий загрузчик, все шаблоны компилируются при старте.
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'development')
+
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+TEMPLATE_WARMUP = TEMPLATE_PROFILE == 'production'
+
+# Время отрисовки шаблонов, include и фильтров по каждому запросу:
+# лог notes.templating и заголовок Server-Timing.
+TEMPLATE_PROFILING = os.environ.get('TEMPLATE_PROFILING') == '1'
+
+# Выборочное профилирование запросов (notes/profiling.py): переменная
+# окружения PROFILING=1 включает middleware, PROFILING_SAMPLE_RATE — доля
+# профилируемых запросов помимо заголовка X-Profile и ?profile=1.
+PROFILING_ENABLED = os.environ.get('PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = BASE_DIR / '.profiles'
+PROFILING_MAX_FILES = 200
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
-DATABASES = {
-    'default': {
+# Профиль БД выбирается переменной окружения DATABASE_PROFILE:
+# 'sqlite' — разработка, 'sqlite-wal' — боевой SQLite (WAL, постоянные
+# соединения), 'postgres' — PostgreSQL с повторным использованием
+# соединений (параметры — из переменных POSTGRES_*).
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'sqlite-wal': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 20},
+    },
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'yanote'),
+        'USER': os.environ.get('POSTGRES_USER', 'yanote'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DATABASE_PROFILE],
+}
+
+# Реплики для чтения списка и страниц заметок: переменная окружения
+# DATABASE_REPLICAS — через запятую пути к файлам SQLite (локально их
+# заполняет команда sync_replicas) или хосты PostgreSQL. Псевдонимы —
+# replica1, replica2 и т. д.; в тестах реплики смотрят в тестовую default.
+DATABASES.update({
+    f'replica{index}': {
+        **DATABASES['default'],
+        'HOST' if DATABASE_PROFILE == 'postgres' else 'NAME': source,
+        'TEST': {'MIRROR': 'default'},
     }
+    for index, source in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')),
+        start=1,
+    )
+})
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['notes.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает с основной базы
+# (read-your-writes) и имя cookie, которая это отмечает.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'db_pin'
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,
+    'temp_store': 'memory',
+} if DATABASE_PROFILE == 'sqlite-wal' else {}
+
+# Повторы записывающих запросов при «database is locked»: число повторов
+# и начальная пауза в секундах (удваивается с каждой попыткой).
+DB_LOCK_RETRIES = 5
+DB_LOCK_RETRY_DELAY = 0.05
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+    },
 }
 
+# Общий кеш сессий и пользователей: переменная окружения
+# SESSION_CACHE_BACKEND — 'memcached' или 'redis' (пакет django-redis),
+# SESSION_CACHE_LOCATION — адрес сервера. Без общего кеша сессия
+# и пользователь читаются из БД: LocMemCache у каждого процесса свой,
+# и после выхода или смены пароля другой процесс видел бы старую
+# сессию.
+SHARED_CACHE_BACKENDS = {
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+SESSION_CACHE_BACKEND = os.environ.get('SESSION_CACHE_BACKEND') or None
+
+if SESSION_CACHE_BACKEND:
+    CACHES['sessions'] = {
+        **SHARED_CACHE_BACKENDS[SESSION_CACHE_BACKEND],
+        **({'LOCATION': os.environ['SESSION_CACHE_LOCATION']}
+           if os.environ.get('SESSION_CACHE_LOCATION') else {}),
+    }
+
+# С общим кешем сессии читаются из кеша, в БД только пишутся. Вариант
+# без хранилища — 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SESSION_CACHE_BACKEND
+    else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'sessions' if SESSION_CACHE_BACKEND else 'default'
+
+# Кеш пользователей для notes.auth.CachedAuthenticationMiddleware:
+# без общего кеша пользователь читается из БД на каждом запросе.
+USER_CACHE_ENABLED = bool(SESSION_CACHE_BACKEND)
+USER_CACHE_ALIAS = SESSION_CACHE_ALIAS
+USER_CACHE_TIMEOUT = 60
+
+# Кеш списка и страниц заметок пользователя (notes/cache.py). Если
+# процессов несколько, кеш должен быть общим (memcached, redis), иначе
+# процесс не узнает о смене версии заметок в другом процессе.
+NOTES_CACHE_ENABLED = True
+NOTES_CACHE_ALIAS = 'notes'
+NOTES_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +241,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Сколько заметок показывать на одной странице списка.
+NOTES_PAGE_SIZE = 100
+
+# Заметок в одной пачке при потоковой выгрузке.
+NOTES_EXPORT_CHUNK_SIZE = 500
+
+# Результатов поиска на одной странице.
+SEARCH_PAGE_SIZE = 20
+
+# Допустимое число SQL-запросов на один HTTP-запрос к представлению.
+# Учитываются и запросы сессии и пользователя (по одному; с общим кешем
+# сессий — только при промахе кеша).
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 7,
+    'notes:delete': 5,
+    'notes:success': 2,
+    'notes:search': 4,
+}
+# True — превышение бюджета вызывает исключение, False — предупреждение.
+QUERY_BUDGET_STRICT = DEBUG
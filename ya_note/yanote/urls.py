@@ -4,6 +4,8 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from notes import profiling
+
 urlpatterns = [
     path('', include('notes.urls')),
     path('admin/', admin.site.urls),
@@ -33,4 +35,16 @@ auth_urls = ([
     ),
 ], 'users')
 
-urlpatterns += [path('auth/', include(auth_urls))]
+profiling_urls = ([
+    path('', profiling.profile_index, name='index'),
+    path(
+        '<slug:profile_id>/<str:kind>/',
+        profiling.profile_file,
+        name='file',
+    ),
+], 'profiling')
+
+urlpatterns += [
+    path('auth/', include(auth_urls)),
+    path('profiles/', include(profiling_urls)),
+]